@@ -0,0 +1,188 @@
+"""
+Online anomaly and degradation detection on live operating points.
+
+AnomalyDetector keeps a few numbers of state per well and updates them with
+every reading, so a sample costs the same whatever the history length and a
+whole fleet updates in one vectorized pass. Each well first learns a
+baseline over WARMUP_SAMPLES readings, then watches for:
+
+    FLOW DRIFT UP/DOWN  two-sided CUSUM of the standardized flow
+    HEAD DECLINE        lower CUSUM of head per stage relative to the
+                        catalog curve at the design rate (pump wear)
+    GAS LOCK            differential pressure collapsed and cycling
+    PUMP OFF            intake pressure drawn down to a fraction of baseline
+
+Events are edge-triggered and timestamped. A flow drift or head decline
+re-baselines that signal, so a new steady state is reported once, not on
+every sample.
+"""
+import threading
+from collections import deque
+
+import numpy as np
+
+# Readings used to learn each well's baseline
+WARMUP_SAMPLES = 30
+
+# CUSUM allowance and decision interval (in standard deviations), and the floor on the flow deviation
+CUSUM_K = 0.5
+CUSUM_H = 5.0
+MIN_FLOW_SIGMA_PCT = 1.0
+
+# Head per stage decline (fraction of baseline) tracked by the head CUSUM per sample, and its decision interval
+HEAD_DECLINE_STEP = 0.02
+HEAD_CUSUM_H = 5.0
+
+# Gas lock: delta P below this fraction of baseline while cycling by more than this fraction per sample
+# (smoothed with CYCLING_ALPHA); it lasts until the cycling dies down
+GAS_LOCK_DP_RATIO = 0.5
+GAS_LOCK_CYCLING = 0.1
+CYCLING_ALPHA = 0.3
+
+# Pump off: intake pressure below this fraction of baseline, cleared once it recovers past this multiple of it
+PUMP_OFF_PIP_RATIO = 0.15
+PUMP_OFF_RECOVERY = 2.0
+
+# Events kept by a detector
+EVENT_HISTORY = 500
+
+EVENT_TYPES = ['FLOW DRIFT UP', 'FLOW DRIFT DOWN', 'HEAD DECLINE', 'GAS LOCK', 'PUMP OFF']
+
+# Per-well state and the value a new well starts from
+_STATE_FIELDS = {'last_time': -np.inf, 'count': 0.0, 'q_mean': 0.0, 'q_m2': 0.0, 'q_sigma': 0.0, 's_hi': 0.0,
+                 's_lo': 0.0, 'head_base': 0.0, 'head_s': 0.0, 'dp_base': 0.0, 'dp_last': 0.0, 'dp_cycling': 0.0,
+                 'pip_base': 0.0, 'gas_lock': 0.0, 'pump_off': 0.0}
+
+
+def _seconds(timestamps):
+    """Timestamps (datetimes, datetime64 or ISO strings) as float seconds"""
+    return np.asarray(timestamps, dtype='datetime64[us]').astype(np.int64) / 1e6
+
+
+class AnomalyDetector:
+    """Per-well online detector state, kept as one array per field with a row per well"""
+
+    def __init__(self, capacity=16):
+        self._lock = threading.Lock()
+        self._rows = {}
+        self._state = {field: np.full(capacity, initial) for field, initial in _STATE_FIELDS.items()}
+        self.events = deque(maxlen=EVENT_HISTORY)
+
+    def _row_indices(self, wells):
+        """Row of every well, adding rows (and growing the state arrays) for new wells"""
+        rows = np.empty(len(wells), dtype=np.int64)
+        for i, well in enumerate(wells):
+            row = self._rows.get(well)
+            if row is None:
+                row = self._rows[well] = len(self._rows)
+                capacity = len(self._state['count'])
+                if row >= capacity:
+                    for field, values in self._state.items():
+                        self._state[field] = np.concatenate((values, np.full(capacity, _STATE_FIELDS[field])))
+            rows[i] = row
+        return rows
+
+    def update(self, wells, timestamps, q, h_per_stage, delta_p, pip, reference_head):
+        """
+        Feed one reading per well (arrays aligned with `wells`). NaN readings
+        and readings no newer than the well's last one are skipped, so a
+        table polled faster than it changes is only counted once.
+        `reference_head` is the catalog head per stage at each well's design
+        rate and drive speed. Returns the events raised.
+        """
+        q, h_per_stage, delta_p, pip, reference_head = (
+            np.atleast_1d(np.asarray(v, dtype=np.float64)) for v in (q, h_per_stage, delta_p, pip, reference_head))
+        wells = list(np.atleast_1d(np.asarray(wells, dtype=object)))
+        timestamps = np.broadcast_to(np.asarray(timestamps, dtype=object), (len(wells),))
+        seconds = _seconds(timestamps)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            head_ratio = h_per_stage / reference_head
+        valid = np.isfinite(q) & np.isfinite(head_ratio) & np.isfinite(delta_p) & np.isfinite(pip)
+
+        with self._lock:
+            rows = self._row_indices(wells)
+            valid &= seconds > self._state['last_time'][rows]
+            rows = rows[valid]
+            idx = np.flatnonzero(valid)
+            q, head_ratio, delta_p, pip = q[valid], head_ratio[valid], delta_p[valid], pip[valid]
+            s = {field: values[rows] for field, values in self._state.items()}
+            s['last_time'] = seconds[valid]
+
+            # Warmup: running means (Welford for the flow variance)
+            warming = s['count'] < WARMUP_SAMPLES
+            n = s['count'] + 1
+            q_delta = q - s['q_mean']
+            s['q_mean'] = np.where(warming, s['q_mean'] + q_delta / n, s['q_mean'])
+            s['q_m2'] = np.where(warming, s['q_m2'] + q_delta * (q - s['q_mean']), s['q_m2'])
+            for field, value in (('head_base', head_ratio), ('dp_base', delta_p), ('pip_base', pip)):
+                s[field] = np.where(warming, s[field] + (value - s[field]) / n, s[field])
+            s['q_sigma'] = np.where(warming, np.sqrt(s['q_m2'] / np.maximum(n - 1, 1)), s['q_sigma'])
+            s['q_sigma'] = np.maximum(s['q_sigma'], MIN_FLOW_SIGMA_PCT / 100 * np.abs(s['q_mean']))
+            s['count'] = n
+            armed = ~warming
+
+            # Flow drift: two-sided CUSUM of the standardized flow
+            z = (q - s['q_mean']) / s['q_sigma']
+            s['s_hi'] = np.where(armed, np.maximum(0, s['s_hi'] + z - CUSUM_K), 0)
+            s['s_lo'] = np.where(armed, np.maximum(0, s['s_lo'] - z - CUSUM_K), 0)
+            drift_up = s['s_hi'] > CUSUM_H
+            drift_down = s['s_lo'] > CUSUM_H
+            drifted = drift_up | drift_down
+            s['q_mean'] = np.where(drifted, q, s['q_mean'])
+            s['s_hi'] = np.where(drifted, 0, s['s_hi'])
+            s['s_lo'] = np.where(drifted, 0, s['s_lo'])
+
+            # Head decline against the catalog curve: lower CUSUM of the head ratio vs its baseline
+            with np.errstate(divide='ignore', invalid='ignore'):
+                decline = (s['head_base'] - head_ratio) / (s['head_base'] * HEAD_DECLINE_STEP)
+            s['head_s'] = np.where(armed, np.maximum(0, s['head_s'] + np.nan_to_num(decline) - 1), 0)
+            head_decline = s['head_s'] > HEAD_CUSUM_H
+            s['head_base'] = np.where(head_decline, head_ratio, s['head_base'])
+            s['head_s'] = np.where(head_decline, 0, s['head_s'])
+
+            # Gas lock and pump off: latched conditions, reported when they start
+            with np.errstate(divide='ignore', invalid='ignore'):
+                step = np.abs(delta_p - s['dp_last']) / s['dp_base']
+            s['dp_cycling'] = np.where(s['count'] > 1,
+                                       CYCLING_ALPHA * np.nan_to_num(step) + (1 - CYCLING_ALPHA) * s['dp_cycling'], 0)
+            s['dp_last'] = delta_p
+            cycling = s['dp_cycling'] > GAS_LOCK_CYCLING
+            gas_lock = armed & cycling & ((delta_p < GAS_LOCK_DP_RATIO * s['dp_base']) | (s['gas_lock'] > 0))
+            pump_off = armed & ((pip < PUMP_OFF_PIP_RATIO * s['pip_base'])
+                                | ((s['pump_off'] > 0) & (pip < PUMP_OFF_RECOVERY * PUMP_OFF_PIP_RATIO * s['pip_base'])))
+            gas_lock_start = gas_lock & (s['gas_lock'] == 0)
+            pump_off_start = pump_off & (s['pump_off'] == 0)
+            s['gas_lock'] = gas_lock.astype(float)
+            s['pump_off'] = pump_off.astype(float)
+
+            for field, values in s.items():
+                self._state[field][rows] = values
+
+            raised = []
+            for event, flags, values in (('FLOW DRIFT UP', drift_up, q), ('FLOW DRIFT DOWN', drift_down, q),
+                                         ('HEAD DECLINE', head_decline, head_ratio),
+                                         ('GAS LOCK', gas_lock_start, delta_p), ('PUMP OFF', pump_off_start, pip)):
+                for i in np.flatnonzero(flags):
+                    raised.append({'timestamp': timestamps[idx[i]], 'well': wells[idx[i]], 'event': event,
+                                   'value': float(values[i])})
+            self.events.extend(raised)
+        return raised
+
+    def update_point(self, well, point):
+        """Feed one live operating point dict (esp_design.LIVE_FIELDS plus timestamp) of one well"""
+        return self.update([well], point['timestamp'], point['live_Q'], point['live_H_per_stage'],
+                           point['live_delta_p'], point['live_pip'], point['live_design_H_per_stage'])
+
+    def state(self, well):
+        """Current detector values of one well, None before its first reading"""
+        with self._lock:
+            row = self._rows.get(well)
+            if row is None:
+                return None
+            return {field: float(values[row]) for field, values in self._state.items()}
+
+    def recent(self, well=None, n=20):
+        """Newest events first, of one well or of all wells"""
+        with self._lock:
+            events = [e for e in reversed(self.events) if well is None or e['well'] == well]
+        return events[:n]
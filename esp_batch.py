@@ -0,0 +1,162 @@
+"""
+Headless batch ESP design for a whole field.
+
+Streams a well table (CSV or Parquet, one row per well with a column for every
+field in REQUIRED_FIELDS) through compute_esp_design in chunks and writes the
+full result set to Parquet.
+
+Usage:
+    python esp_batch.py wells.csv designs.parquet
+    python esp_batch.py wells.parquet designs.parquet --chunk-size 5000 --workers 8
+    python esp_batch.py wells.csv designs.parquet --operating-point
+"""
+import argparse
+import os
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+from esp_catalog import load_catalog
+from esp_design import (DEFAULT_Q_CURVE, DEFAULT_H_CURVE, REQUIRED_FIELDS, compute_esp_design,
+                        solve_operating_point)
+
+# Columns copied from the well table into the results so rows can be identified
+ID_COLUMNS = ['well_name']
+
+# Design status of a well: designed, rejected for missing/non-numeric required inputs, infeasible because
+# free gas gas-locks the stages, or no valid stage count
+STATUS_OK = 'OK'
+STATUS_INVALID_INPUT = 'INVALID INPUT'
+STATUS_GAS_LOCKED = 'GAS OVER LIMIT'
+STATUS_NO_STAGES = 'NO STAGE COUNT'
+
+
+def iter_well_chunks(path, chunk_size):
+    """Yield the well table as DataFrames of at most chunk_size rows"""
+    suffix = os.path.splitext(path)[1].lower()
+    if suffix == '.parquet':
+        parquet_file = pq.ParquetFile(path)
+        for batch in parquet_file.iter_batches(batch_size=chunk_size):
+            yield batch.to_pandas()
+    elif suffix == '.csv':
+        yield from pd.read_csv(path, chunksize=chunk_size)
+    else:
+        raise ValueError(f"Unsupported well table format '{suffix}' (use .csv or .parquet)")
+
+
+def design_chunk(wells, q_curve, h_curve, operating_point=False):
+    """
+    Design one chunk of wells, keeping the identifying columns in front. With
+    operating_point, the nodal solver's operating point for the designed stage
+    count is appended.
+
+    Every row gets a status. Rows with a missing, non-numeric or non-finite
+    required input are INVALID INPUT: their results are left empty and
+    invalid_inputs names the offending fields. Rows with more free gas at the
+    first stage than the stages tolerate are GAS OVER LIMIT, other rows the
+    engine cannot size (no positive head) NO STAGE COUNT; neither gets a
+    stage count.
+    """
+    fields = [field for field, _ in REQUIRED_FIELDS]
+    missing = [field for field in fields if field not in wells.columns]
+    if missing:
+        raise ValueError(f"Well table is missing columns: {', '.join(missing)}")
+
+    wells = wells.copy()
+    wells[fields] = wells[fields].apply(pd.to_numeric, errors='coerce')
+    bad = ~np.isfinite(wells[fields].to_numpy(dtype=float))
+    invalid = bad.any(axis=1)
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        results = compute_esp_design(wells, q_curve, h_curve)
+        if operating_point:
+            results = results.join(solve_operating_point(wells, results['n_stages'], q_curve, h_curve))
+    results = results.mask(pd.Series(invalid, index=results.index), axis=0)
+
+    names = np.array(fields)
+    results.insert(0, 'invalid_inputs', [', '.join(names[row]) for row in bad])
+    results.insert(0, 'status', np.select(
+        [invalid, results['gas_over_limit'].fillna(False).astype(bool), results['n_stages'].isna()],
+        [STATUS_INVALID_INPUT, STATUS_GAS_LOCKED, STATUS_NO_STAGES], STATUS_OK))
+    for column in reversed(ID_COLUMNS):
+        if column in wells.columns:
+            results.insert(0, column, wells[column].values)
+    return results.reset_index(drop=True)
+
+
+def run_batch(input_path, output_path, q_curve=DEFAULT_Q_CURVE, h_curve=DEFAULT_H_CURVE,
+              chunk_size=10000, workers=None, operating_point=False):
+    """
+    Design every well in input_path and write the results to output_path.
+
+    At most two chunks per worker are in flight at a time, so memory stays flat
+    however large the table is. Returns the number of wells written and how
+    many of them were not designed (status other than OK).
+    """
+    workers = workers or os.cpu_count() or 1
+    writer = None
+    n_wells = n_flagged = 0
+
+    def write(results):
+        nonlocal writer, n_wells, n_flagged
+        if writer is None:
+            table = pa.Table.from_pandas(results, preserve_index=False)
+            writer = pq.ParquetWriter(output_path, table.schema)
+        else:
+            table = pa.Table.from_pandas(results, schema=writer.schema, preserve_index=False)
+        writer.write_table(table)
+        n_wells += len(results)
+        n_flagged += int((results['status'] != STATUS_OK).sum())
+
+    try:
+        if workers == 1:
+            for chunk in iter_well_chunks(input_path, chunk_size):
+                write(design_chunk(chunk, q_curve, h_curve, operating_point))
+        else:
+            with ProcessPoolExecutor(max_workers=workers) as pool:
+                pending = deque()
+                for chunk in iter_well_chunks(input_path, chunk_size):
+                    pending.append(pool.submit(design_chunk, chunk, q_curve, h_curve, operating_point))
+                    if len(pending) >= 2 * workers:
+                        write(pending.popleft().result())
+                while pending:
+                    write(pending.popleft().result())
+    finally:
+        if writer is not None:
+            writer.close()
+
+    return n_wells, n_flagged
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Batch ESP design for a field well table")
+    parser.add_argument('input', help="Well table (.csv or .parquet), one row per well")
+    parser.add_argument('output', help="Parquet file for the design results")
+    parser.add_argument('--pump-curve', help="Pump curve or catalog (.csv/.parquet/.xlsx/.xls), default ESP-3000")
+    parser.add_argument('--pump-model', help="Model to use from a multi-pump catalog (default: first)")
+    parser.add_argument('--chunk-size', type=int, default=10000, help="Wells per chunk (default 10000)")
+    parser.add_argument('--workers', type=int, default=None, help="Worker processes (default: all cores)")
+    parser.add_argument('--operating-point', action='store_true',
+                        help="Also solve the pump/system operating point for the designed stages")
+    args = parser.parse_args(argv)
+
+    q_curve, h_curve = DEFAULT_Q_CURVE, DEFAULT_H_CURVE
+    if args.pump_curve:
+        catalog = load_catalog(args.pump_curve)
+        q_curve, h_curve = catalog.curve(args.pump_model or catalog.models[0])
+
+    start = time.perf_counter()
+    n_wells, n_flagged = run_batch(args.input, args.output, q_curve, h_curve, args.chunk_size, args.workers,
+                        args.operating_point)
+    print(f"Designed {n_wells} wells in {time.perf_counter() - start:.2f} s -> {args.output}")
+    if n_flagged:
+        print(f"{n_flagged} wells not designed (see the status and invalid_inputs columns)")
+
+
+if __name__ == '__main__':
+    main()
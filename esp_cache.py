@@ -0,0 +1,150 @@
+"""
+Persistent cache of design results.
+
+A design is identified by design_key: a SHA-256 of the normalized inputs
+(every REQUIRED_FIELDS and OPTIONAL_FIELDS value as float64, rounded to
+KEY_SIGNIFICANT_DIGITS so 50 and 50.0, or a value that went through a
+widget round trip, hash the same), the pump curve's key and
+DESIGN_CACHE_VERSION. Results are small JSON documents, one file per key,
+written atomically, so every server worker and restart shares them. The
+directory keeps the DESIGN_CACHE_SIZE most recently used entries; a hit
+refreshes the file's mtime, which is what eviction orders by.
+
+Bump DESIGN_CACHE_VERSION whenever the design engine's results change.
+"""
+import hashlib
+import json
+import os
+import threading
+from collections import OrderedDict
+
+import numpy as np
+
+from esp_design import OPTIONAL_FIELDS, REQUIRED_FIELDS
+
+DESIGN_CACHE_VERSION = 5
+
+# Entries kept on disk, and the most recent of them also kept in memory
+DESIGN_CACHE_SIZE = 2000
+MEMORY_CACHE_SIZE = 128
+
+# Significant digits of an input that take part in the key
+KEY_SIGNIFICANT_DIGITS = 10
+
+ENTRY_SUFFIX = '.json'
+
+
+def default_cache_path():
+    """Cache directory: $ESP_DESIGN_CACHE, or design_cache/ next to this module"""
+    return os.environ.get('ESP_DESIGN_CACHE',
+                          os.path.join(os.path.dirname(os.path.abspath(__file__)), 'design_cache'))
+
+
+def normalized_inputs(inputs):
+    """Design inputs in a fixed field order as float64 (missing optional fields at their default, None as NaN)"""
+    values = [inputs.get(field) for field, _ in REQUIRED_FIELDS]
+    values += [OPTIONAL_FIELDS[field] if inputs.get(field) is None else inputs[field] for field in OPTIONAL_FIELDS]
+    values = np.array([np.nan if value is None else value for value in values], dtype=np.float64)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        magnitude = np.floor(np.log10(np.abs(values)))
+    decimals = np.where(np.isfinite(magnitude), KEY_SIGNIFICANT_DIGITS - 1 - magnitude, 0)
+    scale = 10.0 ** decimals
+    values = np.round(values * scale) / scale
+    return values + 0.0  # -0.0 -> 0.0
+
+
+def design_key(inputs, pump_curve):
+    """Stable content hash of a design's inputs and pump curve"""
+    digest = hashlib.sha256()
+    digest.update(f"esp-design-v{DESIGN_CACHE_VERSION}|".encode())
+    digest.update(normalized_inputs(inputs).tobytes())
+    digest.update(b'|')
+    digest.update(pump_curve.key.encode())
+    return digest.hexdigest()
+
+
+def _plain(value):
+    """JSON-serializable copy of a result value (NumPy scalars to Python, nested dicts)"""
+    if isinstance(value, dict):
+        return {key: _plain(item) for key, item in value.items()}
+    if isinstance(value, np.generic):
+        return value.item()
+    return value
+
+
+class DesignCache:
+    """Content-addressed, LRU-evicted design results on disk with an in-memory front"""
+
+    def __init__(self, path=None, capacity=DESIGN_CACHE_SIZE, memory_capacity=MEMORY_CACHE_SIZE):
+        self.path = path or default_cache_path()
+        self.capacity = capacity
+        self.memory_capacity = memory_capacity
+        self._memory = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def _file(self, key):
+        return os.path.join(self.path, key + ENTRY_SUFFIX)
+
+    def _remember(self, key, entry):
+        self._memory[key] = entry
+        self._memory.move_to_end(key)
+        if len(self._memory) > self.memory_capacity:
+            self._memory.popitem(last=False)
+
+    def get(self, key):
+        """Cached result dict for a design_key, or None"""
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is None:
+                try:
+                    with open(self._file(key), encoding='utf-8') as f:
+                        entry = json.load(f)
+                except (OSError, ValueError):
+                    self.misses += 1
+                    return None
+            self._remember(key, entry)
+            self.hits += 1
+        try:
+            os.utime(self._file(key))
+        except OSError:
+            pass
+        return entry
+
+    def put(self, key, entry):
+        """Store a result dict (JSON-serializable after NumPy scalars are converted) under a design_key"""
+        entry = _plain(entry)
+        with self._lock:
+            self._remember(key, entry)
+            os.makedirs(self.path, exist_ok=True)
+            tmp = self._file(key) + f".{os.getpid()}.{threading.get_ident()}.tmp"
+            with open(tmp, 'w', encoding='utf-8') as f:
+                json.dump(entry, f, separators=(',', ':'))
+            os.replace(tmp, self._file(key))
+            self._evict()
+        return entry
+
+    def _evict(self):
+        """Drop the least recently used files beyond capacity"""
+        names = [name for name in os.listdir(self.path) if name.endswith(ENTRY_SUFFIX)]
+        if len(names) <= self.capacity:
+            return
+        stamps = []
+        for name in names:
+            try:
+                stamps.append((os.stat(os.path.join(self.path, name)).st_mtime_ns, name))
+            except OSError:
+                pass
+        for _, name in sorted(stamps)[:len(stamps) - self.capacity]:
+            self._memory.pop(name[:-len(ENTRY_SUFFIX)], None)
+            try:
+                os.remove(os.path.join(self.path, name))
+            except OSError:
+                pass
+
+    def __len__(self):
+        try:
+            return sum(name.endswith(ENTRY_SUFFIX) for name in os.listdir(self.path))
+        except OSError:
+            return 0
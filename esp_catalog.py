@@ -0,0 +1,202 @@
+"""
+Pump catalog ingestion.
+
+Vendor catalogs hold hundreds of pump models, either as one sheet per model
+or as long-format rows (model, flow, head, bhp, efficiency). load_catalog reads
+a whole catalog in one pass into a PumpCatalog: flat Q/H/BHP/efficiency arrays
+plus an offsets index, so model i owns rows offsets[i]:offsets[i + 1]. Files are
+read in float64, like a single curve; the pump library's catalog views its
+float32 memory map instead of copying it.
+"""
+import io
+import os
+
+import numpy as np
+import pandas as pd
+
+from esp_curves import get_pump_curve
+
+try:
+    import pyarrow.csv as pa_csv
+    import pyarrow.parquet as pq
+except ImportError:  # pandas readers are used instead
+    pa_csv = pq = None
+
+# Accepted column names for each catalog field (compared lower-case)
+COLUMN_ALIASES = {
+    'model': ('model', 'pump_model', 'pump', 'name'),
+    'flow': ('flow', 'q', 'rate', 'flow_bpd', 'flow rate (bpd)'),
+    'head': ('head', 'h', 'head_ft', 'head per stage (ft)'),
+    'bhp': ('bhp', 'bhp_per_stage', 'power'),
+    'efficiency': ('efficiency', 'eff', 'pump_efficiency'),
+}
+
+CURVE_FIELDS = ['flow', 'head', 'bhp', 'efficiency']
+
+
+class PumpCatalog:
+    """Array-backed store of many single-stage pump curves"""
+
+    def __init__(self, models, offsets, q, h, bhp=None, efficiency=None, dtype=np.float64):
+        self.models = list(models)
+        self.offsets = np.asarray(offsets, dtype=np.int64)
+        self.q = np.asarray(q, dtype=dtype)
+        self.h = np.asarray(h, dtype=dtype)
+        self.bhp = np.full(self.q.shape, np.nan, dtype) if bhp is None else np.asarray(bhp, dtype=dtype)
+        self.efficiency = (np.full(self.q.shape, np.nan, dtype) if efficiency is None
+                           else np.asarray(efficiency, dtype=dtype))
+        self._index = {model: i for i, model in enumerate(self.models)}
+
+    def __len__(self):
+        return len(self.models)
+
+    def __contains__(self, model):
+        return model in self._index
+
+    def index(self, model):
+        """Position of a model in the catalog"""
+        return self._index[model]
+
+    def rows(self, model):
+        """Slice of the flat arrays that holds this model's curve"""
+        i = self._index[model]
+        return slice(self.offsets[i], self.offsets[i + 1])
+
+    def curve(self, model):
+        """Flow and head per stage arrays (views into the catalog) for one model"""
+        rows = self.rows(model)
+        return self.q[rows], self.h[rows]
+
+    def get(self, model):
+        """All curve arrays for one model as a dict of views"""
+        rows = self.rows(model)
+        return {'flow': self.q[rows], 'head': self.h[rows],
+                'bhp': self.bhp[rows], 'efficiency': self.efficiency[rows]}
+
+    def pump_curve(self, model):
+        """Shared PumpCurve (interpolators) for one model"""
+        return get_pump_curve(*self.curve(model))
+
+    @classmethod
+    def from_frame(cls, df):
+        """
+        Build a catalog from long-format rows with model/flow/head columns and
+        optional bhp/efficiency. Models keep their first-appearance order and
+        points are sorted by flow within each model.
+        """
+        numeric = {c: pd.to_numeric(df[c], errors='coerce') for c in CURVE_FIELDS if c in df.columns}
+        df = df.assign(**numeric).dropna(subset=['flow', 'head'])
+        codes, models = pd.factorize(df['model'].astype(str), sort=False)
+        order = np.lexsort((df['flow'].to_numpy(), codes))
+        offsets = np.zeros(len(models) + 1, dtype=np.int64)
+        np.cumsum(np.bincount(codes, minlength=len(models)), out=offsets[1:])
+
+        def column(name):
+            if name not in df.columns:
+                return None
+            return df[name].to_numpy(dtype=np.float64)[order]
+
+        return cls(models, offsets, column('flow'), column('head'), column('bhp'), column('efficiency'))
+
+
+def _normalize_columns(df):
+    """Rename known column aliases to model/flow/head/bhp/efficiency"""
+    renames = {}
+    for column in df.columns:
+        name = str(column).strip().lower()
+        for field, aliases in COLUMN_ALIASES.items():
+            if name in aliases and field not in renames.values():
+                renames[column] = field
+    return df.rename(columns=renames)
+
+
+def _positional_columns(df):
+    """Name headerless columns flow, head, bhp, efficiency in order"""
+    df = df.iloc[:, :len(CURVE_FIELDS)]
+    df.columns = CURVE_FIELDS[:df.shape[1]]
+    return df
+
+
+def _has_header(df):
+    """True when the first row of a headerless read is text rather than numbers"""
+    if df.empty:
+        return False
+    return pd.isna(pd.to_numeric(df.iloc[0, 0], errors='coerce'))
+
+
+def _table_to_frame(df, default_model):
+    """Turn a single table (sheet or file) into long-format rows"""
+    if _has_header(df):
+        df = _normalize_columns(df.iloc[1:].set_axis(df.iloc[0].astype(str), axis=1))
+    else:
+        df = _positional_columns(df)
+    if 'model' not in df.columns:
+        df = df.assign(model=default_model)
+    return df[[c for c in ['model'] + CURVE_FIELDS if c in df.columns]]
+
+
+def _read_csv(source, default_model):
+    """Read a CSV catalog with pyarrow, falling back to pandas"""
+    if pa_csv is None:
+        return _table_to_frame(pd.read_csv(source, header=None), default_model)
+
+    if hasattr(source, 'read'):
+        raw = source.read()
+    else:
+        with open(source, 'rb') as f:
+            raw = f.read()
+    first_field = raw.split(b'\n', 1)[0].split(b',', 1)[0].strip()
+    try:
+        float(first_field)
+        headerless = True
+    except ValueError:
+        headerless = False
+    options = pa_csv.ReadOptions(autogenerate_column_names=headerless)
+    df = pa_csv.read_csv(io.BytesIO(raw), read_options=options).to_pandas()
+    df = _positional_columns(df) if headerless else _normalize_columns(df)
+    if 'model' not in df.columns:
+        df = df.assign(model=default_model)
+    return df
+
+
+def _excel_engine():
+    """Use the Rust calamine reader when it is installed, it is much faster than openpyxl"""
+    try:
+        import python_calamine  # noqa: F401
+        return 'calamine'
+    except ImportError:
+        return None
+
+
+def load_catalog(source, fmt=None, default_model='custom'):
+    """
+    Load a pump catalog from CSV, Parquet or Excel in one pass.
+
+    `source` is a path or a binary file-like object; `fmt` ('csv', 'parquet',
+    'xlsx' or 'xls') is taken from the path suffix when not given. CSV and
+    Parquet files are read with pyarrow when it is available. Every Excel sheet
+    is a model named after the sheet, unless the sheet has a model column.
+    Headerless tables are read as flow, head, bhp, efficiency columns.
+    """
+    if fmt is None:
+        fmt = os.path.splitext(str(source))[1].lstrip('.').lower()
+        default_model = os.path.splitext(os.path.basename(str(source)))[0] or default_model
+
+    if fmt == 'csv':
+        frames = [_read_csv(source, default_model)]
+    elif fmt == 'parquet':
+        df = pq.read_table(source).to_pandas() if pq is not None else pd.read_parquet(source)
+        df = _normalize_columns(df)
+        if 'model' not in df.columns:
+            df = df.assign(model=default_model)
+        frames = [df]
+    elif fmt in ('xlsx', 'xls'):
+        sheets = pd.read_excel(source, sheet_name=None, header=None, engine=_excel_engine())
+        frames = [_table_to_frame(sheet, name) for name, sheet in sheets.items()]
+    else:
+        raise ValueError(f"Unsupported pump catalog format '{fmt}'")
+
+    missing = [c for c in ('flow', 'head') if not all(c in frame.columns for frame in frames)]
+    if missing:
+        raise ValueError(f"Pump catalog is missing columns: {', '.join(missing)}")
+    return PumpCatalog.from_frame(pd.concat(frames, ignore_index=True))
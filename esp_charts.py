@@ -0,0 +1,402 @@
+"""
+Performance curve figures.
+
+The pump curve, system curve, BEP, design point and recommended range only
+change with the design, so their figures are built once per design key and
+reused. The live monitoring figure keeps its LIVE operating point as the last
+trace; set_live_point patches just that trace and the title on every update.
+Variable-speed curve families come precomputed from esp_curves.CurveFamily,
+so they are drawn straight from the grid.
+"""
+import hashlib
+
+import numpy as np
+import plotly.graph_objects as go
+from plotly.subplots import make_subplots
+
+# Drive frequencies (Hz) drawn as the variable-speed curve family
+FAMILY_CHART_FREQUENCIES = [30, 40, 50, 60, 70]
+
+# Bars of a Monte Carlo distribution chart
+DISTRIBUTION_BINS = 60
+
+
+def figure_key(*parts):
+    """Stable hash of everything a static figure depends on"""
+    digest = hashlib.sha256()
+    for part in parts:
+        if isinstance(part, np.ndarray):
+            digest.update(np.ascontiguousarray(part, dtype=np.float64).tobytes())
+        else:
+            digest.update(repr(part).encode())
+        digest.update(b'|')
+    return digest.hexdigest()
+
+
+def _add_curve_family(fig, family_curves, n_stages):
+    """Thin full-pump curves at other drive frequencies, one legend entry for the group"""
+    for i, (frequency, q, h) in enumerate(family_curves):
+        fig.add_trace(go.Scatter(
+            x=q, y=h * n_stages,
+            mode='lines',
+            name='VSD Curves (Hz)',
+            legendgroup='vsd',
+            showlegend=i == 0,
+            line=dict(color='rgba(139, 148, 158, 0.6)', width=1, dash='dot'),
+            hovertemplate=f'<b>{frequency:.0f} Hz</b><br>Flow: %{{x:.0f}} bpd<br>Head: %{{y:.0f}} ft<extra></extra>'
+        ))
+
+
+def performance_figure(q_range, h_full_pump, system_tdh, n_stages, bep_flow, bep_head, target_rate,
+                       tdh_design, rec_min, rec_max, well_name, pump_model, family_curves=()):
+    """
+    Design performance chart (Tab 4): pump and system curves, BEP, design
+    point, plus (frequency, q, h per stage) curves of a VSD family if given
+    """
+    fig = go.Figure()
+
+    # Recommended range
+    fig.add_vrect(
+        x0=rec_min,
+        x1=rec_max,
+        fillcolor="rgba(0, 255, 136, 0.1)",
+        layer="below",
+        line_width=0,
+        annotation_text="Recommended Range",
+        annotation_position="top left",
+        annotation=dict(font=dict(size=11, color="#00FF88"))
+    )
+    _add_curve_family(fig, family_curves, n_stages)
+
+    # Pump curve
+    fig.add_trace(go.Scatter(
+        x=q_range, y=h_full_pump,
+        mode='lines',
+        name=f'Pump Curve ({n_stages} stages)',
+        line=dict(color='#00E5FF', width=3),
+        hovertemplate='<b>Flow:</b> %{x:.0f} bpd<br><b>Head:</b> %{y:.0f} ft<extra></extra>'
+    ))
+
+    # System curve
+    fig.add_trace(go.Scatter(
+        x=q_range, y=system_tdh,
+        mode='lines',
+        name='System Curve',
+        line=dict(color='#FF6B6B', width=2.5, dash='dash'),
+        hovertemplate='<b>Flow:</b> %{x:.0f} bpd<br><b>Required Head:</b> %{y:.0f} ft<extra></extra>'
+    ))
+
+    # BEP
+    fig.add_trace(go.Scatter(
+        x=[bep_flow], y=[bep_head],
+        mode='markers',
+        name='BEP',
+        marker=dict(size=14, color='#FFD700', line=dict(color='white', width=2)),
+        hovertemplate='<b>BEP</b><br>Flow: %{x:.0f} bpd<br>Head: %{y:.0f} ft<extra></extra>'
+    ))
+
+    # Design point
+    fig.add_trace(go.Scatter(
+        x=[target_rate], y=[tdh_design],
+        mode='markers',
+        name='Design Point',
+        marker=dict(size=16, color='#00FF88', symbol='square', line=dict(color='white', width=2)),
+        hovertemplate='<b>Design Point</b><br>Flow: %{x:.0f} bpd<br>Head: %{y:.0f} ft<extra></extra>'
+    ))
+
+    fig.update_layout(
+        title=dict(
+            text=f"ESP Performance - Well {well_name} | {pump_model}",
+            font=dict(size=18, color='#E6EDF3')
+        ),
+        xaxis_title="Flow Rate (bpd)",
+        yaxis_title="Total Dynamic Head (ft)",
+        hovermode='closest',
+        template='plotly_dark',
+        paper_bgcolor='#0D1117',
+        plot_bgcolor='#161B22',
+        font=dict(color='#E6EDF3', size=12),
+        legend=dict(
+            yanchor="top", y=0.99,
+            xanchor="right", x=0.99,
+            bgcolor="rgba(22, 27, 34, 0.8)",
+            bordercolor="#30363D",
+            borderwidth=1,
+            font=dict(color='#E6EDF3', size=11)
+        ),
+        height=600,
+        xaxis=dict(
+            title_font=dict(color='#E6EDF3', size=13),
+            tickfont=dict(color='#C9D1D9', size=11)
+        ),
+        yaxis=dict(
+            title_font=dict(color='#E6EDF3', size=13),
+            tickfont=dict(color='#C9D1D9', size=11)
+        )
+    )
+
+    fig.update_xaxes(gridcolor='rgba(48, 54, 61, 0.3)', showline=True, linecolor='#30363D')
+    fig.update_yaxes(gridcolor='rgba(48, 54, 61, 0.3)', showline=True, linecolor='#30363D')
+    return fig
+
+
+def live_figure(q_range, h_full_pump, live_stages, bep_flow, bep_head, target_rate, tdh_design,
+                rec_min, rec_max, family_curves=()):
+    """
+    Live monitoring chart (Part 2) with an empty LIVE operating point as the
+    last trace; fill it in with set_live_point.
+    """
+    fig = go.Figure()
+
+    # Recommended range shading
+    fig.add_vrect(
+        x0=rec_min,
+        x1=rec_max,
+        fillcolor="rgba(0, 255, 136, 0.15)",
+        layer="below",
+        line_width=0,
+        annotation_text="Recommended Operating Range",
+        annotation_position="top left",
+        annotation=dict(font=dict(size=12, color="#00FF88"))
+    )
+    _add_curve_family(fig, family_curves, live_stages)
+
+    # Pump curve
+    fig.add_trace(go.Scatter(
+        x=q_range, y=h_full_pump,
+        mode='lines',
+        name=f'Pump Curve ({live_stages} stages)',
+        line=dict(color='#00E5FF', width=3.5),
+        hovertemplate='<b>Flow:</b> %{x:.0f} bpd<br><b>Head:</b> %{y:.0f} ft<extra></extra>'
+    ))
+
+    # BEP
+    fig.add_trace(go.Scatter(
+        x=[bep_flow], y=[bep_head],
+        mode='markers+text',
+        name='BEP',
+        marker=dict(size=16, color='#FFD700', line=dict(color='white', width=2.5)),
+        text=['BEP'],
+        textposition='top center',
+        textfont=dict(size=11, color='#FFD700'),
+        hovertemplate='<b>BEP</b><br>%{x:.0f} bpd, %{y:.0f} ft<extra></extra>'
+    ))
+
+    # Design point
+    fig.add_trace(go.Scatter(
+        x=[target_rate], y=[tdh_design],
+        mode='markers+text',
+        name='Design Point',
+        marker=dict(size=16, color='#00FF88', symbol='square', line=dict(color='white', width=2.5)),
+        text=['Design'],
+        textposition='bottom center',
+        textfont=dict(size=11, color='#00FF88'),
+        hovertemplate='<b>Design Point</b><br>%{x:.0f} bpd, %{y:.0f} ft<extra></extra>'
+    ))
+
+    # LIVE operating point - HIGHLIGHTED (always the last trace)
+    fig.add_trace(go.Scatter(
+        x=[], y=[],
+        mode='markers+text',
+        name='LIVE Operating Point',
+        marker=dict(size=22, color='#FF1744', symbol='diamond',
+                    line=dict(color='white', width=3)),
+        text=['LIVE'],
+        textposition='top center',
+        textfont=dict(size=13, color='#FF1744', family='Arial Black'),
+        hovertemplate='<b>🔴 LIVE OPERATING POINT</b><br>Flow: %{x:.0f} bpd<br>Head: %{y:.0f} ft<extra></extra>'
+    ))
+
+    # Enhanced layout
+    fig.update_layout(
+        title=dict(
+            font=dict(size=20, color='#E6EDF3'),
+            x=0.5,
+            xanchor='center'
+        ),
+        xaxis_title="Flow Rate (bpd)",
+        yaxis_title="Total Dynamic Head (ft)",
+        hovermode='closest',
+        template='plotly_dark',
+        paper_bgcolor='#0D1117',
+        plot_bgcolor='#161B22',
+        font=dict(color='#E6EDF3', size=13),
+        legend=dict(
+            yanchor="top", y=0.99,
+            xanchor="right", x=0.99,
+            bgcolor="rgba(22, 27, 34, 0.95)",
+            bordercolor="#30363D",
+            borderwidth=2,
+            font=dict(color='#E6EDF3', size=12)
+        ),
+        height=700,
+        xaxis=dict(
+            title_font=dict(color='#E6EDF3', size=14),
+            tickfont=dict(color='#C9D1D9', size=12),
+            gridcolor='rgba(48, 54, 61, 0.4)',
+            showline=True,
+            linecolor='#30363D',
+            linewidth=2
+        ),
+        yaxis=dict(
+            title_font=dict(color='#E6EDF3', size=14),
+            tickfont=dict(color='#C9D1D9', size=12),
+            gridcolor='rgba(48, 54, 61, 0.4)',
+            showline=True,
+            linecolor='#30363D',
+            linewidth=2
+        )
+    )
+    return fig
+
+
+def set_live_point(fig, live_q, live_h, well_name, timestamp):
+    """Move the LIVE operating point and refresh the title, leaving every other trace untouched"""
+    with fig.batch_update():
+        fig.data[-1].x = [live_q]
+        fig.data[-1].y = [live_h]
+        fig.layout.title.text = (f"<b>Live ESP Monitoring - Well {well_name}</b>"
+                                 f"<br><sub>Last Update: {timestamp.strftime('%Y-%m-%d %H:%M:%S')}</sub>")
+    return fig
+
+
+def history_figure(series, well_name, rec_min=None, rec_max=None):
+    """
+    Flow and head trend from WellHistory.query (already downsampled), flow on
+    the left axis and head on the right, with the recommended range shaded.
+    """
+    fig = make_subplots(specs=[[{"secondary_y": True}]])
+
+    if rec_min is not None and rec_max is not None:
+        fig.add_hrect(y0=rec_min, y1=rec_max, fillcolor="rgba(0, 255, 136, 0.08)", layer="below", line_width=0)
+
+    times, flow = series['Q']
+    fig.add_trace(go.Scattergl(
+        x=times, y=flow,
+        mode='lines',
+        name='Flow Rate (bpd)',
+        line=dict(color='#00E5FF', width=2),
+        hovertemplate='%{x|%Y-%m-%d %H:%M:%S}<br><b>Flow:</b> %{y:.0f} bpd<extra></extra>'
+    ), secondary_y=False)
+
+    times, head = series['H']
+    fig.add_trace(go.Scattergl(
+        x=times, y=head,
+        mode='lines',
+        name='Total Head (ft)',
+        line=dict(color='#FFD700', width=1.5),
+        hovertemplate='%{x|%Y-%m-%d %H:%M:%S}<br><b>Head:</b> %{y:.0f} ft<extra></extra>'
+    ), secondary_y=True)
+
+    fig.update_layout(
+        title=dict(text=f"Operating History - Well {well_name}", font=dict(size=18, color='#E6EDF3')),
+        hovermode='x unified',
+        template='plotly_dark',
+        paper_bgcolor='#0D1117',
+        plot_bgcolor='#161B22',
+        font=dict(color='#E6EDF3', size=12),
+        legend=dict(
+            yanchor="top", y=0.99,
+            xanchor="left", x=0.01,
+            bgcolor="rgba(22, 27, 34, 0.8)",
+            bordercolor="#30363D",
+            borderwidth=1,
+            font=dict(color='#E6EDF3', size=11)
+        ),
+        height=450
+    )
+    fig.update_xaxes(gridcolor='rgba(48, 54, 61, 0.3)', showline=True, linecolor='#30363D')
+    fig.update_yaxes(title_text="Flow Rate (bpd)", gridcolor='rgba(48, 54, 61, 0.3)', showline=True,
+                     linecolor='#30363D', secondary_y=False)
+    fig.update_yaxes(title_text="Total Head (ft)", showgrid=False, showline=True, linecolor='#30363D',
+                     secondary_y=True)
+    return fig
+
+
+def tornado_figure(table, base_value, output_label, span):
+    """
+    Tornado chart from esp_sensitivity.tornado_table: one bar per input from
+    the base value to the output at -span and +span, largest swing on top.
+    """
+    table = table.iloc[::-1]
+    fig = go.Figure()
+
+    fig.add_trace(go.Bar(
+        y=table['label'], x=table['low'] - base_value, base=base_value,
+        orientation='h',
+        name=f'Input -{span:.0%}',
+        marker=dict(color='#58A6FF'),
+        customdata=table['low'],
+        hovertemplate='<b>%{y}</b><br>' + output_label + ': %{customdata:.1f}<extra>-' + f'{span:.0%}' + '</extra>'
+    ))
+    fig.add_trace(go.Bar(
+        y=table['label'], x=table['high'] - base_value, base=base_value,
+        orientation='h',
+        name=f'Input +{span:.0%}',
+        marker=dict(color='#FF6B6B'),
+        customdata=table['high'],
+        hovertemplate='<b>%{y}</b><br>' + output_label + ': %{customdata:.1f}<extra>+' + f'{span:.0%}' + '</extra>'
+    ))
+    fig.add_vline(x=base_value, line=dict(color='#E6EDF3', width=1.5, dash='dot'))
+
+    fig.update_layout(
+        title=dict(text=f"Sensitivity of {output_label} (base {base_value:,.1f})", font=dict(size=18, color='#E6EDF3')),
+        barmode='overlay',
+        xaxis_title=output_label,
+        template='plotly_dark',
+        paper_bgcolor='#0D1117',
+        plot_bgcolor='#161B22',
+        font=dict(color='#E6EDF3', size=12),
+        legend=dict(
+            yanchor="bottom", y=0.01,
+            xanchor="right", x=0.99,
+            bgcolor="rgba(22, 27, 34, 0.8)",
+            bordercolor="#30363D",
+            borderwidth=1,
+            font=dict(color='#E6EDF3', size=11)
+        ),
+        height=max(350, 28 * len(table) + 120)
+    )
+    fig.update_xaxes(gridcolor='rgba(48, 54, 61, 0.3)', showline=True, linecolor='#30363D')
+    return fig
+
+
+def distribution_figure(values, label, percentiles):
+    """
+    Histogram of one Monte Carlo output with its P10/P50/P90 marked. The draws
+    are binned here, so the figure carries DISTRIBUTION_BINS bars rather than
+    every draw; draws without a value (NaN) are left out.
+    """
+    values = np.asarray(values, dtype=np.float64)
+    values = values[np.isfinite(values)]
+    counts, edges = np.histogram(values, bins=DISTRIBUTION_BINS) if len(values) else (np.zeros(0), np.zeros(1))
+    fig = go.Figure()
+    fig.add_trace(go.Bar(
+        x=(edges[:-1] + edges[1:]) / 2,
+        y=counts,
+        width=np.diff(edges),
+        customdata=np.column_stack([edges[:-1], edges[1:]]),
+        name=label,
+        marker=dict(color='#00E5FF', line=dict(color='#0D1117', width=0.5)),
+        hovertemplate=label + ': %{customdata[0]:,.1f} - %{customdata[1]:,.1f}<br>Draws: %{y}<extra></extra>'
+    ))
+    for name, value in percentiles.items():
+        fig.add_vline(x=value, line=dict(color='#FFD700' if name == 'P50' else '#FF6B6B', width=2, dash='dash'),
+                      annotation_text=f"{name}: {value:,.1f}", annotation_position="top",
+                      annotation=dict(font=dict(size=11, color='#E6EDF3')))
+
+    fig.update_layout(
+        xaxis_title=label,
+        yaxis_title="Draws",
+        showlegend=False,
+        bargap=0.02,
+        template='plotly_dark',
+        paper_bgcolor='#0D1117',
+        plot_bgcolor='#161B22',
+        font=dict(color='#E6EDF3', size=12),
+        height=380,
+        margin=dict(t=40)
+    )
+    fig.update_xaxes(gridcolor='rgba(48, 54, 61, 0.3)', showline=True, linecolor='#30363D')
+    fig.update_yaxes(gridcolor='rgba(48, 54, 61, 0.3)', showline=True, linecolor='#30363D')
+    return fig
@@ -0,0 +1,244 @@
+"""
+Pump curve objects shared across reruns and sessions.
+
+A PumpCurve builds the forward (Q -> H), inverse (H -> Q) and chart
+interpolators for one single-stage curve exactly once. Curves are identified
+by a hash of their Q/H arrays, so the same curve is never rebuilt.
+
+Head curves rise to a peak and then fall, so H -> Q is only a function on the
+stable branch right of the peak. The inverse is a dense table of flows on a
+uniform head grid over that branch, and a lookup is index arithmetic.
+
+Catalog curves are rated at BASE_FREQUENCY. On a variable-speed drive the
+affinity laws scale flow with speed and head with speed squared; a
+CurveFamily holds those curves on a frequency x flow grid, built once per
+curve. The free-gas head derating (esp_gas) and viscosity correction
+(esp_viscosity) tables are cached the same way.
+
+SciPy is imported when the first curve is built rather than with the module.
+"""
+import hashlib
+import threading
+from collections import OrderedDict
+
+import numpy as np
+
+from esp_gas import GasDerating
+from esp_viscosity import ViscosityCorrection
+
+# Number of distinct pump curves kept in memory by get_pump_curve
+CURVE_CACHE_SIZE = 32
+
+# Points of the inverse (head -> flow) table and of the flow grid it is built from
+INVERSE_TABLE_SIZE = 4096
+
+# Frequency the catalog curves are rated at (Hz)
+BASE_FREQUENCY = 50.0
+
+# Drive frequencies covered by a curve family (Hz) and the flow points of each curve
+FREQUENCY_RANGE = (30.0, 70.0)
+FREQUENCY_STEP = 0.5
+FAMILY_FLOW_POINTS = 200
+
+
+def curve_key(q_curve, h_curve):
+    """Stable content hash of a pump curve's Q/H arrays"""
+    digest = hashlib.sha256()
+    digest.update(np.ascontiguousarray(q_curve, dtype=np.float64).tobytes())
+    digest.update(b'|')
+    digest.update(np.ascontiguousarray(h_curve, dtype=np.float64).tobytes())
+    return digest.hexdigest()
+
+
+class PumpCurve:
+    """Single-stage pump curve with all of its interpolators built up front"""
+
+    def __init__(self, q_curve, h_curve):
+        from scipy.interpolate import interp1d, PchipInterpolator
+
+        self.q = np.asarray(q_curve, dtype=np.float64)
+        self.h = np.asarray(h_curve, dtype=np.float64)
+        self.key = curve_key(self.q, self.h)
+
+        # Cubic fit used for the design point and BEP head
+        self._head = interp1d(self.q, self.h, kind="cubic", fill_value="extrapolate")
+        # PCHIP preserves monotonicity and prevents oscillations on the charts
+        self._smooth = PchipInterpolator(self.q, self.h)
+        self._grids = {}
+        self._families = {}
+        self._gas_derating = None
+        self._viscosity_correction = None
+        self._build_inverse()
+
+    def _build_inverse(self, size=INVERSE_TABLE_SIZE):
+        """Uniform head grid over the stable (right-of-peak) branch and the flow at each head"""
+        q_dense = np.linspace(self.q.min(), self.q.max(), size)
+        h_dense = self._smooth(q_dense)
+        peak = int(np.argmax(h_dense))
+        self.peak_flow = float(q_dense[peak])
+        self.peak_head = float(h_dense[peak])
+        # Flow of maximum hydraulic power (Q x H), a BEP estimate that needs no efficiency data
+        self.power_peak_flow = float(q_dense[np.argmax(q_dense * h_dense)])
+
+        # Right of the peak, made non-increasing (flat or rising tails such as 8.06, 8.06, 8.89
+        # keep the first flow that reaches each head)
+        q_branch = q_dense[peak:]
+        h_branch = np.minimum.accumulate(h_dense[peak:])
+        keep = np.concatenate(([True], np.diff(h_branch) < 0))
+        h_branch, q_branch = h_branch[keep][::-1], q_branch[keep][::-1]
+
+        self._h_min = float(h_branch[0])
+        self._h_step = (self.peak_head - self._h_min) / (size - 1) if len(h_branch) > 1 else 1.0
+        self._flow_table = np.interp(np.linspace(self._h_min, self.peak_head, size), h_branch, q_branch)
+        self._flow_table.flags.writeable = False
+
+    def head(self, q):
+        """Head per stage (ft) at flow q (bpd)"""
+        return self._head(q)
+
+    __call__ = head
+
+    def flow(self, h):
+        """
+        Flow (bpd) on the stable branch that produces head per stage h (ft).
+        Takes a scalar or an array of any size. Heads above the peak give the
+        peak flow, heads below the end of the curve give its maximum flow.
+        """
+        h = np.asarray(h, dtype=np.float64)
+        table = self._flow_table
+        position = np.clip((h - self._h_min) / self._h_step, 0, len(table) - 1)
+        missing = np.isnan(position)
+        position = np.where(missing, 0, position)
+        i = np.minimum(position.astype(np.int64), len(table) - 2)
+        q = table[i] + (position - i) * (table[i + 1] - table[i])
+        q = np.where(missing, np.nan, q)
+        return q if q.ndim else q[()]
+
+    def chart_grid(self, n_points=100):
+        """Flow grid from 0 to max Q and the PCHIP head per stage on it (clipped at zero)"""
+        if n_points not in self._grids:
+            q_range = np.linspace(0, self.q.max(), n_points)
+            h_single_stage = np.maximum(self._smooth(q_range), 0)
+            q_range.flags.writeable = False
+            h_single_stage.flags.writeable = False
+            self._grids[n_points] = (q_range, h_single_stage)
+        return self._grids[n_points]
+
+    def family(self, base_frequency=BASE_FREQUENCY):
+        """Affinity-law CurveFamily of this curve over FREQUENCY_RANGE, built once per base frequency"""
+        if base_frequency not in self._families:
+            self._families[base_frequency] = CurveFamily(self, base_frequency)
+        return self._families[base_frequency]
+
+    def gas_derating(self):
+        """Free-gas head derating table of this curve (esp_gas.GasDerating), built on first use"""
+        if self._gas_derating is None:
+            self._gas_derating = GasDerating(self)
+        return self._gas_derating
+
+    def viscosity_correction(self):
+        """HI viscosity correction table of this curve (esp_viscosity.ViscosityCorrection), built on first use"""
+        if self._viscosity_correction is None:
+            self._viscosity_correction = ViscosityCorrection(self)
+        return self._viscosity_correction
+
+
+def speed_ratio(frequency, base_frequency=BASE_FREQUENCY):
+    """Drive speed relative to the rated speed; missing or non-positive frequencies run at rated speed"""
+    frequency = np.asarray(frequency if frequency is not None else np.nan, dtype=np.float64)
+    with np.errstate(invalid='ignore'):
+        ratio = np.where(np.isfinite(frequency) & (frequency > 0), frequency / base_frequency, 1.0)
+    return ratio if ratio.ndim else ratio[()]
+
+
+class CurveFamily:
+    """
+    Single-stage curves of one PumpCurve at every drive frequency in
+    FREQUENCY_RANGE: q[i] = r * Q and h[i] = r**2 * H with r = f / base.
+    """
+
+    def __init__(self, curve, base_frequency=BASE_FREQUENCY, frequency_range=FREQUENCY_RANGE,
+                 step=FREQUENCY_STEP, n_points=FAMILY_FLOW_POINTS):
+        self.curve = curve
+        self.base_frequency = float(base_frequency)
+        self.frequencies = np.arange(frequency_range[0], frequency_range[1] + step / 2, step)
+        self.ratios = self.frequencies / self.base_frequency
+        self._q_base, self._h_base = curve.chart_grid(n_points)
+        self.q = np.multiply.outer(self.ratios, self._q_base)
+        self.h = np.multiply.outer(self.ratios ** 2, self._h_base)
+        for values in (self.frequencies, self.ratios, self.q, self.h):
+            values.flags.writeable = False
+
+    def curves(self, frequencies):
+        """(frequency, q, h) rows of the grid closest to each requested frequency"""
+        rows = np.abs(np.subtract.outer(np.atleast_1d(frequencies), self.frequencies)).argmin(axis=1)
+        return [(float(self.frequencies[i]), self.q[i], self.h[i]) for i in rows]
+
+    def head(self, q, frequency):
+        """Head per stage (ft) at flow q (bpd) and drive frequency (Hz), from the design (cubic) fit"""
+        ratio = speed_ratio(frequency, self.base_frequency)
+        return ratio ** 2 * self.curve.head(np.asarray(q, dtype=np.float64) / ratio)
+
+    def flow(self, h, frequency):
+        """Stable-branch flow (bpd) producing head per stage h (ft) at a drive frequency (Hz)"""
+        ratio = speed_ratio(frequency, self.base_frequency)
+        return ratio * self.curve.flow(np.asarray(h, dtype=np.float64) / ratio ** 2)
+
+    def speed_adjusted(self, bep_flow, rec_min, rec_max):
+        """BEP and recommended range at every frequency of the family, one row per frequency"""
+        return {
+            'frequency': self.frequencies,
+            'bep_flow': self.ratios * bep_flow,
+            'bep_head': self.ratios ** 2 * self.curve.head(bep_flow),
+            'rec_min': self.ratios * rec_min,
+            'rec_max': self.ratios * rec_max,
+        }
+
+    def frequency(self, q, h):
+        """
+        Drive frequency (Hz) at which one stage delivers head h (ft) at flow q
+        (bpd). Scalars or arrays; NaN where the point lies outside the family.
+        """
+        q = np.asarray(q, dtype=np.float64)
+        h = np.asarray(h, dtype=np.float64)
+        # Head at q on every curve of the family (NaN past the end of the slower curves)
+        ratios = self.ratios.reshape((-1,) + (1,) * np.broadcast(q, h).ndim)
+        heads = ratios ** 2 * np.interp(q / ratios, self._q_base, self._h_base, right=np.nan)
+        with np.errstate(invalid='ignore'):
+            above = heads >= h
+        # First frequency whose curve reaches h, interpolated linearly from the one below
+        i = np.argmax(above, axis=0)
+        found = above.any(axis=0) & (i > 0)
+        i = np.where(found, i, 1)
+        h_lo = np.take_along_axis(heads, (i - 1)[None], axis=0)[0]
+        h_hi = np.take_along_axis(heads, i[None], axis=0)[0]
+        with np.errstate(divide='ignore', invalid='ignore'):
+            fraction = np.where(np.isfinite(h_lo), (h - h_lo) / (h_hi - h_lo), 1.0)
+        frequency = self.frequencies[i - 1] + fraction * (self.frequencies[i] - self.frequencies[i - 1])
+        frequency = np.where(found | (above[0] & (heads[0] == h)), frequency, np.nan)
+        return frequency if frequency.ndim else frequency[()]
+
+
+_curve_cache = OrderedDict()
+_curve_cache_lock = threading.Lock()
+
+
+def get_pump_curve(q_curve, h_curve):
+    """
+    Return the PumpCurve for these Q/H arrays from a bounded LRU cache (safe
+    to call from the dashboard's session threads). A missing curve is built
+    outside the lock; if two threads build the same one, the first stored wins.
+    """
+    key = curve_key(q_curve, h_curve)
+    with _curve_cache_lock:
+        curve = _curve_cache.get(key)
+        if curve is not None:
+            _curve_cache.move_to_end(key)
+            return curve
+    curve = PumpCurve(q_curve, h_curve)
+    with _curve_cache_lock:
+        curve = _curve_cache.setdefault(key, curve)
+        _curve_cache.move_to_end(key)
+        while len(_curve_cache) > CURVE_CACHE_SIZE:
+            _curve_cache.popitem(last=False)
+    return curve
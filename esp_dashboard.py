@@ -1,10 +1,21 @@
 import streamlit as st
 import numpy as np
-import pandas as pd
-import plotly.graph_objects as go
-from scipy.interpolate import interp1d
 from datetime import datetime
+import time
+import hashlib
 import io
+import os
+from esp_design import (DEFAULT_Q_CURVE, DEFAULT_H_CURVE, REQUIRED_FIELDS, OPTIONAL_FIELDS,
+                        CALC_FIELDS, LIVE_FIELDS, compute_esp_design, solve_operating_point,
+                        system_curve, friction_curve, live_operating_point, drive_frequency)
+from esp_curves import PumpCurve, CURVE_CACHE_SIZE, BASE_FREQUENCY, curve_key, speed_ratio
+from esp_charts import (FAMILY_CHART_FREQUENCIES, figure_key, performance_figure, live_figure, set_live_point,
+                        history_figure, tornado_figure, distribution_figure)
+from esp_stream import FeedLease, LiveFeed
+from esp_anomaly import EVENT_HISTORY, WARMUP_SAMPLES, AnomalyDetector
+from esp_cache import DesignCache, design_key
+# Modules built on pandas, SciPy or pyarrow (catalog, library, selection, history, projects, fleet,
+# sensitivity, Monte Carlo) are imported where a page or result section first needs them
 
 # Page configuration
 st.set_page_config(
@@ -14,78 +25,17 @@ st.set_page_config(
     initial_sidebar_state="expanded"
 )
 
+# Bundled static assets (stylesheet, sidebar logo), read from disk once per process
+STATIC_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "static")
+
+@st.cache_resource(show_spinner=False)
+def static_asset(name):
+    """Text of a file in static/, shared by every session"""
+    with open(os.path.join(STATIC_DIR, name), encoding="utf-8") as f:
+        return f.read()
+
 # Custom CSS for modern dark theme with proper font colors
-st.markdown("""
-    <style>
-    .main {
-        background-color: #0D1117;
-    }
-    .stApp {
-        background-color: #0D1117;
-    }
-    h1, h2, h3, h4, h5, h6 {
-        color: #E6EDF3 !important;
-    }
-    p, label, div, span {
-        color: #C9D1D9 !important;
-    }
-    .stMarkdown {
-        color: #C9D1D9 !important;
-    }
-    .metric-card {
-        background-color: #161B22;
-        padding: 20px;
-        border-radius: 10px;
-        border: 1px solid #30363D;
-        margin: 10px 0;
-    }
-    .status-optimal {
-        color: #00FF88 !important;
-        font-weight: bold;
-        font-size: 1.2em;
-    }
-    .status-warning {
-        color: #FF1744 !important;
-        font-weight: bold;
-        font-size: 1.2em;
-    }
-    div[data-testid="stMetricValue"] {
-        font-size: 1.8em;
-        color: #58A6FF !important;
-    }
-    div[data-testid="stMetricLabel"] {
-        color: #8B949E !important;
-    }
-    div[data-testid="stMetricDelta"] {
-        color: #7EE787 !important;
-    }
-    input, textarea, select {
-        color: #E6EDF3 !important;
-        background-color: #0D1117 !important;
-        border-color: #30363D !important;
-    }
-    .stButton>button {
-        color: #FFFFFF !important;
-        border-color: #238636 !important;
-    }
-    .st-emotion-cache-16txtl3 {
-        color: #C9D1D9 !important;
-    }
-    section[data-testid="stSidebar"] {
-        background-color: #0D1117 !important;
-    }
-    section[data-testid="stSidebar"] label {
-        color: #C9D1D9 !important;
-    }
-    .calculation-section {
-        background-color: #161B22;
-        padding: 15px;
-        border-radius: 8px;
-        border-left: 3px solid #58A6FF;
-        margin: 10px 0;
-    }
-    </style>
-""", unsafe_allow_html=True)
+st.html(f"<style>{static_asset('style.css')}</style>")
 
 # Initialize session state for user inputs
 def init_session_state():
@@ -133,6 +83,7 @@ def init_session_state():
         'motor_voltage_nameplate': None,
         'motor_ampere_nameplate': None,
         'motor_frequency': None,
+        'drive_frequency': None,
         'transformer_voltage': None,
         'motor_power_factor': None,
         'motor_efficiency': None,
@@ -142,6 +93,26 @@ def init_session_state():
         'pdp_value': None,
         'p_gradient_value': None,
         'actual_stages_value': None,
+        'drive_frequency_value': None,
+        'surface_flow_value': None,
+        # Streaming feed
+        'live_feed': None,
+        'live_feed_lease': None,
+        'live_feed_seq': 0,
+        'live_feed_source': '',
+        'live_refresh_s': 2.0,
+        'history_window': 'Last 24 hours',
+        # Fleet monitoring
+        'fleet_path': '',
+        'fleet_refresh_s': 5.0,
+        # Project: wells saved in this session or opened from a project file
+        'project': None,
+        'project_wells': {},
+        'project_file': None,
+        'project_digest': None,
+        'project_curve': None,
+        # (well name, in-memory WellHistory) of the history read from the last project well opened
+        'opened_history': None,
     }
     
     for key, value in defaults.items():
@@ -151,23 +122,400 @@ def init_session_state():
 # Call initialization
 init_session_state()
 
-# Default pump curve data (ESP-3000) - only for reference
-DEFAULT_Q_CURVE = [
-    48.86,111.21,159.86,201.57,257.17,305.83,361.43,433.98,472.69,528.24,
-    684.46,736.78,827.12,910.52,986.38,1070.38,1145.84,1267.20,1327.36,
-    1417.91,1516.22,1626.44,1737.84,1783.25,1897.50,1973.98,2001.76,
-    2106.02,2163.58,2266.88,2363.20,2502.20,2561.76,2682.92,2794.13,
-    2898.38,3009.60,3113.86,3225.06,3336.27,3447.48,3544.79,3649.03,
-    3753.41,3829.76,3920.12,4000.33,4078.93,4177.38,4280.70,4387.16
-]
+@st.cache_resource(max_entries=CURVE_CACHE_SIZE, show_spinner=False)
+def _load_pump_curve(key, _q_curve, _h_curve):
+    return PumpCurve(_q_curve, _h_curve)
+
+def get_cached_pump_curve(q_curve, h_curve):
+    """Return the PumpCurve shared by every session for these Q/H arrays"""
+    return _load_pump_curve(curve_key(q_curve, h_curve), q_curve, h_curve)
+
+@st.cache_data(max_entries=16, show_spinner=False)
+def _parse_pump_catalog_upload(digest, fmt, _data):
+    from esp_catalog import load_catalog
+    return load_catalog(io.BytesIO(_data), fmt)
+
+def load_uploaded_pump_catalog(uploaded_file):
+    """Parse an uploaded pump catalog once per distinct file (keyed by SHA-256 of its bytes)"""
+    data = uploaded_file.getvalue()
+    fmt = uploaded_file.name.rsplit('.', 1)[-1].lower()
+    return _parse_pump_catalog_upload(hashlib.sha256(data).hexdigest(), fmt, data)
+
+@st.cache_resource(max_entries=64, show_spinner=False)
+def _load_friction_curve(key, _design_inputs, _q_range):
+    return friction_curve(_design_inputs, _q_range)[0]
+
+def get_friction_curve(design_inputs, q_range):
+    """Tubing friction (ft) of one well over a flow grid from the pressure traverse, cached per well and grid"""
+    return _load_friction_curve(figure_key(design_inputs, q_range), design_inputs, q_range)
+
+@st.cache_resource(max_entries=16, show_spinner=False)
+def _run_sensitivity_sweep(key, _design_inputs, _pump_curve, span):
+    from esp_sensitivity import sensitivity_sweep
+    return sensitivity_sweep(_design_inputs, span=span, pump_curve=_pump_curve)
+
+def get_sensitivity_sweep(design_inputs, pump_curve, span):
+    """One-at-a-time sensitivity sweep of a design, cached per design inputs, pump curve and span"""
+    return _run_sensitivity_sweep(figure_key(pump_curve.key, design_inputs, span), design_inputs, pump_curve, span)
+
+@st.cache_resource(max_entries=64, show_spinner=False)
+def _build_performance_figure(key, _pump_curve, _design_inputs, n_stages, h_lift, h_surf, tdh_design, bep_flow,
+                              rec_min, rec_max, well_name, pump_model, drive_frequency):
+    # Pump curve, BEP and recommended range at the design drive frequency (affinity laws)
+    speed = speed_ratio(drive_frequency)
+    q_range, h_single_stage = _pump_curve.chart_grid()
+    q_range, h_single_stage = q_range * speed, h_single_stage * speed ** 2
+    system_tdh = system_curve(h_lift, h_surf, get_friction_curve(_design_inputs, q_range))
+    bep_head = speed ** 2 * _pump_curve(bep_flow) * n_stages
+    family_curves = _pump_curve.family().curves(FAMILY_CHART_FREQUENCIES)
+    return performance_figure(q_range, h_single_stage * n_stages, system_tdh, n_stages, speed * bep_flow, bep_head,
+                              _design_inputs['target_rate'], tdh_design, speed * rec_min, speed * rec_max, well_name,
+                              pump_model, family_curves)
+
+def get_performance_figure(pump_curve, design_inputs, *design):
+    """Tab 4 performance figure, cached per design (pump curve key, design inputs and every value it shows)"""
+    return _build_performance_figure(figure_key(pump_curve.key, design_inputs, *design), pump_curve, design_inputs,
+                                     *design)
+
+@st.cache_resource(show_spinner=False)
+def get_pump_library():
+    """Pump library shared by every session (opened lazily, curves memory-mapped)"""
+    from esp_library import PumpLibrary
+    return PumpLibrary()
+
+@st.cache_resource(show_spinner=False)
+def get_design_cache():
+    """Design results shared by every session and kept on disk across restarts"""
+    return DesignCache()
+
+def check_design(n_stages, calc):
+    """
+    Raise ValueError when a design has no stage count to present: its
+    first-stage free gas is past the stages' tolerance (gas_over_limit in the
+    design engine), or it has no valid stage count
+    """
+    import pandas as pd
+    if calc['free_gas_pct_first_stage'] > calc['gas_limit'] * 100:
+        raise ValueError(f"{calc['free_gas_pct_first_stage']:.1f}% free gas reaches the first stage, above the "
+                         f"{calc['gas_limit'] * 100:.0f}% the stages tolerate: the pump would gas-lock, so no stage "
+                         "count is given. Add gas separators or gas handlers.")
+    if n_stages is None or pd.isna(n_stages):
+        raise ValueError("No valid stage count for these inputs (a value is missing or no positive head is needed)")
+
+def run_design(design_inputs, pump_curve):
+    """
+    Design results for these inputs and pump curve: the design engine's
+    headline values, calc dict and converged operating point, served from the
+    design cache when the same normalized inputs were designed before.
+    Returns (result, cached).
+    """
+    cache = get_design_cache()
+    key = design_key(design_inputs, pump_curve)
+    result = cache.get(key)
+    if result is not None:
+        return result, True
+    design = compute_esp_design(design_inputs, pump_curve=pump_curve).iloc[0]
+    check_design(design['n_stages'], design)
+    n_stages = int(design['n_stages'])
+    operating_point = solve_operating_point(design_inputs, n_stages, pump_curve=pump_curve)
+    return cache.put(key, {
+        'TDH_design': float(design['TDH_design']),
+        'n_stages': n_stages,
+        'head_per_stage': float(design['head_per_stage']),
+        'calc': {field: float(design[field]) for field in CALC_FIELDS},
+        'operating_point': operating_point.iloc[0].to_dict(),
+        'solver_stats': operating_point.attrs['solver'],
+    }), False
+
+@st.cache_resource(show_spinner=False)
+def get_history_store():
+    """Live operating point history shared by every session (one ring buffer per well)"""
+    from esp_history import HistoryStore
+    return HistoryStore()
+
+@st.cache_resource(show_spinner=False)
+def get_anomaly_detector():
+    """Online anomaly detector shared by every session (live wells and the fleet, keyed by well name)"""
+    return AnomalyDetector()
 
-DEFAULT_H_CURVE = [
-    40.27,40.51,40.76,41.01,41.25,41.33,41.63,41.87,42.12,42.24,
-    42.61,42.86,43.11,43.28,43.33,43.36,43.36,43.33,43.33,42.93,
-    42.74,42.37,42.00,41.83,41.03,40.51,40.27,39.40,38.88,38.28,
-    37.48,36.07,35.45,34.21,32.86,31.50,30.02,28.53,26.80,24.93,
-    23.10,21.37,19.30,17.66,15.68,13.95,12.10,10.24,8.06,8.06,8.89
-]
+def live_point_sink(well_name):
+    """
+    Record a well's live operating points in its history and the anomaly
+    detector (safe from feed threads). Both are shared by every session and
+    keyed by well name, so points of an unnamed well are not recorded.
+    """
+    if not well_name:
+        return lambda point: None
+    history, detector = get_history_store()[well_name], get_anomaly_detector()
+    session_history = well_history(well_name)
+    def record(point):
+        history.append_point(point)
+        if session_history is not history:
+            session_history.append_point(point)
+        detector.update_point(well_name, point)
+    return record
+
+def well_history(well_name):
+    """
+    History of a well as this session sees it: the copy read from a project
+    file when that well was opened from one, otherwise the shared live history.
+    """
+    opened = st.session_state.opened_history
+    if opened is not None and opened[0] == well_name:
+        return opened[1]
+    return get_history_store()[well_name]
+
+def events_table(events):
+    """Anomaly events (newest first) as a display table"""
+    import pandas as pd
+    return pd.DataFrame(events, columns=['timestamp', 'well', 'event', 'value'])
+
+# Time windows offered by the history chart (seconds)
+HISTORY_WINDOWS = {'Last hour': 3600, 'Last 24 hours': 86400, 'Last 7 days': 7 * 86400, 'Last 31 days': 31 * 86400}
+
+def apply_live_point(point):
+    """Show a live operating point (from the form or the streaming feed) in Part 2"""
+    for key in LIVE_FIELDS:
+        st.session_state[key] = point[key]
+    st.session_state.live_updated = True
+    st.session_state.timestamp = point.get('timestamp') or datetime.now()
+
+@st.cache_data(max_entries=4, show_spinner=False)
+def _read_fleet_file(path, mtime_ns):
+    from esp_fleet import read_fleet
+    return read_fleet(path)
+
+def load_fleet_file(path):
+    """Fleet table from disk, re-read only when the file changes"""
+    return _read_fleet_file(path, os.stat(path).st_mtime_ns)
+
+def show_fleet_status(load_fleet, reading_time=None):
+    """
+    Fleet summary and sortable status grid for the fleet table returned by
+    load_fleet(). Readings go through the anomaly detector, stamped with the
+    table's timestamp column or else reading_time() (none: not tracked).
+    """
+    import pandas as pd
+    from esp_fleet import fleet_status
+    try:
+        fleet = load_fleet()
+        start = time.perf_counter()
+        status = fleet_status(fleet, get_pump_library())
+        elapsed = (time.perf_counter() - start) * 1000
+    except (OSError, ValueError, KeyError) as e:
+        st.error(f"❌ Error reading fleet table: {str(e)}")
+        return
+
+    counts = status['status'].value_counts()
+    col1, col2, col3, col4, col5 = st.columns(5)
+    with col1:
+        st.metric("Wells", len(status))
+    with col2:
+        st.metric("✅ Optimal", int(counts.get('OPTIMAL', 0)))
+    with col3:
+        st.metric("⬇️ Low Flow", int(counts.get('LOW FLOW', 0)))
+    with col4:
+        st.metric("⬆️ High Flow", int(counts.get('HIGH FLOW', 0)))
+    with col5:
+        st.metric("⚪ No Data", int(counts.get('NO DATA', 0)))
+
+    shown = st.multiselect("Show status", list(status['status'].cat.categories),
+                           default=list(status['status'].cat.categories), key="fleet_status_filter")
+    grid = status[status['status'].isin(shown)]
+    # Worst first: problems before optimal wells, largest BEP deviation first within each status
+    grid = grid.iloc[np.lexsort((-grid['deviation_bep_pct'].abs().fillna(np.inf).to_numpy(),
+                                 grid['status'].cat.codes.to_numpy()))]
+    st.dataframe(
+        grid, width='stretch', hide_index=True,
+        column_config={
+            'well_name': st.column_config.TextColumn("Well"),
+            'pump_model': st.column_config.TextColumn("Pump"),
+            'status': st.column_config.TextColumn("Status"),
+            'Q': st.column_config.NumberColumn("Flow (bpd)", format="%.0f"),
+            'target_rate': st.column_config.NumberColumn("Design (bpd)", format="%.0f"),
+            'deviation_pct': st.column_config.NumberColumn("vs Design (%)", format="%+.1f"),
+            'deviation_bep_pct': st.column_config.NumberColumn("vs BEP (%)", format="%+.1f"),
+            'rec_min': st.column_config.NumberColumn("Rec. Min (bpd)", format="%.0f"),
+            'rec_max': st.column_config.NumberColumn("Rec. Max (bpd)", format="%.0f"),
+            'in_range': st.column_config.CheckboxColumn("In Range"),
+            'H': st.column_config.NumberColumn("Head (ft)", format="%.0f"),
+            'H_per_stage': st.column_config.NumberColumn("Head/Stage (ft)", format="%.2f"),
+            'delta_p': st.column_config.NumberColumn("ΔP (psi)", format="%.1f"),
+            'stages': st.column_config.NumberColumn("Stages", format="%d"),
+            'frequency': st.column_config.NumberColumn("Drive (Hz)", format="%.1f"),
+        },
+    )
+    st.caption(f"{len(status):,} wells computed in {elapsed:.0f} ms | refreshed {datetime.now().strftime('%H:%M:%S')}")
+    
+    if 'timestamp' in status.columns:
+        timestamps = pd.to_datetime(status['timestamp']).to_numpy()
+    else:
+        timestamps = reading_time() if reading_time is not None else None
+    if timestamps is not None:
+        detector = get_anomaly_detector()
+        detector.update(status['well_name'].to_numpy(), timestamps, status['Q'].to_numpy(),
+                        status['H_per_stage'].to_numpy(), status['delta_p'].to_numpy(), status['pip'].to_numpy(),
+                        status['design_H_per_stage'].to_numpy())
+        fleet_wells = set(status['well_name'])
+        events = [event for event in detector.recent(n=EVENT_HISTORY) if event['well'] in fleet_wells]
+        st.markdown("##### 🚨 Anomaly Events")
+        if events:
+            st.dataframe(events_table(events[:50]), width='stretch', hide_index=True)
+        else:
+            st.caption("No anomalies detected (each well learns its baseline over its first "
+                       f"{WARMUP_SAMPLES} readings)")
+
+def design_fluid():
+    """First-stage free gas, gas tolerance and viscosity of the current design, for live_operating_point/LiveFeed"""
+    return {'free_gas': st.session_state.calc['free_gas_pct_first_stage'] / 100,
+            'gas_tolerance': st.session_state.calc['gas_limit'],
+            'viscosity': st.session_state.calc['fluid_viscosity']}
+
+def store_design(design_inputs, q_curve, h_curve, design):
+    """Make a design (a run_design result for these inputs and Q/H curve) the current one shown in Tab 4 and Part 2"""
+    st.session_state.design_calculated = True
+    st.session_state.design_inputs = design_inputs
+    st.session_state.mc_samples = None
+    st.session_state.pump_curve = get_cached_pump_curve(q_curve, h_curve)
+    st.session_state.q_curve_data = q_curve
+    st.session_state.h_curve_data = h_curve
+    st.session_state.TDH_design = design['TDH_design']
+    st.session_state.n_stages = design['n_stages']
+    st.session_state.head_per_stage = design['head_per_stage']
+    
+    # Store all calculated values
+    st.session_state.calc = dict(design['calc'])
+    
+    # Converged operating point of the designed pump against the system curve
+    st.session_state.operating_point = dict(design['operating_point'])
+    st.session_state.solver_stats = design['solver_stats']
+
+# Pump data source of a well opened from a project, and the Part 2 widgets holding its live inputs
+PROJECT_CURVE_SOURCE = "Use Project Well Curve"
+LIVE_INPUT_WIDGETS = {'pip_value': 'pip', 'pdp_value': 'pdp', 'actual_stages_value': 'stages_input',
+                      'p_gradient_value': 'pg', 'drive_frequency_value': 'drive_freq', 'surface_flow_value': 'surface_flow'}
+
+def current_well_snapshot(include_history):
+    """The current well (inputs, pump curve, last design and optionally its live history) as a project well"""
+    from esp_project import INPUT_FIELDS as PROJECT_INPUT_FIELDS
+    well_name = st.session_state.well_name
+    design = None
+    if st.session_state.design_calculated:
+        q_curve, h_curve = st.session_state.q_curve_data, st.session_state.h_curve_data
+        design = {field: st.session_state[field] for field in
+                  ('TDH_design', 'n_stages', 'head_per_stage', 'calc', 'operating_point', 'solver_stats')}
+    else:
+        q_curve, h_curve = st.session_state.get('selected_curve') or (DEFAULT_Q_CURVE, DEFAULT_H_CURVE)
+    history = None
+    if include_history and well_name and len(well_history(well_name)):
+        history = well_history(well_name).arrays()
+    return {'well_name': well_name, 'pump_model': st.session_state.pump_model,
+            'inputs': {field: st.session_state[field] for field in PROJECT_INPUT_FIELDS},
+            'q_curve': q_curve, 'h_curve': h_curve, 'design': design, 'history': history}
+
+def project_well(well_name):
+    """A well of the session's project, read from the opened project file unless it was saved this session"""
+    well = st.session_state.project_wells[well_name]
+    return well if well is not None else st.session_state.project.well(well_name)
+
+def open_project_well(well_name):
+    """Make a project well the current one: its inputs, pump curve, design and live history"""
+    well = project_well(well_name)
+    for field, value in well['inputs'].items():
+        st.session_state[field] = value
+    for key in list(LIVE_INPUT_WIDGETS.values()) + ['pump_model_input']:
+        st.session_state.pop(key, None)
+    st.session_state.well_name = well['well_name']
+    st.session_state.pump_model = well['pump_model']
+    q_curve, h_curve = list(well['q_curve']), list(well['h_curve'])
+    st.session_state.project_curve = (q_curve, h_curve)
+    st.session_state.pump_source = PROJECT_CURVE_SOURCE
+    st.session_state.live_updated = False
+    
+    design = well['design']
+    if design is not None:
+        # A saved design is held to the same checks as a calculated one; without a stage count only the inputs open
+        try:
+            check_design(design['n_stages'], design['calc'])
+        except ValueError as e:
+            st.toast(f"⚠️ Saved design of {well['well_name']} not loaded: {e}")
+            design = None
+    st.session_state.design_calculated = design is not None
+    if design is not None:
+        design_inputs = {field: well['inputs'][field] for field, _ in REQUIRED_FIELDS}
+        design_inputs.update({field: well['inputs'][field] or 0 for field in OPTIONAL_FIELDS})
+        # Shown in this session only: results read from an uploaded file never enter the shared design cache
+        store_design(design_inputs, q_curve, h_curve, design)
+    # Readings from an uploaded file stay in this session: they never enter the shared history store
+    st.session_state.opened_history = None
+    if well['history'] is not None:
+        from esp_history import WellHistory
+        history = WellHistory(None)
+        history.extend(well['history'])
+        st.session_state.opened_history = (well['well_name'], history)
+
+def project_sidebar():
+    """Open, build and download a multi-well project file"""
+    project_upload = st.file_uploader("Open project", type=['esp'], key="project_upload")
+    if project_upload is not None:
+        data = project_upload.getvalue()
+        digest = hashlib.sha256(data).hexdigest()
+        if digest != st.session_state.project_digest:
+            from esp_project import Project
+            try:
+                project = Project(data)
+            except (OSError, ValueError) as e:
+                st.error(f"❌ Error reading project file: {str(e)}")
+            else:
+                st.session_state.project = project
+                st.session_state.project_wells = {name: None for name in project.wells}
+                st.session_state.project_file = data
+                st.session_state.project_digest = digest
+    
+    wells = list(st.session_state.project_wells)
+    if wells:
+        selected = st.selectbox(f"Project wells ({len(wells)})", wells, key="project_well")
+        if st.button("📂 Open Well", width='stretch'):
+            open_project_well(selected)
+            st.rerun()
+    
+    include_history = st.checkbox("Include live history", value=True, key="project_history")
+    if st.button("➕ Save Current Well to Project", width='stretch', disabled=not st.session_state.well_name):
+        st.session_state.project_wells[st.session_state.well_name] = current_well_snapshot(include_history)
+        st.session_state.project_file = None
+        st.success(f"✓ Saved {st.session_state.well_name} to the project")
+    
+    if st.session_state.project_wells:
+        if st.session_state.project_file is None:
+            from esp_project import project_bytes
+            st.session_state.project_file = project_bytes(project_well(name) for name in st.session_state.project_wells)
+        st.download_button("💾 Download Project", data=st.session_state.project_file, file_name="esp_project.esp",
+                           mime="application/octet-stream", width='stretch')
+
+def live_feed_status():
+    """
+    Poll the streaming feed: runs as a fragment every live_refresh_s seconds and
+    reruns the page only when new samples arrived, so the UI refresh rate does
+    not depend on how fast data comes in.
+    """
+    feed = st.session_state.live_feed
+    if feed is None:
+        return
+    feed.configure(st.session_state.pump_curve, st.session_state.actual_stages_value, st.session_state.target_rate,
+                   st.session_state.bep_flow, st.session_state.p_gradient_value,
+                   st.session_state.drive_frequency_value, **design_fluid())
+    seq, point = feed.latest()
+    if feed.failed:
+        st.error(f"❌ Live feed from `{feed.source}` stopped: {feed.failed}")
+    state = "🟢 Streaming" if feed.running else "⚪ Stopped"
+    st.caption(f"{state} from `{feed.source}` | {seq} samples | {feed.errors} rejected"
+               + (f" | {feed.sink_errors} not recorded" if feed.sink_errors else "")
+               + (f" | {feed.restarts} reconnects" if feed.restarts else "")
+               + (f" | last error: {feed.last_error}" if feed.last_error else ""))
+    if point is not None and seq != st.session_state.live_feed_seq:
+        st.session_state.live_feed_seq = seq
+        apply_live_point(point)
+        st.rerun()
 
 # Title
 st.markdown("<h1 style='text-align: center; color: #58A6FF;'>⚡ ESP Performance Dashboard v2.0</h1>", 
@@ -178,12 +526,16 @@ st.markdown("---")
 
 # Sidebar for navigation
 with st.sidebar:
-    st.image("https://img.icons8.com/fluency/96/000000/oil-industry.png", width=80)
+    st.image(static_asset("oil-industry.svg"), width=80)
     st.markdown("<h2 style='color: #E6EDF3;'>Navigation</h2>", unsafe_allow_html=True)
     page = st.radio("Select Mode:", 
-                    ["📊 Part 1: Design & Sizing", "🔴 Part 2: Live Monitoring"],
+                    ["📊 Part 1: Design & Sizing", "🔴 Part 2: Live Monitoring", "🛰️ Part 3: Fleet Monitoring"],
                     label_visibility="collapsed")
     
+    st.markdown("---")
+    with st.expander("📁 Project", expanded=bool(st.session_state.project_wells)):
+        project_sidebar()
+    
     st.markdown("---")
     st.markdown("<h3 style='color: #E6EDF3;'>About</h3>", unsafe_allow_html=True)
     st.info("""
@@ -194,6 +546,8 @@ with st.sidebar:
     - ESP Electrical parameters
     
     **Part 2:** Monitor live ESP operation with real-time sensor data and performance tracking.
+    
+    **Part 3:** Status of every well in the field from their latest PIP/PDP readings.
     """)
     
     st.markdown("---")
@@ -203,12 +557,275 @@ with st.sidebar:
         st.metric("Required Stages", f"{st.session_state.get('n_stages', 0)}")
         st.metric("TDH", f"{st.session_state.get('TDH_design', 0):.0f} ft")
 
+@st.fragment
+def show_design_results():
+    """
+    Tab 4 results. Runs as a fragment, so the ranking, sensitivity and Monte
+    Carlo widgets rerun only this tab, and is only called while Tab 4 is
+    open; each section renders only while its expander is open.
+    """
+    if not st.session_state.design_calculated:
+        st.info("👈 Please fill in all data in the tabs above and click 'Calculate Complete ESP Design' to see results")
+        return
+    
+    st.subheader("📊 Design Results")
+    
+    # Key Metrics
+    col1, col2, col3, col4, col5 = st.columns(5)
+    with col1:
+        st.metric("Required Stages", f"{st.session_state.n_stages}")
+    with col2:
+        st.metric("Head/Stage", f"{st.session_state.head_per_stage:.2f} ft")
+    with col3:
+        st.metric("Total Head", f"{st.session_state.TDH_design:.0f} ft")
+    with col4:
+        st.metric("Pump BHP", f"{st.session_state.calc['pump_bhp_normal']:.1f} HP")
+    with col5:
+        st.metric("Hydraulic HP", f"{st.session_state.calc['hydraulic_hp']:.1f} HP")
+    
+    # Detailed Results in Expandable Sections
+    st.markdown("---")
+    
+    # Well & Fluid Properties
+    section = st.expander("🔬 Well Fluid Properties & PVT", expanded=True, key="results_pvt", on_change="rerun")
+    with section:
+        if section.open:
+            col1, col2, col3 = st.columns(3)
+            with col1:
+                st.markdown("**Basic Properties:**")
+                st.write(f"• Oil Sp. Gr: {st.session_state.calc['oil_sg']:.4f}")
+                st.write(f"• Fluid Sp. Gr: {st.session_state.calc['fluid_sg']:.4f}")
+                st.write(f"• Tubing Composite Sp. Gr: {st.session_state.calc['tubing_composite_sg']:.4f}")
+            with col2:
+                st.markdown("**PVT Properties(Based on Standing Correlation):**")
+                st.write(f"• Rs (SCF/STB): {st.session_state.calc['rs']:.2f}")
+                st.write(f"• Bo (bbl/STB): {st.session_state.calc['bo']:.4f}")
+                st.write(f"• Bg (bbl/mcf): {st.session_state.calc['bg']:.4f}")
+                st.write(f"• Bow (mix): {st.session_state.calc['bow']:.4f}")
+                st.write(f"• Oil Viscosity (cP): {st.session_state.calc['oil_viscosity']:.2f}")
+                st.write(f"• Fluid Viscosity (cSt): {st.session_state.calc['fluid_viscosity']:.2f}")
+            with col3:
+                st.markdown("**Pressures:**")
+                st.write(f"• Flowing BHP: {st.session_state.calc['flowing_bhp']:.1f} psi")
+                st.write(f"• Pump Intake: {st.session_state.calc['pump_intake_pressure']:.1f} psi")
+                st.write(f"• Initial PIP: {st.session_state.calc['initial_pip']:.1f} psi")
+    
+    # Production Data
+    section = st.expander("🛢️ Production Data", expanded=True, key="results_production", on_change="rerun")
+    with section:
+        if section.open:
+            col1, col2, col3 = st.columns(3)
+            with col1:
+                st.markdown("**Surface Rates:**")
+                st.write(f"• Oil: {st.session_state.calc['surface_oil_rate']:.1f} bpd")
+                st.write(f"• Water: {st.session_state.calc['water_prod_downhole']:.1f} bpd")
+                st.write(f"• Gas: {st.session_state.calc['total_prod_gas']:.3f} mcf/d")
+            with col2:
+                st.markdown("**Downhole Rates:**")
+                st.write(f"• Oil: {st.session_state.calc['downhole_oil_rate']:.1f} bbl/d")
+                st.write(f"• Gas: {st.session_state.calc['gas_prod_downhole']:.1f} bbl/d")
+                st.write(f"• Total ESP: {st.session_state.calc['total_esp_downhole_rate']:.1f} bpd")
+            with col3:
+                st.markdown("**Gas Analysis:**")
+                st.write(f"• Free Gas: {st.session_state.calc['free_gas_volume']:.3f} mcf/d")
+                st.write(f"• Gas in Solution: {st.session_state.calc['gas_in_solution']:.3f} mcf/d")
+                st.write(f"• Free Gas % @ Intake: {st.session_state.calc['free_gas_pct_intake']:.2f}%")
+                st.write(f"• Free Gas % 1st Stage: {st.session_state.calc['free_gas_pct_first_stage']:.2f}%")
+                st.write(f"• Gas Tolerance: {st.session_state.calc['gas_limit'] * 100:.0f}%")
+                st.write(f"• Head Derating: {st.session_state.calc['gas_head_factor'] * 100:.1f}%")
+                st.write(f"• Tubing GOR: {st.session_state.calc['tubing_gor']:.1f} scf/stb")
+    
+    # Head Breakdown
+    section = st.expander("📐 Head Breakdown", expanded=True, key="results_heads", on_change="rerun")
+    with section:
+        if section.open:
+            col1, col2 = st.columns(2)
+            with col1:
+                st.markdown("**TDH Components:**")
+                st.write(f"• Net Dynamic Lift: {st.session_state.calc['net_dynamic_lift']:.0f} ft")
+                st.write(f"• Surface Pressure Head: {st.session_state.calc['h_surf']:.0f} ft")
+                st.write(f"• Friction Loss: {st.session_state.calc['h_friction']:.0f} ft")
+                st.write(f"• Pump Discharge (traverse): {st.session_state.calc['pdp_traverse']:.0f} psi")
+                st.write(f"• **Total Dynamic Head: {st.session_state.TDH_design:.0f} ft**")
+            with col2:
+                st.markdown("**Fluid Levels:**")
+                st.write(f"• Fluid Level Above Pump: {st.session_state.calc['fluid_level_above_pump']:.0f} ft")
+                st.write(f"• Estimated Stages: {st.session_state.n_stages}")
+                st.write(f"• Head per Stage: {st.session_state.head_per_stage:.2f} ft")
+    
+    # Operating point from the nodal solver
+    section = st.expander("🎯 Operating Point (Nodal Analysis)", expanded=True, key="results_operating_point", on_change="rerun")
+    with section:
+        if section.open:
+            op = st.session_state.operating_point
+            col1, col2 = st.columns(2)
+            with col1:
+                st.markdown(f"**Pump vs System Curve ({st.session_state.n_stages} stages):**")
+                st.write(f"• Operating Flow: {op['q_operating']:.0f} bpd")
+                st.write(f"• Operating Head: {op['head_operating']:.0f} ft")
+                st.write(f"• Pump Intake Pressure: {op['op_pump_intake_pressure']:.1f} psi")
+                st.write(f"• Flowing BHP: {op['op_flowing_bhp']:.1f} psi")
+            with col2:
+                st.markdown("**Solver:**")
+                st.write(f"• Status: {'Converged' if op['op_converged'] else 'No crossing inside the pump curve'}")
+                st.write(f"• Iterations: {op['op_iterations']}")
+                st.write(f"• Solve Time: {st.session_state.solver_stats['elapsed_ms']:.1f} ms")
+    
+    # Electrical Parameters
+    section = st.expander("⚡ Electrical Analysis", expanded=True, key="results_electrical", on_change="rerun")
+    with section:
+        if section.open:
+            col1, col2, col3 = st.columns(3)
+            with col1:
+                st.markdown("**Power Requirements:**")
+                st.write(f"• Startup HP: {st.session_state.calc['required_hp_startup']:.1f} HP")
+                st.write(f"• Normal BHP: {st.session_state.calc['pump_bhp_normal']:.1f} HP")
+                st.write(f"• Hydraulic HP: {st.session_state.calc['hydraulic_hp']:.1f} HP")
+                st.write(f"• Viscosity C_Q / C_H / C_η: {st.session_state.calc['visc_flow_factor']:.3f} / "
+                         f"{st.session_state.calc['visc_head_factor']:.3f} / "
+                         f"{st.session_state.calc['visc_efficiency_factor']:.3f}")
+            with col2:
+                st.markdown("**Current & Voltage:**")
+                st.write(f"• Startup Ampere: {st.session_state.calc['startup_ampere']:.1f} A")
+                st.write(f"• Normal Ampere: {st.session_state.calc['normal_ampere']:.1f} A")
+                st.write(f"• Required Surface V: {st.session_state.calc['required_surface_voltage']:.0f} V")
+                st.write(f"• Voltage Drop: {st.session_state.calc['voltage_drop']:.1f} V")
+            with col3:
+                st.markdown("**System Parameters:**")
+                st.write(f"• Total KVA: {st.session_state.calc['total_system_kva']:.2f} KVA")
+                st.write(f"• True Power: {st.session_state.calc['true_power_kw']:.2f} kW")
+                st.write(f"• Cable Resistance: {st.session_state.calc['cable_resistance']:.4f} Ω")
+                st.write(f"• Vstart/Vnameplate: {st.session_state.calc['vstart_ratio']:.3f}")
+    
+    # Best pump for this well from the pump library
+    section = st.expander("🏆 Best Pump for This Well", expanded=False, key="results_ranking", on_change="rerun")
+    with section:
+        if section.open:
+            from esp_selection import rank_pumps
+            library = get_pump_library()
+            if len(library) == 0:
+                st.info("Pump library is empty. Save pump curves to the library in the ESP Selection tab to rank them here.")
+            else:
+                only_fitting = st.checkbox(f"Only pumps with OD ≤ {st.session_state.pump_od} in",
+                                           value=False, key="rank_max_od")
+                ranking = rank_pumps(
+                    library.catalog(), st.session_state.target_rate, st.session_state.TDH_design,
+                    metadata=library.index,
+                    tubing_composite_sg=st.session_state.calc['tubing_composite_sg'],
+                    max_od=st.session_state.pump_od if only_fitting else None,
+                )
+                in_range_count = int(ranking['in_range'].sum())
+                st.markdown(f"**{in_range_count} of {len(ranking)} library pumps** cover "
+                            f"{st.session_state.target_rate:.0f} bpd inside their recommended range "
+                            f"(TDH {st.session_state.TDH_design:.0f} ft)")
+                st.dataframe(ranking.head(20), width='stretch')
+    
+    # One-at-a-time sensitivity of the design to every input
+    section = st.expander("🌪️ Sensitivity Analysis", expanded=False, key="results_sensitivity", on_change="rerun")
+    with section:
+        if section.open:
+            from esp_sensitivity import SENSITIVITY_OUTPUTS, SWEEP_STEPS, tornado_table
+            col1, col2, col3 = st.columns(3)
+            with col1:
+                span_pct = st.slider("Input range (± %)", 5, 50, 20, step=5, key="sensitivity_span")
+            with col2:
+                output_labels = dict(SENSITIVITY_OUTPUTS)
+                output = st.selectbox("Output", list(output_labels), format_func=output_labels.get,
+                                      key="sensitivity_output")
+            with col3:
+                top_n = st.slider("Inputs shown", 5, 29, 12, key="sensitivity_top_n")
+            
+            start = time.perf_counter()
+            sweep = get_sensitivity_sweep(st.session_state.design_inputs, st.session_state.pump_curve, span_pct / 100)
+            table = tornado_table(sweep, output)
+            elapsed = (time.perf_counter() - start) * 1000
+            st.plotly_chart(tornado_figure(table.head(top_n), sweep.attrs['base'][output], output_labels[output],
+                                           span_pct / 100), width='stretch')
+            st.caption(f"{sweep['field'].nunique()} inputs × {SWEEP_STEPS} steps = {len(sweep)} designs "
+                       f"evaluated in {elapsed:.0f} ms")
+            st.dataframe(table, width='stretch')
+    
+    # Probabilistic design from uncertain reservoir inputs
+    section = st.expander("🎲 Probabilistic Design (Monte Carlo)", expanded=False, key="results_monte_carlo",
+                          on_change="rerun")
+    with section:
+        if section.open:
+            import pandas as pd
+            from esp_montecarlo import MC_OUTPUTS, default_distributions, monte_carlo_design, percentile_table
+            st.caption("Triangular distributions (low / most likely / high) for the uncertain inputs; "
+                       "every other input stays at its design value.")
+            base_ranges = pd.DataFrame(
+                [(field, low, mode, high) for field, (_, low, mode, high)
+                 in default_distributions(st.session_state.design_inputs).items()],
+                columns=['input', 'low', 'most_likely', 'high'],
+            ).set_index('input')
+            ranges = st.data_editor(base_ranges, width='stretch', key="mc_ranges")
+            col1, col2, col3 = st.columns(3)
+            with col1:
+                n_draws = st.selectbox("Draws", [10_000, 100_000, 1_000_000], index=1, format_func="{:,}".format,
+                                       key="mc_draws")
+            with col2:
+                mc_seed = st.number_input("Random seed", value=0, step=1, key="mc_seed")
+            with col3:
+                st.markdown("<br>", unsafe_allow_html=True)
+                run_mc = st.button("▶ Run Monte Carlo", width='stretch')
+            
+            if run_mc:
+                distributions = {field: ('triangular', row['low'], row['most_likely'], row['high'])
+                                 for field, row in ranges.iterrows()}
+                with st.spinner(f"Running {n_draws:,} designs..."):
+                    start = time.perf_counter()
+                    samples = monte_carlo_design(st.session_state.design_inputs, distributions, n_draws,
+                                                 seed=int(mc_seed), q_curve=st.session_state.q_curve_data,
+                                                 h_curve=st.session_state.h_curve_data)
+                    st.session_state.mc_samples = samples
+                    st.session_state.mc_elapsed = time.perf_counter() - start
+            
+            if st.session_state.get('mc_samples') is not None:
+                samples = st.session_state.mc_samples
+                summary = percentile_table(samples)
+                cols = st.columns(len(MC_OUTPUTS))
+                for col, (name, label) in zip(cols, MC_OUTPUTS):
+                    with col:
+                        row = summary.loc[name]
+                        st.metric(f"{label} P50", f"{row['P50']:,.1f}",
+                                  help=f"P10 {row['P10']:,.1f} | P90 {row['P90']:,.1f}")
+                st.dataframe(summary, width='stretch')
+                output_labels = dict(MC_OUTPUTS)
+                shown = st.selectbox("Distribution of", list(output_labels), format_func=output_labels.get,
+                                     key="mc_output")
+                st.plotly_chart(distribution_figure(samples[shown], output_labels[shown],
+                                                    summary.loc[shown, ['P10', 'P50', 'P90']].to_dict()),
+                                width='stretch')
+                infeasible = int(samples['n_stages'].isna().sum())
+                st.caption(f"{len(samples):,} draws in {st.session_state.mc_elapsed:.2f} s "
+                           f"(seed {st.session_state.mc_seed})"
+                           + (f" | {infeasible:,} draws without a feasible stage count (e.g. free gas over the "
+                              "limit)" if infeasible else ""))
+    
+    # Performance Chart
+    st.markdown("---")
+    st.subheader("📈 ESP Performance Curve")
+    
+    # Static figure, built once per design and shared by every session
+    fig = get_performance_figure(st.session_state.pump_curve, st.session_state.design_inputs,
+                                 st.session_state.n_stages,
+                                 st.session_state.calc['h_lift'], st.session_state.calc['h_surf'],
+                                 st.session_state.TDH_design, st.session_state.bep_flow, st.session_state.rec_min, st.session_state.rec_max,
+                                 st.session_state.well_name, st.session_state.pump_model,
+                                 st.session_state.drive_frequency)
+    
+    st.plotly_chart(fig, width='stretch')
+
+
 # ==================== PART 1: DESIGN & SIZING ====================
 if page == "📊 Part 1: Design & Sizing":
     st.header("📊 Part 1: ESP System Design & Sizing")
     
     # Create tabs for better organization
-    tab1, tab2, tab3, tab4 = st.tabs(["🔧 ESP Selection", "🏭 Well & Fluid Data", "⚡ Equipment & Electrical Parameters", "📋 Results & Analysis"])
+    # Tabs track the open one so the results tab only runs while it is shown
+    tab1, tab2, tab3, tab4 = st.tabs(["🔧 ESP Selection", "🏭 Well & Fluid Data", "⚡ Equipment & Electrical Parameters", "📋 Results & Analysis"],
+                                     key="design_tab", on_change="rerun")
     
     # ========== TAB 1: ESP SELECTION ==========
     with tab1:
@@ -225,9 +842,10 @@ if page == "📊 Part 1: Design & Sizing":
             )
             st.session_state.pump_model = pump_model
             
-            pump_source = st.radio("Pump Data Source:", 
-                                  ["Use Default Pump (ESP-3000)", "Upload Custom Pump Curve"],
-                                  key="pump_source")
+            pump_sources = ["Use Default Pump (ESP-3000)", "Upload Custom Pump Curve", "Select from Pump Library"]
+            if st.session_state.project_curve is not None:
+                pump_sources.append(PROJECT_CURVE_SOURCE)
+            pump_source = st.radio("Pump Data Source:", pump_sources, key="pump_source")
             
             if pump_source == "Use Default Pump (ESP-3000)":
                 q_curve_data = DEFAULT_Q_CURVE
@@ -235,26 +853,32 @@ if page == "📊 Part 1: Design & Sizing":
                 st.success(f"✓ Loaded {len(q_curve_data)} data points from default pump")
                 st.session_state.custom_pump_loaded = False
                 
-            else:  # Upload Custom Pump Curve
-                st.info("📤 Upload an Excel file with pump performance data")
+            elif pump_source == "Upload Custom Pump Curve":
+                st.info("📤 Upload an Excel, CSV or Parquet file with pump performance data")
                 st.markdown("""
-                **Excel Format Requirements:**
+                **File Format Requirements:**
                 - Column 1: Flow Rate (bpd)
                 - Column 2: Head per Stage (ft)
                 - Data should start from row 1, Column A
                 - No headers needed
+                
+                **Catalogs:** one Excel sheet per pump model, or rows with
+                `model`, `flow`, `head` (and optional `bhp`, `efficiency`) columns
                 """)
                 
-                uploaded_file = st.file_uploader("Choose Excel file", type=['xlsx', 'xls'], key="pump_upload")
+                uploaded_file = st.file_uploader("Choose pump curve file", type=['xlsx', 'xls', 'csv', 'parquet'], key="pump_upload")
                 
                 if uploaded_file is not None:
                     try:
-                        # Read the Excel file
-                        df = pd.read_excel(uploaded_file, header=None)
-                        
-                        # Assume first column is flow, second is head
-                        q_curve_data = df.iloc[:, 0].dropna().tolist()
-                        h_curve_data = df.iloc[:, 1].dropna().tolist()
+                        # Read the whole catalog (first column is flow, second is head)
+                        catalog = load_uploaded_pump_catalog(uploaded_file)
+                        catalog_model = catalog.models[0]
+                        if len(catalog) > 1:
+                            catalog_model = st.selectbox(f"Pump model ({len(catalog)} in catalog)",
+                                                         catalog.models, key="catalog_model")
+                        q_catalog, h_catalog = catalog.curve(catalog_model)
+                        q_curve_data = q_catalog.tolist()
+                        h_curve_data = h_catalog.tolist()
                         
                         # Validate data
                         if len(q_curve_data) != len(h_curve_data):
@@ -266,24 +890,69 @@ if page == "📊 Part 1: Design & Sizing":
                             q_curve_data = DEFAULT_Q_CURVE
                             h_curve_data = DEFAULT_H_CURVE
                         else:
-                            st.success(f"✓ Successfully loaded {len(q_curve_data)} data points from Excel")
+                            st.success(f"✓ Successfully loaded {len(q_curve_data)} data points for {catalog_model}")
                             st.session_state.custom_pump_loaded = True
                             
                             # Show preview
+                            import pandas as pd
                             preview_df = pd.DataFrame({
                                 'Flow (bpd)': q_curve_data[:10],
                                 'Head (ft)': h_curve_data[:10]
                             })
                             with st.expander("📊 Preview First 10 Points"):
                                 st.dataframe(preview_df, width='stretch')
+                            
+                            # Keep the upload beyond this session
+                            if st.button("💾 Save to Pump Library", key="save_to_library"):
+                                if len(catalog) > 1:
+                                    get_pump_library().add_catalog(catalog)
+                                    st.success(f"✓ Saved {len(catalog)} pump models to the library")
+                                else:
+                                    from esp_library import METADATA_FIELDS
+                                    library_name = st.session_state.pump_model or catalog_model
+                                    library_meta = {field: st.session_state[field] for field in METADATA_FIELDS
+                                                    if st.session_state[field] is not None}
+                                    get_pump_library().add(library_name, q_curve_data, h_curve_data, **library_meta)
+                                    st.success(f"✓ Saved {library_name} to the library")
                     except Exception as e:
-                        st.error(f"❌ Error reading Excel file: {str(e)}")
+                        st.error(f"❌ Error reading pump curve file: {str(e)}")
                         q_curve_data = DEFAULT_Q_CURVE
                         h_curve_data = DEFAULT_H_CURVE
                 else:
                     q_curve_data = DEFAULT_Q_CURVE
                     h_curve_data = DEFAULT_H_CURVE
                     st.warning("⚠️ No file uploaded. Using default pump data.")
+                    
+            elif pump_source == PROJECT_CURVE_SOURCE:
+                q_curve_data, h_curve_data = st.session_state.project_curve
+                st.success(f"✓ Loaded {len(q_curve_data)} data points from the project well")
+                st.session_state.custom_pump_loaded = True
+                
+            else:  # Select from Pump Library
+                library = get_pump_library()
+                if len(library) == 0:
+                    q_curve_data = DEFAULT_Q_CURVE
+                    h_curve_data = DEFAULT_H_CURVE
+                    st.warning("⚠️ Pump library is empty. Upload a custom curve and save it to the library. Using default pump data.")
+                else:
+                    library_model = st.selectbox(f"Library Pump Model ({len(library)} pumps)",
+                                                 library.models, key="library_model")
+                    q_library, h_library = library.curve(library_model)
+                    q_curve_data = q_library.tolist()
+                    h_curve_data = h_library.tolist()
+                    st.success(f"✓ Loaded {len(q_curve_data)} data points for {library_model} from the pump library")
+                    st.session_state.custom_pump_loaded = True
+                    
+                    # Fill the performance parameters from the library when another model is picked
+                    if st.session_state.get('library_model_loaded') != library_model:
+                        import pandas as pd
+                        for field, value in library.metadata(library_model).items():
+                            if not pd.isna(value):
+                                st.session_state[field] = float(value)
+                        st.session_state.library_model_loaded = library_model
+            
+            # Curve a project snapshot records for a well that has not been designed yet
+            st.session_state.selected_curve = (q_curve_data, h_curve_data)
         
         with col2:
             st.markdown("### 📈 Performance Parameters")
@@ -576,10 +1245,21 @@ if page == "📊 Part 1: Design & Sizing":
                 "Motor Frequency (Hz)", 
                 value=st.session_state.motor_frequency if st.session_state.motor_frequency is not None else None,
                 placeholder="e.g., 50",
-                step=1
+                step=1,
+                help="Nameplate frequency the motor HP and voltage are rated at"
             )
             st.session_state.motor_frequency = motor_frequency
             
+            design_drive_frequency = st.number_input(
+                "Drive Frequency (Hz, optional)",
+                value=st.session_state.drive_frequency,
+                placeholder=f"blank = {BASE_FREQUENCY:.0f} Hz, no VSD",
+                step=0.5,
+                help=f"VSD output frequency to design at. The pump curve is rated at {BASE_FREQUENCY:.0f} Hz and "
+                     "scaled with the affinity laws; motor HP and voltage scale with it over the nameplate frequency"
+            )
+            st.session_state.drive_frequency = design_drive_frequency
+            
             transformer_voltage = st.number_input(
                 "Transformer Upstream Voltage (Volts)", 
                 value=st.session_state.transformer_voltage if st.session_state.transformer_voltage is not None else None,
@@ -621,39 +1301,7 @@ if page == "📊 Part 1: Design & Sizing":
     st.markdown("---")
     
     # Validate all required inputs before allowing calculation
-    required_fields = [
-        ('bep_flow', 'BEP Flow Rate'),
-        ('rec_min', 'Recommended Min Flow'),
-        ('rec_max', 'Recommended Max Flow'),
-        ('bhp_per_stage', 'BHP per Stage'),
-        ('perf_start_depth_md', 'Perforation Start Depth (MD)'),
-        ('perf_start_depth_tvd', 'Perforation Start Depth (TVD)'),
-        ('pump_setting_depth_tvd', 'Pump Setting Depth (TVD)'),
-        ('pump_setting_depth_md', 'Pump Setting Depth (MD)'),
-        ('tubing_id', 'Tubing ID'),
-        ('target_rate', 'Target Rate'),
-        ('water_cut', 'Water Cut'),
-        ('p_wh', 'Wellhead Pressure'),
-        ('static_pressure', 'Static Pressure'),
-        ('bottom_hole_temp', 'Bottom Hole Temperature'),
-        ('water_sg', 'Water Specific Gravity'),
-        ('oil_api', 'Oil API Gravity'),
-        ('gas_sg', 'Gas Specific Gravity'),
-        ('bubble_point_pressure', 'Bubble Point Pressure'),
-        ('gas_compressibility', 'Gas Compressibility'),
-        ('gor', 'GOR'),
-        ('productivity_index', 'Productivity Index'),
-        ('pump_od', 'Pump OD'),
-        ('cable_number', 'Cable Number'),
-        ('motor_hp_nameplate', 'Motor HP'),
-        ('motor_voltage_nameplate', 'Motor Voltage'),
-        ('motor_ampere_nameplate', 'Motor Ampere'),
-        ('motor_frequency', 'Motor Frequency'),
-        ('transformer_voltage', 'Transformer Voltage'),
-        ('motor_power_factor', 'Motor Power Factor'),
-        ('motor_efficiency', 'Motor Efficiency'),
-        ('pump_efficiency', 'Pump Efficiency'),
-    ]
+    required_fields = REQUIRED_FIELDS
     
     missing_fields = [label for field, label in required_fields if st.session_state[field] is None]
     
@@ -663,293 +1311,26 @@ if page == "📊 Part 1: Design & Sizing":
     if st.button("🚀 Calculate Complete ESP Design", width='stretch', type="primary", disabled=bool(missing_fields)):
         with st.spinner("Performing comprehensive calculations..."):
             try:
-                # Create interpolation function
-                pump_curve = interp1d(q_curve_data, h_curve_data, kind="cubic", fill_value="extrapolate")
-                
-                # Get values from session state
-                target_rate = st.session_state.target_rate
-                water_cut = st.session_state.water_cut
-                oil_api = st.session_state.oil_api
-                static_pressure = st.session_state.static_pressure
-                productivity_index = st.session_state.productivity_index
-                bubble_point_pressure = st.session_state.bubble_point_pressure
-                gas_sg = st.session_state.gas_sg
-                bottom_hole_temp = st.session_state.bottom_hole_temp
-                perf_start_depth_tvd = st.session_state.perf_start_depth_tvd
-                pump_setting_depth_tvd = st.session_state.pump_setting_depth_tvd
-                pump_setting_depth_md = st.session_state.pump_setting_depth_md
-                p_wh = st.session_state.p_wh
-                water_sg = st.session_state.water_sg
-                gor = st.session_state.gor
-                gas_compressibility = st.session_state.gas_compressibility
-                tubing_id = st.session_state.tubing_id
-                motor_ampere_nameplate = st.session_state.motor_ampere_nameplate
-                motor_hp_nameplate = st.session_state.motor_hp_nameplate
-                motor_voltage_nameplate = st.session_state.motor_voltage_nameplate
-                cable_number = st.session_state.cable_number
-                transformer_voltage = st.session_state.transformer_voltage
-                motor_power_factor = st.session_state.motor_power_factor
-                motor_efficiency = st.session_state.motor_efficiency
-                bhp_per_stage = st.session_state.bhp_per_stage
-                pump_od = st.session_state.pump_od
-                num_rgs_od400 = st.session_state.num_rgs_od400
-                num_rgs_od500 = st.session_state.num_rgs_od500
-                num_agh_od400 = st.session_state.num_agh_od400
-                num_agh_od500 = st.session_state.num_agh_od500
-                
-                # ===== FLUID PROPERTIES CALCULATIONS =====
-                # Oil specific gravity
-                oil_sg = 141.5 / (131.5 + oil_api)
-                
-                # Flowing bottom hole pressure
-                flowing_bhp = static_pressure - (target_rate / productivity_index)
-                
-                # Rs - Solution GOR (Standing correlation)
-                rs = gas_sg * ((bubble_point_pressure / 18) * 
-                              (10**(0.0125 * ((141.5/oil_sg) - 131.5)) / 
-                               (10**(0.00091 * bottom_hole_temp))))**1.2048
+                # Shared pump curve (interpolators are built once per distinct curve)
+                pump_curve = get_cached_pump_curve(q_curve_data, h_curve_data)
                 
-                # Bo - Oil Formation Volume Factor (Standing correlation)
-                bo = 0.972 + 0.000147 * (rs * (gas_sg/oil_sg)**0.5 + 1.25*bottom_hole_temp)**1.175
-                
-                # Bg - Gas Formation Volume Factor (calculated later at pump intake pressure)
-                # Will be calculated after we know pump intake pressure
-                
-                # Bow - Oil-water mix formation volume factor
-                bow = water_cut * 1/100 + (1 - water_cut/100) * bo
-                
-                # Total ESP downhole rate
-                total_esp_downhole_rate = target_rate * bow
-                
-                # Fluid specific gravity (composite)
-                fluid_sg = oil_sg * (1 - water_cut/100) + water_sg * water_cut/100
-                
-                # ===== PRODUCTION DATA =====
-                # Surface oil rate
-                surface_oil_rate = (1 - water_cut) * target_rate
-                
-                # Downhole oil rate
-                downhole_oil_rate = surface_oil_rate * bo
-                
-                # Water production downhole
-                water_prod_downhole = water_cut * target_rate
-                
-                # Total produced gas
-                total_prod_gas = (1 - water_cut/100) * target_rate * gor / 1000
-                
-                # Gas in solution
-                gas_in_solution = (1 - water_cut/100) * target_rate * rs / 1000
-                
-                # Free gas volume
-                free_gas_volume = total_prod_gas - gas_in_solution
-                
-                # ===== HEAD CALCULATION (INITIAL) =====
-                # Initial pump intake pressure (assuming no drawdown initially)
-                initial_pip = static_pressure - ((perf_start_depth_tvd - pump_setting_depth_tvd) * 0.433)
-                
-                # Now calculate Bg at pump intake pressure
-                # We'll use initial_pip for first iteration
-                # Will be recalculated after we determine actual pump intake pressure
-                
-                # For now, use a placeholder for friction
-                friction_factor = 45.0  # ft/1000ft - will be refined
-                
-                # Calculate required head
-                h_lift = pump_setting_depth_tvd - (initial_pip / (0.433 * fluid_sg))
-                h_surf = p_wh / (0.433 * fluid_sg)
-                h_friction = friction_factor * (pump_setting_depth_md / 1000)
-                TDH_initial = h_lift + h_surf + h_friction
-                
-                # Get head per stage at target rate
-                head_per_stage = float(pump_curve(target_rate))
-                
-                # Calculate required stages
-                n_stages_estimated = TDH_initial / head_per_stage
-                n_stages = int(np.ceil(n_stages_estimated))
-                
-                # ===== ITERATIVE CALCULATION FOR PUMP INTAKE PRESSURE =====
-                # Now we can calculate actual pump intake pressure
-                # This is iterative but we'll do one iteration
-                
-                # Pump intake pressure (considering fluid column)
-                pump_intake_pressure = flowing_bhp - ((perf_start_depth_tvd - pump_setting_depth_tvd) * fluid_sg * 0.433)
-                
-                # Bg at pump intake pressure
-                bg = 28.27 * gas_compressibility * (bottom_hole_temp + 460) / pump_intake_pressure
-                
-                # Gas production downhole
-                gas_prod_downhole = free_gas_volume * bg
-                
-                # Total fluid volume at pump intake
-                total_fluid_volume = downhole_oil_rate + water_prod_downhole + gas_prod_downhole
-                
-                # Free gas percentage at pump intake
-                free_gas_pct_intake = gas_prod_downhole * 100 / total_fluid_volume if total_fluid_volume > 0 else 0
-                
-                # Gas not separated (20% if RGS efficiency is 80%)
-                gas_not_separated = gas_prod_downhole * 0.2
-                
-                # Total volume of fluid mixture ingested into pump
-                total_fluid_to_pump = gas_not_separated + downhole_oil_rate + water_prod_downhole
-                
-                # Free gas percentage entering first stage
-                free_gas_pct_first_stage = gas_not_separated / total_fluid_to_pump * 100 if total_fluid_to_pump > 0 else 0
-                
-                # Gas volume entering tubing
-                gas_vol_tubing = gas_in_solution + (gas_not_separated / bg)
-                
-                # Tubing GOR
-                tubing_gor = gas_vol_tubing * 1000 / surface_oil_rate if surface_oil_rate > 0 else 0
-                
-                # Total mass of produced fluid
-                total_mass_prod = ((surface_oil_rate * oil_sg + water_prod_downhole * water_sg) * 62.4 * 5.615 + 
-                                  tubing_gor * surface_oil_rate * gas_sg * 0.0752)
-                
-                # Inside tubing composite specific gravity
-                tubing_composite_sg = total_mass_prod / (total_fluid_to_pump * 5.615 * 62.4) if total_fluid_to_pump > 0 else fluid_sg
-                
-                # ===== RECALCULATE TDH WITH ACCURATE PARAMETERS =====
-                # Net dynamic lift
-                net_dynamic_lift = pump_setting_depth_tvd - (pump_intake_pressure / (0.433 * fluid_sg))
-                
-                # Fluid level above pump intake
-                fluid_level_above_pump = pump_intake_pressure / (0.433 * fluid_sg)
-                
-                # Total dynamic head
-                TDH_design = net_dynamic_lift + (p_wh / (0.433 * tubing_composite_sg))
-                
-                # Estimated number of stages
-                n_stages_estimated_final = TDH_design / head_per_stage
-                n_stages = int(np.ceil(n_stages_estimated_final))
-                
-                # ===== HORSEPOWER CALCULATIONS =====
-                # Required HP at first startup
-                if pump_od == 4:
-                    required_hp_startup = (n_stages * bhp_per_stage) + (4.5 * num_rgs_od400 / 1.2) + (30 * num_agh_od400) 
-                else:
-                    required_hp_startup = (n_stages * bhp_per_stage + num_rgs_od500 * 11/1.2 + num_agh_od500 * 30)
-                
-                # Pump brake horsepower (normal operation)
-                pump_bhp_normal = bhp_per_stage * n_stages * tubing_composite_sg
-                
-                # Hydraulic horsepower
-                hydraulic_hp = total_esp_downhole_rate * 0.02917 * TDH_design * fluid_sg / 3960
-                
-                # ===== ELECTRICAL CALCULATIONS =====
-                # Pump-up time (no check valve)
-                pumpup_time = ((tubing_id**2 / 1029.4) * (pump_setting_depth_md - (initial_pip / 0.433)) / 
-                              (total_esp_downhole_rate / 1440)) if total_esp_downhole_rate > 0 else 0
-                
-                # Startup working ampere
-                startup_ampere = motor_ampere_nameplate * required_hp_startup / motor_hp_nameplate if motor_hp_nameplate > 0 else 0
-                
-                # Normal working ampere
-                normal_ampere = motor_ampere_nameplate * pump_bhp_normal / motor_hp_nameplate if motor_hp_nameplate > 0 else 0
-                
-                # Voltage drop
-                if cable_number == 1:
-                    voltage_drop = ((0.22077 * startup_ampere - 0.4661) * pump_setting_depth_md / 1000) * (((bottom_hole_temp - 60) * 0.002) + 1)
-                else:
-                    voltage_drop = ((0.27423 * normal_ampere - 0.49627) * pump_setting_depth_md / 1000) * (((bottom_hole_temp - 60) * 0.002) + 1)
-                
-                # Required surface voltage
-                required_surface_voltage = voltage_drop + motor_voltage_nameplate
-                
-                # Total system KVA
-                total_system_kva = required_surface_voltage * motor_ampere_nameplate * 1.73 / 1000
-                
-                # Sea cable ampere
-                sea_cable_ampere = required_surface_voltage * normal_ampere / transformer_voltage if transformer_voltage > 0 else 0
-                
-                # True power (kW)
-                true_power_kw = total_system_kva * motor_power_factor * motor_efficiency
-                
-                # Cable resistance at downhole temp
-                if cable_number == 2:
-                    cable_resistance = (pump_setting_depth_md * 0.169 / 1000) * (1 + 0.00214 * (bottom_hole_temp - 77))
-                else:
-                    cable_resistance = (pump_setting_depth_md * 0.134 / 1000) * (1 + 0.00214 * (bottom_hole_temp - 77))
-                
-                # Voltage drop across cable
-                voltage_drop_cable = 1.732 * cable_resistance * normal_ampere
-                
-                # Voltage at motor terminals during startup
-                vstart = motor_voltage_nameplate - 4 * startup_ampere * cable_resistance
-                
-                # Vstart / Vnameplate ratio
-                vstart_ratio = vstart / motor_voltage_nameplate if motor_voltage_nameplate > 0 else 0
+                # Gather inputs from session state and run the design engine
+                design_inputs = {field: st.session_state[field] for field, _ in required_fields}
+                design_inputs.update({field: st.session_state[field] or 0 for field in OPTIONAL_FIELDS})
+                design, cached = run_design(design_inputs, pump_curve)
                 
                 # Store all results in session state
-                st.session_state.design_calculated = True
-                st.session_state.pump_curve = pump_curve
-                st.session_state.q_curve_data = q_curve_data
-                st.session_state.h_curve_data = h_curve_data
-                st.session_state.TDH_design = TDH_design
-                st.session_state.n_stages = n_stages
-                st.session_state.head_per_stage = head_per_stage
-                st.session_state.friction_factor = friction_factor
+                store_design(design_inputs, q_curve_data, h_curve_data, design)
                 
-                # Store all calculated values
-                st.session_state.calc = {
-                    # Fluid properties
-                    'oil_sg': oil_sg,
-                    'flowing_bhp': flowing_bhp,
-                    'rs': rs,
-                    'bo': bo,
-                    'bg': bg,
-                    'bow': bow,
-                    'fluid_sg': fluid_sg,
-                    'tubing_composite_sg': tubing_composite_sg,
-                    
-                    # Production
-                    'total_esp_downhole_rate': total_esp_downhole_rate,
-                    'surface_oil_rate': surface_oil_rate,
-                    'downhole_oil_rate': downhole_oil_rate,
-                    'water_prod_downhole': water_prod_downhole,
-                    'total_prod_gas': total_prod_gas,
-                    'gas_in_solution': gas_in_solution,
-                    'free_gas_volume': free_gas_volume,
-                    'gas_prod_downhole': gas_prod_downhole,
-                    'total_fluid_volume': total_fluid_volume,
-                    'free_gas_pct_intake': free_gas_pct_intake,
-                    'gas_not_separated': gas_not_separated,
-                    'total_fluid_to_pump': total_fluid_to_pump,
-                    'free_gas_pct_first_stage': free_gas_pct_first_stage,
-                    'gas_vol_tubing': gas_vol_tubing,
-                    'tubing_gor': tubing_gor,
-                    'total_mass_prod': total_mass_prod,
-                    
-                    # Pressures and heads
-                    'initial_pip': initial_pip,
-                    'pump_intake_pressure': pump_intake_pressure,
-                    'net_dynamic_lift': net_dynamic_lift,
-                    'fluid_level_above_pump': fluid_level_above_pump,
-                    'h_lift': net_dynamic_lift,
-                    'h_surf': p_wh / (0.433 * tubing_composite_sg),
-                    'h_friction': h_friction,
-                    
-                    # Power
-                    'required_hp_startup': required_hp_startup,
-                    'pump_bhp_normal': pump_bhp_normal,
-                    'hydraulic_hp': hydraulic_hp,
-                    
-                    # Electrical
-                    'pumpup_time': pumpup_time,
-                    'startup_ampere': startup_ampere,
-                    'normal_ampere': normal_ampere,
-                    'voltage_drop': voltage_drop,
-                    'required_surface_voltage': required_surface_voltage,
-                    'total_system_kva': total_system_kva,
-                    'sea_cable_ampere': sea_cable_ampere,
-                    'true_power_kw': true_power_kw,
-                    'cable_resistance': cable_resistance,
-                    'voltage_drop_cable': voltage_drop_cable,
-                    'vstart': vstart,
-                    'vstart_ratio': vstart_ratio,
-                }
-                
-                st.success("✅ Complete design calculation finished!")
+                if cached:
+                    st.success("✅ Complete design loaded from the design cache (same inputs and pump curve)")
+                else:
+                    st.success("✅ Complete design calculation finished!")
                 
+            except ValueError as e:
+                # No stage count for these inputs: do not leave an earlier design on show
+                st.session_state.design_calculated = False
+                st.error(f"❌ {str(e)}")
             except Exception as e:
                 st.error(f"❌ Calculation error: {str(e)}")
                 import traceback
@@ -957,220 +1338,8 @@ if page == "📊 Part 1: Design & Sizing":
     
     # ========== TAB 4: RESULTS & ANALYSIS ==========
     with tab4:
-        if st.session_state.design_calculated:
-            st.subheader("📊 Design Results")
-            
-            # Key Metrics
-            col1, col2, col3, col4, col5 = st.columns(5)
-            with col1:
-                st.metric("Required Stages", f"{st.session_state.n_stages}")
-            with col2:
-                st.metric("Head/Stage", f"{st.session_state.head_per_stage:.2f} ft")
-            with col3:
-                st.metric("Total Head", f"{st.session_state.TDH_design:.0f} ft")
-            with col4:
-                st.metric("Pump BHP", f"{st.session_state.calc['pump_bhp_normal']:.1f} HP")
-            with col5:
-                st.metric("Hydraulic HP", f"{st.session_state.calc['hydraulic_hp']:.1f} HP")
-            
-            # Detailed Results in Expandable Sections
-            st.markdown("---")
-            
-            # Well & Fluid Properties
-            with st.expander("🔬 Well Fluid Properties & PVT", expanded=True):
-                col1, col2, col3 = st.columns(3)
-                with col1:
-                    st.markdown("**Basic Properties:**")
-                    st.write(f"• Oil Sp. Gr: {st.session_state.calc['oil_sg']:.4f}")
-                    st.write(f"• Fluid Sp. Gr: {st.session_state.calc['fluid_sg']:.4f}")
-                    st.write(f"• Tubing Composite Sp. Gr: {st.session_state.calc['tubing_composite_sg']:.4f}")
-                with col2:
-                    st.markdown("**PVT Properties(Based on Standing Correlation):**")
-                    st.write(f"• Rs (SCF/STB): {st.session_state.calc['rs']:.2f}")
-                    st.write(f"• Bo (bbl/STB): {st.session_state.calc['bo']:.4f}")
-                    st.write(f"• Bg (bbl/mcf): {st.session_state.calc['bg']:.4f}")
-                    st.write(f"• Bow (mix): {st.session_state.calc['bow']:.4f}")
-                with col3:
-                    st.markdown("**Pressures:**")
-                    st.write(f"• Flowing BHP: {st.session_state.calc['flowing_bhp']:.1f} psi")
-                    st.write(f"• Pump Intake: {st.session_state.calc['pump_intake_pressure']:.1f} psi")
-                    st.write(f"• Initial PIP: {st.session_state.calc['initial_pip']:.1f} psi")
-            
-            # Production Data
-            with st.expander("🛢️ Production Data", expanded=True):
-                col1, col2, col3 = st.columns(3)
-                with col1:
-                    st.markdown("**Surface Rates:**")
-                    st.write(f"• Oil: {st.session_state.calc['surface_oil_rate']:.1f} bpd")
-                    st.write(f"• Water: {st.session_state.calc['water_prod_downhole']:.1f} bpd")
-                    st.write(f"• Gas: {st.session_state.calc['total_prod_gas']:.3f} mcf/d")
-                with col2:
-                    st.markdown("**Downhole Rates:**")
-                    st.write(f"• Oil: {st.session_state.calc['downhole_oil_rate']:.1f} bbl/d")
-                    st.write(f"• Gas: {st.session_state.calc['gas_prod_downhole']:.1f} bbl/d")
-                    st.write(f"• Total ESP: {st.session_state.calc['total_esp_downhole_rate']:.1f} bpd")
-                with col3:
-                    st.markdown("**Gas Analysis:**")
-                    st.write(f"• Free Gas: {st.session_state.calc['free_gas_volume']:.3f} mcf/d")
-                    st.write(f"• Gas in Solution: {st.session_state.calc['gas_in_solution']:.3f} mcf/d")
-                    st.write(f"• Free Gas % @ Intake: {st.session_state.calc['free_gas_pct_intake']:.2f}%")
-                    st.write(f"• Free Gas % 1st Stage: {st.session_state.calc['free_gas_pct_first_stage']:.2f}%")
-                    st.write(f"• Tubing GOR: {st.session_state.calc['tubing_gor']:.1f} scf/stb")
-            
-            # Head Breakdown
-            with st.expander("📐 Head Breakdown", expanded=True):
-                col1, col2 = st.columns(2)
-                with col1:
-                    st.markdown("**TDH Components:**")
-                    st.write(f"• Net Dynamic Lift: {st.session_state.calc['net_dynamic_lift']:.0f} ft")
-                    st.write(f"• Surface Pressure Head: {st.session_state.calc['h_surf']:.0f} ft")
-                    st.write(f"• Friction Loss: {st.session_state.calc['h_friction']:.0f} ft")
-                    st.write(f"• **Total Dynamic Head: {st.session_state.TDH_design:.0f} ft**")
-                with col2:
-                    st.markdown("**Fluid Levels:**")
-                    st.write(f"• Fluid Level Above Pump: {st.session_state.calc['fluid_level_above_pump']:.0f} ft")
-                    st.write(f"• Estimated Stages: {st.session_state.n_stages}")
-                    st.write(f"• Head per Stage: {st.session_state.head_per_stage:.2f} ft")
-            
-            # Electrical Parameters
-            with st.expander("⚡ Electrical Analysis", expanded=True):
-                col1, col2, col3 = st.columns(3)
-                with col1:
-                    st.markdown("**Power Requirements:**")
-                    st.write(f"• Startup HP: {st.session_state.calc['required_hp_startup']:.1f} HP")
-                    st.write(f"• Normal BHP: {st.session_state.calc['pump_bhp_normal']:.1f} HP")
-                    st.write(f"• Hydraulic HP: {st.session_state.calc['hydraulic_hp']:.1f} HP")
-                with col2:
-                    st.markdown("**Current & Voltage:**")
-                    st.write(f"• Startup Ampere: {st.session_state.calc['startup_ampere']:.1f} A")
-                    st.write(f"• Normal Ampere: {st.session_state.calc['normal_ampere']:.1f} A")
-                    st.write(f"• Required Surface V: {st.session_state.calc['required_surface_voltage']:.0f} V")
-                    st.write(f"• Voltage Drop: {st.session_state.calc['voltage_drop']:.1f} V")
-                with col3:
-                    st.markdown("**System Parameters:**")
-                    st.write(f"• Total KVA: {st.session_state.calc['total_system_kva']:.2f} KVA")
-                    st.write(f"• True Power: {st.session_state.calc['true_power_kw']:.2f} kW")
-                    st.write(f"• Cable Resistance: {st.session_state.calc['cable_resistance']:.4f} Ω")
-                    st.write(f"• Vstart/Vnameplate: {st.session_state.calc['vstart_ratio']:.3f}")
-            
-            # Performance Chart
-            st.markdown("---")
-            st.subheader("📈 ESP Performance Curve")
-            
-            # Use monotonic interpolation to prevent oscillations
-            from scipy.interpolate import PchipInterpolator
-
-            max_q = max(st.session_state.q_curve_data)
-            q_range = np.linspace(0, max_q, 100)
-
-            # Use PCHIP (Piecewise Cubic Hermite Interpolating Polynomial) 
-            # which preserves monotonicity and prevents oscillations
-            pchip_curve = PchipInterpolator(st.session_state.q_curve_data, st.session_state.h_curve_data)
-            h_single_stage = pchip_curve(q_range)
-
-            # Clip negative heads to zero
-            h_single_stage = np.maximum(h_single_stage, 0)
-            h_full_pump = h_single_stage * st.session_state.n_stages
-            
-            # Create system curve
-            def calculate_tdh(q):
-                if q == 0:
-                    return st.session_state.calc['h_lift'] + st.session_state.calc['h_surf']
-                friction_at_q = st.session_state.friction_factor * (st.session_state.pump_setting_depth_md / 1000) * (q / st.session_state.target_rate) ** 1.85
-                return st.session_state.calc['h_lift'] + st.session_state.calc['h_surf'] + friction_at_q
-            
-            system_tdh = [calculate_tdh(q) for q in q_range]
-            bep_head = st.session_state.pump_curve(st.session_state.bep_flow) * st.session_state.n_stages
-            
-            # Create figure
-            fig = go.Figure()
-            
-            # Recommended range
-            fig.add_vrect(
-                x0=st.session_state.rec_min, 
-                x1=st.session_state.rec_max,
-                fillcolor="rgba(0, 255, 136, 0.1)",
-                layer="below",
-                line_width=0,
-                annotation_text="Recommended Range",
-                annotation_position="top left",
-                annotation=dict(font=dict(size=11, color="#00FF88"))
-            )
-            
-            # Pump curve
-            fig.add_trace(go.Scatter(
-                x=q_range, y=h_full_pump,
-                mode='lines',
-                name=f'Pump Curve ({st.session_state.n_stages} stages)',
-                line=dict(color='#00E5FF', width=3),
-                hovertemplate='<b>Flow:</b> %{x:.0f} bpd<br><b>Head:</b> %{y:.0f} ft<extra></extra>'
-            ))
-            
-            # System curve
-            fig.add_trace(go.Scatter(
-                x=q_range, y=system_tdh,
-                mode='lines',
-                name='System Curve',
-                line=dict(color='#FF6B6B', width=2.5, dash='dash'),
-                hovertemplate='<b>Flow:</b> %{x:.0f} bpd<br><b>Required Head:</b> %{y:.0f} ft<extra></extra>'
-            ))
-            
-            # BEP
-            fig.add_trace(go.Scatter(
-                x=[st.session_state.bep_flow], y=[bep_head],
-                mode='markers',
-                name='BEP',
-                marker=dict(size=14, color='#FFD700', line=dict(color='white', width=2)),
-                hovertemplate='<b>BEP</b><br>Flow: %{x:.0f} bpd<br>Head: %{y:.0f} ft<extra></extra>'
-            ))
-            
-            # Design point
-            fig.add_trace(go.Scatter(
-                x=[st.session_state.target_rate], y=[st.session_state.TDH_design],
-                mode='markers',
-                name='Design Point',
-                marker=dict(size=16, color='#00FF88', symbol='square', line=dict(color='white', width=2)),
-                hovertemplate='<b>Design Point</b><br>Flow: %{x:.0f} bpd<br>Head: %{y:.0f} ft<extra></extra>'
-            ))
-            
-            fig.update_layout(
-                title=dict(
-                    text=f"ESP Performance - Well {st.session_state.well_name} | {st.session_state.pump_model}",
-                    font=dict(size=18, color='#E6EDF3')
-                ),
-                xaxis_title="Flow Rate (bpd)",
-                yaxis_title="Total Dynamic Head (ft)",
-                hovermode='closest',
-                template='plotly_dark',
-                paper_bgcolor='#0D1117',
-                plot_bgcolor='#161B22',
-                font=dict(color='#E6EDF3', size=12),
-                legend=dict(
-                    yanchor="top", y=0.99,
-                    xanchor="right", x=0.99,
-                    bgcolor="rgba(22, 27, 34, 0.8)",
-                    bordercolor="#30363D",
-                    borderwidth=1,
-                    font=dict(color='#E6EDF3', size=11)
-                ),
-                height=600,
-                xaxis=dict(
-                    title_font=dict(color='#E6EDF3', size=13),
-                    tickfont=dict(color='#C9D1D9', size=11)
-                ),
-                yaxis=dict(
-                    title_font=dict(color='#E6EDF3', size=13),
-                    tickfont=dict(color='#C9D1D9', size=11)
-                )
-            )
-            
-            fig.update_xaxes(gridcolor='rgba(48, 54, 61, 0.3)', showline=True, linecolor='#30363D')
-            fig.update_yaxes(gridcolor='rgba(48, 54, 61, 0.3)', showline=True, linecolor='#30363D')
-            
-            st.plotly_chart(fig, width='stretch')
-            
-        else:
-            st.info("👈 Please fill in all data in the tabs above and click 'Calculate Complete ESP Design' to see results")
+        if tab4.open:
+            show_design_results()
 
 # ==================== PART 2: LIVE MONITORING ====================
 elif page == "🔴 Part 2: Live Monitoring":
@@ -1250,6 +1419,25 @@ elif page == "🔴 Part 2: Live Monitoring":
                 key="pg"
             )
             st.session_state.p_gradient_value = p_gradient
+            st.markdown("#### Variable-Speed Drive")
+            drive_freq = st.number_input(
+                "Drive Frequency (Hz)",
+                value=st.session_state.drive_frequency_value,
+                placeholder=f"blank = solve from flow, or {BASE_FREQUENCY:.0f}",
+                step=0.5,
+                key="drive_freq",
+                help="Frequency the VSD is running at; curves and BEP are scaled with the affinity laws"
+            )
+            st.session_state.drive_frequency_value = drive_freq
+            surface_flow = st.number_input(
+                "Surface Flow Meter (bpd, optional)",
+                value=st.session_state.surface_flow_value,
+                placeholder="e.g., 2500",
+                step=10.0,
+                key="surface_flow",
+                help="With no drive frequency, the frequency is solved from PIP/PDP at this flow"
+            )
+            st.session_state.surface_flow_value = surface_flow
             st.markdown('</div>', unsafe_allow_html=True)
     
     # Update button with enhanced styling
@@ -1266,47 +1454,69 @@ elif page == "🔴 Part 2: Live Monitoring":
     
     if update_button and can_update:
         with st.spinner("Processing sensor data and analyzing performance..."):
-            # Calculate actual operating point
-            delta_p = pdp - pip
-            H_actual_stages = delta_p / p_gradient
-            H_per_stage = H_actual_stages / actual_stages
-            H_actual = H_per_stage
-            
-            # Get flow from head using inverse interpolation
-            Q_from_H = interp1d(st.session_state.h_curve_data, st.session_state.q_curve_data, 
-                               fill_value="extrapolate")
-            Q_actual_sensor = float(Q_from_H(H_actual))
-            H_total_sensor = H_actual * actual_stages
-            
-            # Store live data
-            st.session_state.live_pip = pip
-            st.session_state.live_pdp = pdp
-            st.session_state.live_delta_p = delta_p
-            st.session_state.live_Q = Q_actual_sensor
-            st.session_state.live_H = H_total_sensor
-            st.session_state.live_H_per_stage = H_actual
-            st.session_state.live_stages = actual_stages
-            st.session_state.live_updated = True
-            st.session_state.timestamp = datetime.now()
-            
-            # Calculate deviations and status
-            deviation_from_design = Q_actual_sensor - st.session_state.target_rate
-            deviation_pct = (deviation_from_design / st.session_state.target_rate) * 100
-            deviation_from_bep = Q_actual_sensor - st.session_state.bep_flow
-            deviation_bep_pct = (deviation_from_bep / st.session_state.bep_flow) * 100
-            
-            st.session_state.live_deviation = deviation_from_design
-            st.session_state.live_deviation_pct = deviation_pct
-            st.session_state.live_deviation_bep_pct = deviation_bep_pct
-            
+            # Unknown drive frequency: solve it from the pressure rise at the metered flow
+            frequency = drive_freq
+            if frequency is None and surface_flow:
+                frequency = float(drive_frequency(pip, pdp, p_gradient, actual_stages, st.session_state.pump_curve,
+                                                  surface_flow))
+                if np.isnan(frequency):
+                    st.warning("⚠️ No drive frequency in the VSD range matches this ΔP at the metered flow; "
+                               f"using {BASE_FREQUENCY:.0f} Hz.")
+            # Head from the pressure differential, flow from the pump curve's inverse interpolation
+            point = live_operating_point(pip, pdp, p_gradient, actual_stages, st.session_state.pump_curve,
+                                         st.session_state.target_rate, st.session_state.bep_flow, frequency,
+                                         **design_fluid())
+            point['timestamp'] = datetime.now()
+            apply_live_point(point)
+            live_point_sink(st.session_state.well_name)(point)
             st.success("✅ Live data updated and analyzed!")
     
+    # Streaming ingestion: samples are processed on a background thread, the page polls at a fixed rate
+    with st.expander("📡 Streaming Sensor Feed", expanded=st.session_state.live_feed is not None):
+        st.caption("Tail a CSV file (`path/to/samples.csv`), listen on `udp://0.0.0.0:5005`, read a gateway at "
+                   "`tcp://host:port` or subscribe to `mqtt://broker:1883/topic`. Samples are "
+                   "`timestamp,pip,pdp[,p_gradient[,stages[,frequency]]]` lines or JSON; missing gradient, "
+                   "stages and frequency use the values above.")
+        col1, col2, col3 = st.columns([3, 1, 1])
+        with col1:
+            feed_source = st.text_input("Source", key="live_feed_source", placeholder="udp://0.0.0.0:5005")
+        with col2:
+            st.selectbox("Refresh (s)", [0.5, 1.0, 2.0, 5.0], key="live_refresh_s")
+        with col3:
+            feed = st.session_state.live_feed
+            if feed is not None and feed.running and feed_source != feed.source:
+                # The source was edited: the running feed no longer reads what the page shows
+                feed.stop()
+            if feed is not None and feed.running:
+                if st.button("⏹ Stop Feed", width='stretch'):
+                    feed.stop()
+                    st.rerun()
+            elif st.button("▶ Start Feed", width='stretch', disabled=not feed_source):
+                if feed is not None:
+                    feed.stop()
+                st.session_state.live_feed = LiveFeed(feed_source, st.session_state.pump_curve, actual_stages,
+                                                      st.session_state.target_rate, st.session_state.bep_flow,
+                                                      p_gradient, frequency=drive_freq, **design_fluid(),
+                                                      sink=live_point_sink(st.session_state.well_name)
+                                                      ).start()
+                # Stops the feed when this session ends (Streamlit has no session-end callback)
+                st.session_state.live_feed_lease = FeedLease(st.session_state.live_feed)
+                st.session_state.live_feed_seq = 0
+        feed = st.session_state.live_feed
+        run_every = st.session_state.live_refresh_s if feed is not None and feed.running else None
+        st.fragment(run_every=run_every)(live_feed_status)()
+    
     # Display live results with enhanced dashboard
     if st.session_state.get('live_updated', False):
         st.markdown("---")
         
+        # BEP and recommended range at the drive frequency (affinity laws)
+        live_speed = st.session_state.live_frequency / BASE_FREQUENCY
+        live_rec_min = live_speed * st.session_state.rec_min
+        live_rec_max = live_speed * st.session_state.rec_max
+        
         # Status indicator
-        in_range = (st.session_state.rec_min <= st.session_state.live_Q <= st.session_state.rec_max)
+        in_range = (live_rec_min <= st.session_state.live_Q <= live_rec_max)
         status = "OPTIMAL OPERATION" if in_range else "OUT OF RANGE"
         status_color = "#00FF88" if in_range else "#FF1744"
         status_icon = "✅" if in_range else "⚠️"
@@ -1318,6 +1528,14 @@ elif page == "🔴 Part 2: Live Monitoring":
         </div>
         """, unsafe_allow_html=True)
         
+        # The curve's shut-in head at the drive speed (affinity laws: head scales with speed squared)
+        live_peak_head = live_speed ** 2 * st.session_state.pump_curve.peak_head
+        if st.session_state.live_H_per_stage > live_peak_head:
+            st.warning(f"⚠️ Measured head per stage ({st.session_state.live_H_per_stage:.1f} ft) is above the pump "
+                       f"curve's peak at {st.session_state.live_frequency:.1f} Hz ({live_peak_head:.1f} ft); "
+                       "flow is shown at the peak. "
+                       "Check the pressure gradient, stage count and gauges.")
+        
         # Live metrics dashboard
         st.subheader("🎯 Current Operating Point")
         
@@ -1346,7 +1564,7 @@ elif page == "🔴 Part 2: Live Monitoring":
                 st.write(f"• Pump Intake: {st.session_state.live_pip:.1f} psi")
                 st.write(f"• Pump Discharge: {st.session_state.live_pdp:.1f} psi")
                 st.write(f"• Differential: {st.session_state.live_delta_p:.1f} psi")
-                st.write(f"• Pressure Gradient: {p_gradient:.4f} psi/ft")
+                st.write(f"• Pressure Gradient: {st.session_state.live_p_gradient:.4f} psi/ft")
             
             with col2:
                 st.markdown("**Performance:**")
@@ -1354,13 +1572,14 @@ elif page == "🔴 Part 2: Live Monitoring":
                 st.write(f"• Total Head: {st.session_state.live_H:.0f} ft")
                 st.write(f"• Head per Stage: {st.session_state.live_H_per_stage:.2f} ft")
                 st.write(f"• Operating Stages: {st.session_state.live_stages}")
+                st.write(f"• Drive Frequency: {st.session_state.live_frequency:.1f} Hz")
             
             with col3:
                 st.markdown("**Design Comparison:**")
                 st.write(f"• Design Flow: {st.session_state.target_rate} bpd")
                 st.write(f"• Design Head: {st.session_state.TDH_design:.0f} ft")
-                st.write(f"• BEP Flow: {st.session_state.bep_flow:.0f} bpd")
-                st.write(f"• Recommended Range: {st.session_state.rec_min:.0f}-{st.session_state.rec_max:.0f} bpd")
+                st.write(f"• BEP Flow: {st.session_state.live_bep_flow:.0f} bpd")
+                st.write(f"• Recommended Range: {live_rec_min:.0f}-{live_rec_max:.0f} bpd")
         
         # Performance insights
         st.markdown("---")
@@ -1372,15 +1591,15 @@ elif page == "🔴 Part 2: Live Monitoring":
             st.markdown('<div class="calculation-section">', unsafe_allow_html=True)
             st.markdown("#### Operating Range Analysis")
             if in_range:
-                st.success(f"✅ Operating within recommended flow range ({st.session_state.rec_min:.0f} - {st.session_state.rec_max:.0f} bpd)")
+                st.success(f"✅ Operating within recommended flow range ({live_rec_min:.0f} - {live_rec_max:.0f} bpd)")
             else:
-                if st.session_state.live_Q < st.session_state.rec_min:
-                    shortage = st.session_state.rec_min - st.session_state.live_Q
-                    st.error(f"⚠️ Flow too low by {shortage:.0f} bpd (minimum: {st.session_state.rec_min:.0f} bpd)")
+                if st.session_state.live_Q < live_rec_min:
+                    shortage = live_rec_min - st.session_state.live_Q
+                    st.error(f"⚠️ Flow too low by {shortage:.0f} bpd (minimum: {live_rec_min:.0f} bpd)")
                     st.warning("**Recommendations:**\n- Check for pump wear\n- Verify reservoir pressure\n- Inspect for blockages")
                 else:
-                    excess = st.session_state.live_Q - st.session_state.rec_max
-                    st.error(f"⚠️ Flow too high by {excess:.0f} bpd (maximum: {st.session_state.rec_max:.0f} bpd)")
+                    excess = st.session_state.live_Q - live_rec_max
+                    st.error(f"⚠️ Flow too high by {excess:.0f} bpd (maximum: {live_rec_max:.0f} bpd)")
                     st.warning("**Recommendations:**\n- Reduce pump speed if VSD equipped\n- Check for gas slugging\n- Verify stage count")
             st.markdown('</div>', unsafe_allow_html=True)
         
@@ -1403,126 +1622,26 @@ elif page == "🔴 Part 2: Live Monitoring":
         st.markdown("---")
         st.subheader("📈 Live Performance Visualization")
         
-        # Use monotonic interpolation to prevent oscillations
-        from scipy.interpolate import PchipInterpolator
-
-        max_q = max(st.session_state.q_curve_data)
-        q_range = np.linspace(0, max_q, 100)
-
-        # Use PCHIP (Piecewise Cubic Hermite Interpolating Polynomial) 
-        # which preserves monotonicity and prevents oscillations
-        pchip_curve = PchipInterpolator(st.session_state.q_curve_data, st.session_state.h_curve_data)
-        h_single_stage = pchip_curve(q_range)
+        # The static traces are rebuilt only when the design changes; each update moves the LIVE point
+        live_key = figure_key(st.session_state.pump_curve.key, st.session_state.n_stages, st.session_state.live_stages,
+                              st.session_state.bep_flow, st.session_state.target_rate, st.session_state.TDH_design,
+                              st.session_state.rec_min, st.session_state.rec_max, st.session_state.live_frequency)
+        if st.session_state.get('live_fig_key') != live_key:
+            # Pump curve at the drive frequency; the rest of the VSD family comes precomputed per curve
+            q_range, h_single_stage = st.session_state.pump_curve.chart_grid()
+            q_range, h_single_stage = q_range * live_speed, h_single_stage * live_speed ** 2
+            h_full_pump = h_single_stage * st.session_state.n_stages
+            bep_head = (live_speed ** 2 * st.session_state.pump_curve(st.session_state.bep_flow)
+                        * st.session_state.live_stages)
+            family_curves = st.session_state.pump_curve.family().curves(FAMILY_CHART_FREQUENCIES)
+            st.session_state.live_fig = live_figure(q_range, h_full_pump, st.session_state.live_stages,
+                                                    st.session_state.live_bep_flow, bep_head,
+                                                    st.session_state.target_rate, st.session_state.TDH_design,
+                                                    live_rec_min, live_rec_max, family_curves)
+            st.session_state.live_fig_key = live_key
+        fig = set_live_point(st.session_state.live_fig, st.session_state.live_Q, st.session_state.live_H,
+                             st.session_state.well_name, st.session_state.timestamp)
 
-        # Clip negative heads to zero
-        h_single_stage = np.maximum(h_single_stage, 0)
-        h_full_pump = h_single_stage * st.session_state.n_stages
-        
-        bep_head = st.session_state.pump_curve(st.session_state.bep_flow) * st.session_state.live_stages
-        
-        # Create figure
-        fig = go.Figure()
-        
-        # Recommended range shading
-        fig.add_vrect(
-            x0=st.session_state.rec_min, 
-            x1=st.session_state.rec_max,
-            fillcolor="rgba(0, 255, 136, 0.15)",
-            layer="below",
-            line_width=0,
-            annotation_text="Recommended Operating Range",
-            annotation_position="top left",
-            annotation=dict(font=dict(size=12, color="#00FF88"))
-        )
-        
-        # Pump curve
-        fig.add_trace(go.Scatter(
-            x=q_range, y=h_full_pump,
-            mode='lines',
-            name=f'Pump Curve ({st.session_state.live_stages} stages)',
-            line=dict(color='#00E5FF', width=3.5),
-            hovertemplate='<b>Flow:</b> %{x:.0f} bpd<br><b>Head:</b> %{y:.0f} ft<extra></extra>'
-        ))
-        
-        # BEP
-        fig.add_trace(go.Scatter(
-            x=[st.session_state.bep_flow], y=[bep_head],
-            mode='markers+text',
-            name='BEP',
-            marker=dict(size=16, color='#FFD700', line=dict(color='white', width=2.5)),
-            text=['BEP'],
-            textposition='top center',
-            textfont=dict(size=11, color='#FFD700'),
-            hovertemplate='<b>BEP</b><br>%{x:.0f} bpd, %{y:.0f} ft<extra></extra>'
-        ))
-        
-        # Design point
-        fig.add_trace(go.Scatter(
-            x=[st.session_state.target_rate], y=[st.session_state.TDH_design],
-            mode='markers+text',
-            name='Design Point',
-            marker=dict(size=16, color='#00FF88', symbol='square', line=dict(color='white', width=2.5)),
-            text=['Design'],
-            textposition='bottom center',
-            textfont=dict(size=11, color='#00FF88'),
-            hovertemplate='<b>Design Point</b><br>%{x:.0f} bpd, %{y:.0f} ft<extra></extra>'
-        ))
-        
-        # LIVE operating point - HIGHLIGHTED
-        fig.add_trace(go.Scatter(
-            x=[st.session_state.live_Q], y=[st.session_state.live_H],
-            mode='markers+text',
-            name='LIVE Operating Point',
-            marker=dict(size=22, color='#FF1744', symbol='diamond', 
-                       line=dict(color='white', width=3)),
-            text=['LIVE'],
-            textposition='top center',
-            textfont=dict(size=13, color='#FF1744', family='Arial Black'),
-            hovertemplate='<b>🔴 LIVE OPERATING POINT</b><br>Flow: %{x:.0f} bpd<br>Head: %{y:.0f} ft<extra></extra>'
-        ))
-        
-        # Enhanced layout
-        fig.update_layout(
-            title=dict(
-                text=f"<b>Live ESP Monitoring - Well {st.session_state.well_name}</b><br><sub>Last Update: {st.session_state.timestamp.strftime('%Y-%m-%d %H:%M:%S')}</sub>",
-                font=dict(size=20, color='#E6EDF3'),
-                x=0.5,
-                xanchor='center'
-            ),
-            xaxis_title="Flow Rate (bpd)",
-            yaxis_title="Total Dynamic Head (ft)",
-            hovermode='closest',
-            template='plotly_dark',
-            paper_bgcolor='#0D1117',
-            plot_bgcolor='#161B22',
-            font=dict(color='#E6EDF3', size=13),
-            legend=dict(
-                yanchor="top", y=0.99,
-                xanchor="right", x=0.99,
-                bgcolor="rgba(22, 27, 34, 0.95)",
-                bordercolor="#30363D",
-                borderwidth=2,
-                font=dict(color='#E6EDF3', size=12)
-            ),
-            height=700,
-            xaxis=dict(
-                title_font=dict(color='#E6EDF3', size=14),
-                tickfont=dict(color='#C9D1D9', size=12),
-                gridcolor='rgba(48, 54, 61, 0.4)',
-                showline=True,
-                linecolor='#30363D',
-                linewidth=2
-            ),
-            yaxis=dict(
-                title_font=dict(color='#E6EDF3', size=14),
-                tickfont=dict(color='#C9D1D9', size=12),
-                gridcolor='rgba(48, 54, 61, 0.4)',
-                showline=True,
-                linecolor='#30363D',
-                linewidth=2
-            )
-        )
-        
         st.plotly_chart(fig, width='stretch')
         
         # Additional metrics in cards
@@ -1532,7 +1651,7 @@ elif page == "🔴 Part 2: Live Monitoring":
         col1, col2, col3, col4 = st.columns(4)
         
         with col1:
-            efficiency = min(100, (st.session_state.live_Q / st.session_state.bep_flow) * 100) if st.session_state.live_Q < st.session_state.bep_flow else min(100, (st.session_state.bep_flow / st.session_state.live_Q) * 100)
+            efficiency = min(100, (st.session_state.live_Q / st.session_state.live_bep_flow) * 100) if st.session_state.live_Q < st.session_state.live_bep_flow else min(100, (st.session_state.live_bep_flow / st.session_state.live_Q) * 100)
             st.metric("Relative Efficiency", f"{efficiency:.1f}%")
         
         with col2:
@@ -1546,6 +1665,73 @@ elif page == "🔴 Part 2: Live Monitoring":
         with col4:
             operating_hours = 24  # Placeholder - could be tracked
             st.metric("Hours Since Update", f"{(datetime.now() - st.session_state.timestamp).seconds / 60:.0f} min")
+        
+        # Operating history (downsampled from the well's ring buffer); only named wells are recorded
+        if not st.session_state.well_name:
+            st.caption("ℹ️ Enter a well name in Part 1 to record this well's operating history and detect anomalies.")
+        history = well_history(st.session_state.well_name) if st.session_state.well_name else None
+        if history is not None and len(history):
+            st.markdown("---")
+            st.subheader("📉 Operating History")
+            window = st.selectbox("Time window", list(HISTORY_WINDOWS), key="history_window")
+            start = time.perf_counter()
+            series = history.query(('Q', 'H'), start=history.last_time - HISTORY_WINDOWS[window])
+            st.plotly_chart(history_figure(series, st.session_state.well_name, st.session_state.rec_min,
+                                           st.session_state.rec_max), width='stretch')
+            st.caption(f"{series['raw_rows']:,} readings, {len(series['Q'][1]):,} plotted "
+                       f"({(time.perf_counter() - start) * 1000:.0f} ms)")
+        
+        # Online anomaly detection: drift, head decline, gas lock and pump off on every reading
+        detector = get_anomaly_detector()
+        detector_state = detector.state(st.session_state.well_name) if st.session_state.well_name else None
+        if detector_state is not None:
+            st.markdown("---")
+            st.subheader("🚨 Anomaly Detection")
+            col1, col2, col3, col4 = st.columns(4)
+            with col1:
+                learned = min(detector_state['count'], WARMUP_SAMPLES)
+                st.metric("Baseline", "Learned" if learned == WARMUP_SAMPLES else f"{learned:.0f}/{WARMUP_SAMPLES}")
+            with col2:
+                st.metric("Head vs Catalog",
+                          f"{st.session_state.live_H_per_stage / st.session_state.live_design_H_per_stage * 100:.1f}%",
+                          help="Measured head per stage over the catalog head at the design rate and drive speed")
+            with col3:
+                st.metric("Gas Lock", "Yes" if detector_state['gas_lock'] else "No")
+            with col4:
+                st.metric("Pump Off", "Yes" if detector_state['pump_off'] else "No")
+            events = detector.recent(st.session_state.well_name)
+            if events:
+                st.dataframe(events_table(events), width='stretch', hide_index=True)
+            else:
+                st.caption("No anomalies detected")
+
+# ==================== PART 3: FLEET MONITORING ====================
+elif page == "🛰️ Part 3: Fleet Monitoring":
+    st.header("🛰️ Part 3: Fleet Monitoring")
+    from esp_fleet import FLEET_FIELDS, read_fleet
+    st.markdown(
+        "One row per well with its latest reading: "
+        + ", ".join(f"`{field}`" for field, _ in FLEET_FIELDS)
+        + " (optional `rec_min`, `rec_max`, `frequency`, `timestamp`). Pump models found in the pump library use "
+          "their own curve, others the default ESP-3000 curve."
+    )
+    
+    fleet_source = st.radio("Fleet Data", ["Upload Fleet Table", "Watch File on Server"], horizontal=True)
+    
+    if fleet_source == "Upload Fleet Table":
+        fleet_file = st.file_uploader("Upload fleet table (CSV or Parquet)", type=['csv', 'parquet'])
+        if fleet_file is not None:
+            show_fleet_status(lambda: read_fleet(fleet_file, fleet_file.name.rsplit('.', 1)[-1].lower()))
+    else:
+        col1, col2 = st.columns([3, 1])
+        with col1:
+            fleet_path = st.text_input("Fleet table path", key="fleet_path",
+                                       placeholder="/data/scada/latest_readings.parquet")
+        with col2:
+            st.selectbox("Refresh (s)", [1.0, 5.0, 15.0, 60.0], key="fleet_refresh_s")
+        if fleet_path:
+            st.fragment(run_every=st.session_state.fleet_refresh_s)(show_fleet_status)(
+                lambda: load_fleet_file(fleet_path), lambda: datetime.fromtimestamp(os.stat(fleet_path).st_mtime))
 
 # Footer
 st.markdown("---")
@@ -1554,4 +1740,4 @@ with col2:
     st.markdown(
         "<p style='text-align: center; color: #7D8590;'>ESP Dashboard v2.0 | Enhanced with ESP Running Sheet Calculations | Built with Streamlit & Plotly</p>",
         unsafe_allow_html=True
-    )
\ No newline at end of file
+    )
\ No newline at end of file
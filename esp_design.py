@@ -0,0 +1,728 @@
+"""
+ESP design engine - the Part 1 running sheet calculation without Streamlit.
+
+Every input is treated as a NumPy array, so one call can size a single well
+from the dashboard or thousands of wells from a field table.
+
+pandas is only imported by the functions that return a table, so the
+dashboard can import the constants and live calculations at startup cheaply.
+"""
+import time
+
+import numpy as np
+
+from esp_curves import BASE_FREQUENCY, get_pump_curve, speed_ratio
+from esp_gas import GAS_LIMIT_STANDARD, gas_limit, gas_not_separated_fraction
+from esp_traverse import pressure_traverse
+from esp_viscosity import WATER_VISCOSITY, dead_oil_viscosity, live_oil_viscosity
+
+# Default pump curve data (ESP-3000) - only for reference
+DEFAULT_Q_CURVE = [
+    48.86,111.21,159.86,201.57,257.17,305.83,361.43,433.98,472.69,528.24,
+    684.46,736.78,827.12,910.52,986.38,1070.38,1145.84,1267.20,1327.36,
+    1417.91,1516.22,1626.44,1737.84,1783.25,1897.50,1973.98,2001.76,
+    2106.02,2163.58,2266.88,2363.20,2502.20,2561.76,2682.92,2794.13,
+    2898.38,3009.60,3113.86,3225.06,3336.27,3447.48,3544.79,3649.03,
+    3753.41,3829.76,3920.12,4000.33,4078.93,4177.38,4280.70,4387.16
+]
+
+DEFAULT_H_CURVE = [
+    40.27,40.51,40.76,41.01,41.25,41.33,41.63,41.87,42.12,42.24,
+    42.61,42.86,43.11,43.28,43.33,43.36,43.36,43.33,43.33,42.93,
+    42.74,42.37,42.00,41.83,41.03,40.51,40.27,39.40,38.88,38.28,
+    37.48,36.07,35.45,34.21,32.86,31.50,30.02,28.53,26.80,24.93,
+    23.10,21.37,19.30,17.66,15.68,13.95,12.10,10.24,8.06,8.06,8.89
+]
+
+# Inputs that must be filled in before a design can be calculated
+REQUIRED_FIELDS = [
+    ('bep_flow', 'BEP Flow Rate'),
+    ('rec_min', 'Recommended Min Flow'),
+    ('rec_max', 'Recommended Max Flow'),
+    ('bhp_per_stage', 'BHP per Stage'),
+    ('perf_start_depth_md', 'Perforation Start Depth (MD)'),
+    ('perf_start_depth_tvd', 'Perforation Start Depth (TVD)'),
+    ('pump_setting_depth_tvd', 'Pump Setting Depth (TVD)'),
+    ('pump_setting_depth_md', 'Pump Setting Depth (MD)'),
+    ('tubing_id', 'Tubing ID'),
+    ('target_rate', 'Target Rate'),
+    ('water_cut', 'Water Cut'),
+    ('p_wh', 'Wellhead Pressure'),
+    ('static_pressure', 'Static Pressure'),
+    ('bottom_hole_temp', 'Bottom Hole Temperature'),
+    ('water_sg', 'Water Specific Gravity'),
+    ('oil_api', 'Oil API Gravity'),
+    ('gas_sg', 'Gas Specific Gravity'),
+    ('bubble_point_pressure', 'Bubble Point Pressure'),
+    ('gas_compressibility', 'Gas Compressibility'),
+    ('gor', 'GOR'),
+    ('productivity_index', 'Productivity Index'),
+    ('pump_od', 'Pump OD'),
+    ('cable_number', 'Cable Number'),
+    ('motor_hp_nameplate', 'Motor HP'),
+    ('motor_voltage_nameplate', 'Motor Voltage'),
+    ('motor_ampere_nameplate', 'Motor Ampere'),
+    ('motor_frequency', 'Motor Frequency'),
+    ('transformer_voltage', 'Transformer Voltage'),
+    ('motor_power_factor', 'Motor Power Factor'),
+    ('motor_efficiency', 'Motor Efficiency'),
+    ('pump_efficiency', 'Pump Efficiency'),
+]
+
+# Inputs that fall back to a default when they are not supplied
+# (drive_frequency: VSD output in Hz, 0 runs the pump at the curve's rated BASE_FREQUENCY)
+OPTIONAL_FIELDS = {
+    'num_rgs_od400': 0,
+    'num_rgs_od500': 0,
+    'num_agh_od400': 0,
+    'num_agh_od500': 0,
+    'drive_frequency': 0,
+}
+
+# Keys of st.session_state.calc, in the order they are stored
+CALC_FIELDS = [
+    # Fluid properties
+    'oil_sg', 'flowing_bhp', 'rs', 'bo', 'bg', 'bow', 'fluid_sg', 'tubing_composite_sg',
+    'dead_oil_viscosity', 'oil_viscosity', 'fluid_viscosity',
+    # Production
+    'total_esp_downhole_rate', 'surface_oil_rate', 'downhole_oil_rate', 'water_prod_downhole',
+    'total_prod_gas', 'gas_in_solution', 'free_gas_volume', 'gas_prod_downhole',
+    'total_fluid_volume', 'free_gas_pct_intake', 'gas_not_separated', 'total_fluid_to_pump',
+    'free_gas_pct_first_stage', 'gas_vol_tubing', 'tubing_gor', 'total_mass_prod', 'gas_limit', 'gas_head_factor',
+    # Pressures and heads
+    'initial_pip', 'pump_intake_pressure', 'net_dynamic_lift', 'fluid_level_above_pump',
+    'h_lift', 'h_surf', 'h_friction', 'pdp_traverse',
+    # Power
+    'required_hp_startup', 'pump_bhp_normal', 'hydraulic_hp',
+    # Viscosity correction at the design point
+    'visc_flow_factor', 'visc_head_factor', 'visc_efficiency_factor',
+    # Electrical
+    'pumpup_time', 'startup_ampere', 'normal_ampere', 'voltage_drop', 'required_surface_voltage',
+    'total_system_kva', 'sea_cable_ampere', 'true_power_kw', 'cable_resistance',
+    'voltage_drop_cable', 'vstart', 'vstart_ratio',
+]
+
+# Design summary values stored next to calc
+# (gas_over_limit: more free gas reaches the first stage than the stages tolerate, so no stage count is given)
+DESIGN_FIELDS = ['n_stages', 'TDH_design', 'head_per_stage', 'gas_over_limit']
+
+# Nodal solver: head mismatch tolerance (ft) and iteration limit
+SOLVER_TOLERANCE = 0.1
+SOLVER_MAX_ITER = 50
+
+# Operating point values returned by solve_operating_point
+OPERATING_POINT_FIELDS = ['q_operating', 'head_operating', 'op_pump_intake_pressure', 'op_flowing_bhp',
+                          'op_iterations', 'op_converged']
+
+# Fixed-point passes through the gas/viscosity tables when inverting a degraded head
+LIVE_GAS_PASSES = 3
+
+# Live monitoring values returned by live_operating_point
+LIVE_FIELDS = ['live_pip', 'live_pdp', 'live_delta_p', 'live_p_gradient', 'live_stages', 'live_Q', 'live_H',
+               'live_H_per_stage', 'live_deviation', 'live_deviation_pct', 'live_deviation_bep_pct',
+               'live_frequency', 'live_bep_flow', 'live_design_H_per_stage']
+
+
+def _divide(num, den, fallback=0.0):
+    """Element-wise num / den, returning fallback wherever den is not positive"""
+    num, den, fallback = np.broadcast_arrays(num, den, fallback)
+    return np.divide(num, den, out=np.array(fallback, dtype=float), where=den > 0)
+
+
+def _read_inputs(inputs):
+    """Pull every design input out of a mapping as broadcast float arrays"""
+    names = [field for field, _ in REQUIRED_FIELDS] + list(OPTIONAL_FIELDS)
+    missing = [field for field, _ in REQUIRED_FIELDS if field not in inputs]
+    if missing:
+        raise KeyError(f"Missing design inputs: {', '.join(missing)}")
+
+    values = []
+    for name in names:
+        value = inputs[name] if name in inputs else OPTIONAL_FIELDS[name]
+        values.append(np.atleast_1d(np.asarray(value, dtype=float)))
+    return dict(zip(names, np.broadcast_arrays(*values)))
+
+
+def _stage_head(pump_curve, rate, speed, free_gas=0.0, limit=GAS_LIMIT_STANDARD, viscosity=None):
+    """
+    Head per stage at `rate` with the pump running at `speed` times its rated
+    speed (affinity laws), corrected for the liquid's kinematic viscosity
+    (cSt, None for water) and derated for the free-gas fraction entering the
+    first stage
+    """
+    rate = rate / speed
+    head_factor = 1.0
+    if viscosity is not None:
+        c_q, head_factor, _ = pump_curve.viscosity_correction().factors(rate, viscosity, speed)
+        rate = rate / c_q
+    return speed ** 2 * head_factor * pump_curve.gas_derating().head(rate, free_gas, limit)
+
+
+def _conditions_stage_head(pump_curve, rate, speed, conditions):
+    """_stage_head with the first-stage free gas, gas tolerance and viscosity from _well_conditions"""
+    return _stage_head(pump_curve, rate, speed, conditions['free_gas_pct_first_stage'] / 100,
+                       conditions['gas_limit'], conditions['fluid_viscosity'])
+
+
+def _well_conditions(x, target_rate):
+    """
+    Fluid, production and intake conditions for wells producing target_rate
+    STBD, and the head the pump must deliver (TDH) to lift it to surface.
+    """
+    water_cut = x['water_cut']
+    oil_api = x['oil_api']
+    static_pressure = x['static_pressure']
+    productivity_index = x['productivity_index']
+    bubble_point_pressure = x['bubble_point_pressure']
+    gas_sg = x['gas_sg']
+    bottom_hole_temp = x['bottom_hole_temp']
+    perf_start_depth_tvd = x['perf_start_depth_tvd']
+    pump_setting_depth_tvd = x['pump_setting_depth_tvd']
+    p_wh = x['p_wh']
+    water_sg = x['water_sg']
+    gor = x['gor']
+    gas_compressibility = x['gas_compressibility']
+
+    # ===== FLUID PROPERTIES CALCULATIONS =====
+    # Oil specific gravity
+    oil_sg = 141.5 / (131.5 + oil_api)
+
+    # Flowing bottom hole pressure
+    flowing_bhp = static_pressure - (target_rate / productivity_index)
+
+    # Rs - Solution GOR (Standing correlation)
+    rs = gas_sg * ((bubble_point_pressure / 18) *
+                   (10**(0.0125 * ((141.5/oil_sg) - 131.5)) /
+                    (10**(0.00091 * bottom_hole_temp))))**1.2048
+
+    # Bo - Oil Formation Volume Factor (Standing correlation)
+    bo = 0.972 + 0.000147 * (rs * (gas_sg/oil_sg)**0.5 + 1.25*bottom_hole_temp)**1.175
+
+    # Bow - Oil-water mix formation volume factor
+    bow = water_cut * 1/100 + (1 - water_cut/100) * bo
+
+    # Total ESP downhole rate
+    total_esp_downhole_rate = target_rate * bow
+
+    # Fluid specific gravity (composite)
+    fluid_sg = oil_sg * (1 - water_cut/100) + water_sg * water_cut/100
+
+    # Oil viscosity (Beggs-Robinson) and kinematic viscosity of the oil/water mix (cSt), water cut as a
+    # fraction as in surface_oil_rate
+    mu_dead_oil = dead_oil_viscosity(oil_api, bottom_hole_temp)
+    mu_oil = live_oil_viscosity(mu_dead_oil, rs)
+    liquid_sg = oil_sg * (1 - water_cut) + water_sg * water_cut
+    fluid_viscosity = (mu_oil * (1 - water_cut) + WATER_VISCOSITY * water_sg * water_cut) / liquid_sg
+
+    # ===== PRODUCTION DATA =====
+    # Surface oil rate
+    surface_oil_rate = (1 - water_cut) * target_rate
+
+    # Downhole oil rate
+    downhole_oil_rate = surface_oil_rate * bo
+
+    # Water production downhole
+    water_prod_downhole = water_cut * target_rate
+
+    # Total produced gas
+    total_prod_gas = (1 - water_cut/100) * target_rate * gor / 1000
+
+    # Gas in solution
+    gas_in_solution = (1 - water_cut/100) * target_rate * rs / 1000
+
+    # Free gas volume
+    free_gas_volume = total_prod_gas - gas_in_solution
+
+    # ===== PUMP INTAKE CONDITIONS =====
+    # Pump intake pressure (considering fluid column)
+    pump_intake_pressure = flowing_bhp - ((perf_start_depth_tvd - pump_setting_depth_tvd) * fluid_sg * 0.433)
+
+    # Bg at pump intake pressure
+    bg = 28.27 * gas_compressibility * (bottom_hole_temp + 460) / pump_intake_pressure
+
+    # Gas production downhole
+    gas_prod_downhole = free_gas_volume * bg
+
+    # Total fluid volume at pump intake
+    total_fluid_volume = downhole_oil_rate + water_prod_downhole + gas_prod_downhole
+
+    # Free gas percentage at pump intake
+    free_gas_pct_intake = _divide(gas_prod_downhole * 100, total_fluid_volume)
+
+    # Gas not separated by the rotary gas separators (20% behind one RGS at 80% efficiency)
+    gas_not_separated = gas_prod_downhole * gas_not_separated_fraction(
+        x['pump_od'], x['num_rgs_od400'], x['num_rgs_od500'])
+
+    # Total volume of fluid mixture ingested into pump
+    total_fluid_to_pump = gas_not_separated + downhole_oil_rate + water_prod_downhole
+
+    # Free gas percentage entering first stage
+    free_gas_pct_first_stage = _divide(gas_not_separated * 100, total_fluid_to_pump)
+
+    # Free gas the stages tolerate before surging (raised by gas handlers)
+    gas_tolerance = gas_limit(x['pump_od'], x['num_agh_od400'], x['num_agh_od500'])
+
+    # Gas volume entering tubing
+    gas_vol_tubing = gas_in_solution + (gas_not_separated / bg)
+
+    # Tubing GOR
+    tubing_gor = _divide(gas_vol_tubing * 1000, surface_oil_rate)
+
+    # Total mass of produced fluid
+    total_mass_prod = ((surface_oil_rate * oil_sg + water_prod_downhole * water_sg) * 62.4 * 5.615 +
+                       tubing_gor * surface_oil_rate * gas_sg * 0.0752)
+
+    # Inside tubing composite specific gravity
+    tubing_composite_sg = _divide(total_mass_prod, total_fluid_to_pump * 5.615 * 62.4, fluid_sg)
+
+    # ===== TDH WITH INTAKE CONDITIONS =====
+    # Net dynamic lift
+    net_dynamic_lift = pump_setting_depth_tvd - (pump_intake_pressure / (0.433 * fluid_sg))
+
+    # Fluid level above pump intake
+    fluid_level_above_pump = pump_intake_pressure / (0.433 * fluid_sg)
+
+    # Surface pressure head inside the tubing
+    h_surf = p_wh / (0.433 * tubing_composite_sg)
+
+    # Total dynamic head
+    TDH_design = net_dynamic_lift + h_surf
+
+    return {
+        'oil_sg': oil_sg,
+        'flowing_bhp': flowing_bhp,
+        'rs': rs,
+        'bo': bo,
+        'bg': bg,
+        'bow': bow,
+        'fluid_sg': fluid_sg,
+        'tubing_composite_sg': tubing_composite_sg,
+        'dead_oil_viscosity': mu_dead_oil,
+        'oil_viscosity': mu_oil,
+        'fluid_viscosity': fluid_viscosity,
+        'total_esp_downhole_rate': total_esp_downhole_rate,
+        'surface_oil_rate': surface_oil_rate,
+        'downhole_oil_rate': downhole_oil_rate,
+        'water_prod_downhole': water_prod_downhole,
+        'total_prod_gas': total_prod_gas,
+        'gas_in_solution': gas_in_solution,
+        'free_gas_volume': free_gas_volume,
+        'gas_prod_downhole': gas_prod_downhole,
+        'total_fluid_volume': total_fluid_volume,
+        'free_gas_pct_intake': free_gas_pct_intake,
+        'gas_not_separated': gas_not_separated,
+        'total_fluid_to_pump': total_fluid_to_pump,
+        'free_gas_pct_first_stage': free_gas_pct_first_stage,
+        'gas_limit': gas_tolerance,
+        'gas_vol_tubing': gas_vol_tubing,
+        'tubing_gor': tubing_gor,
+        'total_mass_prod': total_mass_prod,
+        'pump_intake_pressure': pump_intake_pressure,
+        'net_dynamic_lift': net_dynamic_lift,
+        'fluid_level_above_pump': fluid_level_above_pump,
+        'h_lift': net_dynamic_lift,
+        'h_surf': h_surf,
+        'TDH_design': TDH_design,
+    }
+
+
+def compute_esp_design(inputs, q_curve=DEFAULT_Q_CURVE, h_curve=DEFAULT_H_CURVE, pump_curve=None):
+    """
+    Run the complete ESP design calculation for one or many wells.
+
+    `inputs` maps every name in REQUIRED_FIELDS (and optionally OPTIONAL_FIELDS)
+    to a scalar or array - a dict, a DataFrame or anything else indexable by
+    field name. `q_curve`/`h_curve` are the single-stage pump curve; pass an
+    already built PumpCurve as `pump_curve` to skip the curve cache lookup.
+
+    The curve is rated at BASE_FREQUENCY and the motor at its nameplate
+    motor_frequency. A drive_frequency scales head per stage with the pump
+    speed squared and BHP per stage with it cubed, and the motor's available HP
+    and voltage linearly with drive_frequency / motor_frequency; without one
+    the pump runs at BASE_FREQUENCY and the motor at its nameplate. Head per
+    stage is derated for the free gas left after the gas separators, against
+    the tolerance of the gas handler configuration (see esp_gas), and head and
+    BHP per stage are corrected for the oil viscosity (see esp_viscosity).
+    Wells whose first-stage free gas is past that tolerance are infeasible:
+    the stages would surge and gas-lock, so they get no stage count (NA) and
+    gas_over_limit True.
+
+    Returns a DataFrame with one row per well holding CALC_FIELDS followed by
+    DESIGN_FIELDS. A DataFrame input keeps its index.
+    """
+    x = _read_inputs(inputs)
+
+    target_rate = x['target_rate']
+    static_pressure = x['static_pressure']
+    bottom_hole_temp = x['bottom_hole_temp']
+    perf_start_depth_tvd = x['perf_start_depth_tvd']
+    pump_setting_depth_tvd = x['pump_setting_depth_tvd']
+    pump_setting_depth_md = x['pump_setting_depth_md']
+    tubing_id = x['tubing_id']
+    motor_ampere_nameplate = x['motor_ampere_nameplate']
+    motor_hp_nameplate = x['motor_hp_nameplate']
+    motor_voltage_nameplate = x['motor_voltage_nameplate']
+    cable_number = x['cable_number']
+    transformer_voltage = x['transformer_voltage']
+    motor_power_factor = x['motor_power_factor']
+    motor_efficiency = x['motor_efficiency']
+    bhp_per_stage = x['bhp_per_stage']
+    pump_od = x['pump_od']
+    num_rgs_od400 = x['num_rgs_od400']
+    num_rgs_od500 = x['num_rgs_od500']
+    num_agh_od400 = x['num_agh_od400']
+    num_agh_od500 = x['num_agh_od500']
+
+    # Pump speed relative to the curve's rated frequency, motor speed relative to its nameplate frequency
+    speed = speed_ratio(x['drive_frequency'])
+    motor_speed = speed_ratio(x['drive_frequency'], np.where(x['motor_frequency'] > 0, x['motor_frequency'], np.nan))
+    bhp_per_stage = bhp_per_stage * speed ** 3
+    motor_hp_nameplate = motor_hp_nameplate * motor_speed
+    motor_voltage_nameplate = motor_voltage_nameplate * motor_speed
+
+    if pump_curve is None:
+        pump_curve = get_pump_curve(q_curve, h_curve)
+
+    # ===== WELL, FLUID AND INTAKE CONDITIONS AT THE TARGET RATE =====
+    results = _well_conditions(x, target_rate)
+    fluid_sg = results['fluid_sg']
+    tubing_composite_sg = results['tubing_composite_sg']
+    total_esp_downhole_rate = results['total_esp_downhole_rate']
+    TDH_design = results['TDH_design']
+
+    # ===== HEAD CALCULATION (INITIAL) =====
+    # Initial pump intake pressure (assuming no drawdown initially)
+    initial_pip = static_pressure - ((perf_start_depth_tvd - pump_setting_depth_tvd) * 0.433)
+
+    # Multiphase pressure traverse of the tubing: friction loss and pump discharge pressure
+    traverse = pressure_traverse(x, target_rate, results['rs'])
+    h_friction = traverse['h_friction']
+
+    # Get head per stage at target rate (drive frequency, viscosity and first-stage free gas)
+    head_per_stage = _conditions_stage_head(pump_curve, target_rate, speed, results)
+    visc_flow_factor, visc_head_factor, visc_efficiency_factor = pump_curve.viscosity_correction().factors(
+        target_rate / speed, results['fluid_viscosity'], speed)
+    gas_head_factor = pump_curve.gas_derating().factor(target_rate / speed / visc_flow_factor,
+                                                       results['free_gas_pct_first_stage'] / 100,
+                                                       results['gas_limit'])
+
+    # Viscous BHP: C_Q * C_H / C_eta of the water BHP
+    bhp_per_stage = bhp_per_stage * visc_flow_factor * visc_head_factor / visc_efficiency_factor
+
+    # Estimated number of stages (NaN where an input is missing, no positive head is needed or delivered,
+    # or the free gas gas-locks the stages: more stages of a token head would not make that design work)
+    gas_over_limit = results['free_gas_pct_first_stage'] / 100 > results['gas_limit']
+    with np.errstate(divide='ignore', invalid='ignore'):
+        n_stages = np.ceil(TDH_design / head_per_stage)
+    n_stages = np.where(np.isfinite(n_stages) & (n_stages >= 1) & ~gas_over_limit, n_stages, np.nan)
+
+    # ===== HORSEPOWER CALCULATIONS =====
+    # Required HP at first startup
+    required_hp_startup = np.where(
+        pump_od == 4,
+        (n_stages * bhp_per_stage) + (4.5 * num_rgs_od400 / 1.2) + (30 * num_agh_od400),
+        (n_stages * bhp_per_stage + num_rgs_od500 * 11/1.2 + num_agh_od500 * 30),
+    )
+
+    # Pump brake horsepower (normal operation)
+    pump_bhp_normal = bhp_per_stage * n_stages * tubing_composite_sg
+
+    # Hydraulic horsepower
+    hydraulic_hp = total_esp_downhole_rate * 0.02917 * TDH_design * fluid_sg / 3960
+
+    # ===== ELECTRICAL CALCULATIONS =====
+    # Pump-up time (no check valve)
+    pumpup_time = _divide((tubing_id**2 / 1029.4) * (pump_setting_depth_md - (initial_pip / 0.433)),
+                          total_esp_downhole_rate / 1440)
+
+    # Startup working ampere
+    startup_ampere = _divide(motor_ampere_nameplate * required_hp_startup, motor_hp_nameplate)
+
+    # Normal working ampere
+    normal_ampere = _divide(motor_ampere_nameplate * pump_bhp_normal, motor_hp_nameplate)
+
+    # Voltage drop
+    temp_factor = ((bottom_hole_temp - 60) * 0.002) + 1
+    voltage_drop = np.where(
+        cable_number == 1,
+        ((0.22077 * startup_ampere - 0.4661) * pump_setting_depth_md / 1000) * temp_factor,
+        ((0.27423 * normal_ampere - 0.49627) * pump_setting_depth_md / 1000) * temp_factor,
+    )
+
+    # Required surface voltage
+    required_surface_voltage = voltage_drop + motor_voltage_nameplate
+
+    # Total system KVA
+    total_system_kva = required_surface_voltage * motor_ampere_nameplate * 1.73 / 1000
+
+    # Sea cable ampere
+    sea_cable_ampere = _divide(required_surface_voltage * normal_ampere, transformer_voltage)
+
+    # True power (kW)
+    true_power_kw = total_system_kva * motor_power_factor * motor_efficiency
+
+    # Cable resistance at downhole temp
+    cable_resistance = np.where(
+        cable_number == 2,
+        (pump_setting_depth_md * 0.169 / 1000) * (1 + 0.00214 * (bottom_hole_temp - 77)),
+        (pump_setting_depth_md * 0.134 / 1000) * (1 + 0.00214 * (bottom_hole_temp - 77)),
+    )
+
+    # Voltage drop across cable
+    voltage_drop_cable = 1.732 * cable_resistance * normal_ampere
+
+    # Voltage at motor terminals during startup
+    vstart = motor_voltage_nameplate - 4 * startup_ampere * cable_resistance
+
+    # Vstart / Vnameplate ratio
+    vstart_ratio = _divide(vstart, motor_voltage_nameplate)
+
+    results.update({
+        # Pressures and heads
+        'initial_pip': initial_pip,
+        'h_friction': h_friction,
+        'pdp_traverse': traverse['pdp'],
+
+        # Power
+        'required_hp_startup': required_hp_startup,
+        'pump_bhp_normal': pump_bhp_normal,
+        'hydraulic_hp': hydraulic_hp,
+
+        # Viscosity correction
+        'visc_flow_factor': visc_flow_factor,
+        'visc_head_factor': visc_head_factor,
+        'visc_efficiency_factor': visc_efficiency_factor,
+
+        # Electrical
+        'pumpup_time': pumpup_time,
+        'startup_ampere': startup_ampere,
+        'normal_ampere': normal_ampere,
+        'voltage_drop': voltage_drop,
+        'required_surface_voltage': required_surface_voltage,
+        'total_system_kva': total_system_kva,
+        'sea_cable_ampere': sea_cable_ampere,
+        'true_power_kw': true_power_kw,
+        'cable_resistance': cable_resistance,
+        'voltage_drop_cable': voltage_drop_cable,
+        'vstart': vstart,
+        'vstart_ratio': vstart_ratio,
+
+        # Design summary
+        'n_stages': n_stages,
+        'head_per_stage': head_per_stage,
+        'gas_head_factor': gas_head_factor,
+        'gas_over_limit': gas_over_limit,
+    })
+
+    import pandas as pd
+    index = inputs.index if isinstance(inputs, pd.DataFrame) else None
+    columns = {name: results[name] for name in CALC_FIELDS + DESIGN_FIELDS}
+    columns['n_stages'] = pd.array(columns['n_stages']).astype('Int64')
+    return pd.DataFrame(columns, index=index)
+
+
+def system_curve(h_lift, h_surf, h_friction):
+    """
+    Required TDH (ft) over a flow grid: lift and surface pressure head plus
+    the tubing friction at each flow (see friction_curve).
+
+    Everything broadcasts, so well parameters passed as column vectors
+    (shape (n_wells, 1)) against an (n_wells, n_flows) friction give one curve
+    per row.
+    """
+    return h_lift + h_surf + np.asarray(h_friction, dtype=float)
+
+
+def friction_curve(inputs, q_range):
+    """
+    Tubing friction loss (ft) of every well at every flow of q_range (bpd)
+    from the multiphase pressure traverse: shape (n_wells, len(q_range)).
+    """
+    x = _read_inputs(inputs)
+    q_range = np.asarray(q_range, dtype=float)
+    rate = np.broadcast_to(q_range, (len(x['target_rate']),) + q_range.shape)
+    return pressure_traverse(x, rate, _well_conditions(x, x['target_rate'])['rs'])['h_friction']
+
+
+def pump_head_curves(h_single_stage, n_stages):
+    """Full-pump head for one or several stage counts: one row per stage count"""
+    return np.multiply.outer(np.atleast_1d(n_stages), np.asarray(h_single_stage, dtype=float))
+
+
+def _subset(x, rows):
+    """Select the given rows of every input array"""
+    return {name: values[rows] for name, values in x.items()}
+
+
+def _head_mismatch(x, rate, pump_curve):
+    """
+    Installed pump head minus system head at `rate`: the intake (and the free
+    gas reaching the pump) is re-evaluated there, plus the tubing friction
+    from the pressure traverse
+    """
+    conditions = _well_conditions(x, rate)
+    friction = pressure_traverse(x, rate, conditions['rs'])['h_friction']
+    pump_head = x['n_stages'] * _conditions_stage_head(pump_curve, rate, x['speed'], conditions)
+    return pump_head - (conditions['TDH_design'] + friction)
+
+
+def solve_operating_point(inputs, n_stages, q_curve=DEFAULT_Q_CURVE, h_curve=DEFAULT_H_CURVE, pump_curve=None,
+                          tol=SOLVER_TOLERANCE, max_iter=SOLVER_MAX_ITER):
+    """
+    Find the flow where the installed pump meets the system curve for every well.
+
+    The system curve combines the IPR drawdown, the hydrostatic lift with PVT
+    and gas re-evaluated at the intake pressure of each trial flow, the
+    surface pressure head and tubing friction. `n_stages` is the installed
+    stage count (scalar or one per well).
+
+    Each well runs a safeguarded Newton iteration: a Newton step from a
+    numerical derivative, falling back to bisection whenever the step leaves
+    the bracket between zero flow and the smaller of the last curve point and
+    the rate that draws the intake down to zero. A well stops iterating as soon
+    as its head mismatch is below `tol` ft.
+
+    Returns a DataFrame of OPERATING_POINT_FIELDS, one row per well. Wells with
+    no crossing inside the bracket are reported at the bracket end with
+    op_converged False. Iteration counts and wall time for the whole solve are
+    in result.attrs['solver'].
+    """
+    start = time.perf_counter()
+    x = _read_inputs(inputs)
+    if pump_curve is None:
+        pump_curve = get_pump_curve(q_curve, h_curve)
+    n_wells = len(x['target_rate'])
+    if hasattr(n_stages, 'to_numpy'):
+        n_stages = n_stages.to_numpy(dtype=float, na_value=np.nan)
+    x['n_stages'] = np.broadcast_to(np.asarray(n_stages, dtype=float), (n_wells,)).copy()
+    x['speed'] = speed_ratio(x['drive_frequency'])
+
+    def mismatch(xs, rate):
+        return _head_mismatch(xs, rate, pump_curve)
+
+    # Bracket: the pump must deliver some flow, and cannot draw the intake below zero
+    lo = np.full(n_wells, 1.0)
+    fluid_sg = _well_conditions(x, lo)['fluid_sg']
+    q_drawdown = x['productivity_index'] * (
+        x['static_pressure'] - (x['perf_start_depth_tvd'] - x['pump_setting_depth_tvd']) * fluid_sg * 0.433)
+    hi = np.minimum(pump_curve.q.max() * x['speed'], 0.999 * q_drawdown)
+    f_lo = mismatch(x, lo)
+    f_hi = mismatch(x, hi)
+    bracketed = (f_lo > 0) & (f_hi < 0) & (hi > lo)
+
+    # Start from the secant between the bracket ends
+    q = np.where(f_lo <= 0, lo, hi)
+    q[bracketed] = (lo - f_lo * (hi - lo) / (f_hi - f_lo))[bracketed]
+    iterations = np.zeros(n_wells, dtype=int)
+    converged = np.zeros(n_wells, dtype=bool)
+
+    active = np.flatnonzero(bracketed)
+    for _ in range(max_iter):
+        if active.size == 0:
+            break
+        xs = _subset(x, active)
+        q_active = q[active]
+        f = mismatch(xs, q_active)
+        iterations[active] += 1
+
+        done = np.abs(f) < tol
+        converged[active[done]] = True
+
+        # Pump head falls and system head rises with flow, so f > 0 means the root is above q
+        lo[active] = np.where(f > 0, q_active, lo[active])
+        hi[active] = np.where(f > 0, hi[active], q_active)
+
+        dq = 1e-4 * np.maximum(q_active, 1.0)
+        slope = (mismatch(xs, q_active + dq) - f) / dq
+        with np.errstate(divide='ignore', invalid='ignore'):
+            q_next = q_active - f / slope
+        outside = ~np.isfinite(q_next) | (q_next <= lo[active]) | (q_next >= hi[active])
+        q_next = np.where(outside, 0.5 * (lo[active] + hi[active]), q_next)
+
+        q[active[~done]] = q_next[~done]
+        active = active[~done]
+
+    conditions = _well_conditions(x, q)
+    import pandas as pd
+    result = pd.DataFrame({
+        'q_operating': q,
+        'head_operating': x['n_stages'] * _conditions_stage_head(pump_curve, q, x['speed'], conditions),
+        'op_pump_intake_pressure': conditions['pump_intake_pressure'],
+        'op_flowing_bhp': conditions['flowing_bhp'],
+        'op_iterations': iterations,
+        'op_converged': converged,
+    }, index=inputs.index if isinstance(inputs, pd.DataFrame) else None)
+    result.attrs['solver'] = {
+        'wells': n_wells,
+        'converged': int(converged.sum()),
+        'max_iterations': int(iterations.max()) if n_wells else 0,
+        'mean_iterations': float(iterations.mean()) if n_wells else 0.0,
+        'elapsed_ms': (time.perf_counter() - start) * 1000,
+    }
+    return result
+
+
+def live_operating_point(pip, pdp, p_gradient, actual_stages, pump_curve, target_rate, bep_flow, frequency=None,
+                         free_gas=0.0, gas_tolerance=GAS_LIMIT_STANDARD, viscosity=None):
+    """
+    Operating point from measured pump intake/discharge pressures (Part 2).
+
+    The differential pressure over the tubing fluid gradient is the head the
+    running stages deliver; the pump curve's inverse turns the head per stage
+    into a flow. On a variable-speed drive pass the drive `frequency` (Hz):
+    the curve and BEP are scaled to that speed, otherwise the pump runs at
+    BASE_FREQUENCY. With free gas entering the first stage (`free_gas` as a
+    fraction, e.g. the design's free_gas_pct_first_stage / 100) the measured
+    head is un-derated before the inverse lookup; with a liquid `viscosity`
+    (cSt, e.g. the design's fluid_viscosity) the water-curve flow is corrected
+    to the viscous one. live_design_H_per_stage is the catalog head per stage
+    at the design rate and drive speed, the reference for head degradation.
+    Inputs may be scalars or arrays of samples. Returns a dict keyed by
+    LIVE_FIELDS.
+    """
+    delta_p = pdp - pip
+    h_per_stage = delta_p / p_gradient / actual_stages
+    speed = speed_ratio(frequency)
+    h_rated = h_per_stage / speed ** 2
+    q_rated = pump_curve.flow(h_rated)
+    flow_factor = 1.0
+    if np.any(free_gas) or viscosity is not None:
+        # The head factors vary slowly with flow: a few fixed-point passes through the tables
+        derating = pump_curve.gas_derating()
+        for _ in range(LIVE_GAS_PASSES):
+            factor = derating.factor(q_rated, free_gas, gas_tolerance)
+            if viscosity is not None:
+                flow_factor, head_factor, _ = pump_curve.viscosity_correction().water_factors(
+                    q_rated, viscosity, speed)
+                factor = factor * head_factor
+            q_rated = pump_curve.flow(h_rated / factor)
+    q = speed * flow_factor * q_rated
+    q = q.item() if np.ndim(q) == 0 else q
+    bep_flow = speed * bep_flow
+    deviation = q - target_rate
+    return {
+        'live_pip': pip,
+        'live_pdp': pdp,
+        'live_delta_p': delta_p,
+        'live_p_gradient': p_gradient,
+        'live_stages': actual_stages,
+        'live_Q': q,
+        'live_H': h_per_stage * actual_stages,
+        'live_H_per_stage': h_per_stage,
+        'live_deviation': deviation,
+        'live_deviation_pct': deviation / target_rate * 100,
+        'live_deviation_bep_pct': (q - bep_flow) / bep_flow * 100,
+        'live_frequency': speed * BASE_FREQUENCY,
+        'live_bep_flow': bep_flow,
+        'live_design_H_per_stage': speed ** 2 * pump_curve.head(target_rate / speed),
+    }
+
+
+def drive_frequency(pip, pdp, p_gradient, actual_stages, pump_curve, flow):
+    """
+    Drive frequency (Hz) at which the running stages deliver the measured
+    pressure rise at a known flow (e.g. a surface flow meter); NaN when no
+    frequency in the curve family's range fits.
+    """
+    h_per_stage = (pdp - pip) / p_gradient / actual_stages
+    return pump_curve.family().frequency(flow, h_per_stage)
@@ -0,0 +1,152 @@
+"""
+Fleet monitoring.
+
+fleet_status takes the latest PIP/PDP reading of every well in a fleet table
+and computes the live operating point of all of them with one vectorized
+live_operating_point call per pump model.
+
+Usage:
+    python esp_fleet.py fleet_readings.csv --library pump_library/
+"""
+import argparse
+import os
+import time
+
+import numpy as np
+import pandas as pd
+
+from esp_curves import BASE_FREQUENCY, get_pump_curve, speed_ratio
+from esp_design import DEFAULT_Q_CURVE, DEFAULT_H_CURVE, live_operating_point
+from esp_library import PumpLibrary
+from esp_selection import DEFAULT_REC_MIN_RATIO, DEFAULT_REC_MAX_RATIO
+
+# Columns of a fleet table: one row per well with its design and latest reading
+FLEET_FIELDS = [
+    ('well_name', 'Well Name'),
+    ('pump_model', 'Pump Model'),
+    ('stages', 'Stages Operating'),
+    ('target_rate', 'Design Rate (bpd)'),
+    ('bep_flow', 'BEP Flow (bpd)'),
+    ('p_gradient', 'Tubing Fluid Pressure Gradient (psi/ft)'),
+    ('pip', 'Pump Intake Pressure (psi)'),
+    ('pdp', 'Pump Discharge Pressure (psi)'),
+]
+
+# Optional columns; missing ranges default to 80-120% of BEP, a missing drive frequency to the rated one
+OPTIONAL_FLEET_FIELDS = ['rec_min', 'rec_max', 'frequency', 'timestamp']
+
+STATUS_ORDER = ['NO DATA', 'LOW FLOW', 'HIGH FLOW', 'OPTIMAL']
+
+
+def read_fleet(source, fmt=None):
+    """Fleet table from a CSV or Parquet path (or file-like object with fmt)"""
+    fmt = fmt or os.path.splitext(str(source))[1].lstrip('.').lower()
+    if fmt == 'csv':
+        return pd.read_csv(source)
+    if fmt == 'parquet':
+        return pd.read_parquet(source)
+    raise ValueError(f"Unsupported fleet table format '{fmt}' (use .csv or .parquet)")
+
+
+def fleet_status(fleet, pump_curves=None):
+    """
+    Live operating point and status for every well of a fleet table.
+
+    `pump_curves` maps a pump model to its PumpCurve (a dict, or any object
+    with `in` and `pump_curve(model)` such as PumpLibrary); models it does not
+    know use the default ESP-3000 curve. Wells on a variable-speed drive give
+    their `frequency`; curves, BEP and recommended range are scaled to it.
+    Rows come back in the fleet's order with Q, head per stage (measured and
+    the catalog's at the design rate), deviation vs design and BEP, in-range
+    flag and a status of OPTIMAL, LOW FLOW, HIGH FLOW or NO DATA (no flow or
+    no recommended range).
+    """
+    missing = [field for field, _ in FLEET_FIELDS if field not in fleet.columns and field != 'pump_model']
+    if missing:
+        raise ValueError(f"Fleet table is missing columns: {', '.join(missing)}")
+
+    def column(name):
+        return pd.to_numeric(fleet[name], errors='coerce').to_numpy(dtype=np.float64)
+
+    n_wells = len(fleet)
+    pip, pdp, p_gradient = column('pip'), column('pdp'), column('p_gradient')
+    stages = column('stages')
+    target_rate = column('target_rate')
+    bep_flow = column('bep_flow')
+    rec_min = column('rec_min') if 'rec_min' in fleet.columns else np.full(n_wells, np.nan)
+    rec_min = np.where(np.isnan(rec_min), DEFAULT_REC_MIN_RATIO * bep_flow, rec_min)
+    rec_max = column('rec_max') if 'rec_max' in fleet.columns else np.full(n_wells, np.nan)
+    rec_max = np.where(np.isnan(rec_max), DEFAULT_REC_MAX_RATIO * bep_flow, rec_max)
+    frequency = column('frequency') if 'frequency' in fleet.columns else np.full(n_wells, BASE_FREQUENCY)
+    speed = speed_ratio(frequency)
+    rec_min, rec_max = rec_min * speed, rec_max * speed
+
+    models = (fleet['pump_model'].fillna('').astype(str) if 'pump_model' in fleet.columns
+              else pd.Series('', index=fleet.index))
+    default_curve = get_pump_curve(DEFAULT_Q_CURVE, DEFAULT_H_CURVE)
+
+    results = {name: np.full(n_wells, np.nan) for name in
+               ('live_Q', 'live_H', 'live_H_per_stage', 'live_delta_p', 'live_deviation_pct',
+                'live_deviation_bep_pct', 'live_design_H_per_stage')}
+    with np.errstate(divide='ignore', invalid='ignore'):
+        for model, rows in models.groupby(models.to_numpy()).indices.items():
+            if pump_curves is not None and model in pump_curves:
+                curve = pump_curves[model] if isinstance(pump_curves, dict) else pump_curves.pump_curve(model)
+            else:
+                curve = default_curve
+            point = live_operating_point(pip[rows], pdp[rows], p_gradient[rows], stages[rows], curve,
+                                         target_rate[rows], bep_flow[rows], frequency[rows])
+            for name in results:
+                results[name][rows] = point[name]
+
+    q = results['live_Q']
+    # Without a recommended range (no BEP flow or rec_min/rec_max) a well cannot be rated
+    has_data = np.isfinite(q) & np.isfinite(rec_min) & np.isfinite(rec_max)
+    status = np.select([~has_data, q < rec_min, q > rec_max], STATUS_ORDER[:3], STATUS_ORDER[3])
+
+    status_frame = pd.DataFrame({
+        'well_name': fleet['well_name'].to_numpy(),
+        'pump_model': models.to_numpy(),
+        'status': pd.Categorical(status, categories=STATUS_ORDER, ordered=True),
+        'Q': q,
+        'target_rate': target_rate,
+        'deviation_pct': results['live_deviation_pct'],
+        'deviation_bep_pct': results['live_deviation_bep_pct'],
+        'rec_min': rec_min,
+        'rec_max': rec_max,
+        'in_range': has_data & (rec_min <= q) & (q <= rec_max),
+        'H': results['live_H'],
+        'H_per_stage': results['live_H_per_stage'],
+        'design_H_per_stage': results['live_design_H_per_stage'],
+        'delta_p': results['live_delta_p'],
+        'pip': pip,
+        'stages': stages,
+        'frequency': speed * BASE_FREQUENCY,
+    }, index=fleet.index)
+    if 'timestamp' in fleet.columns:
+        status_frame['timestamp'] = fleet['timestamp'].to_numpy()
+    return status_frame
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Live operating point and status for every well in a fleet")
+    parser.add_argument('fleet', help="Fleet table (.csv or .parquet), one row per well with its latest reading")
+    parser.add_argument('--library', default=None, help="Pump library directory for the pump_model curves")
+    parser.add_argument('--output', help="Write the status table to this CSV/Parquet file")
+    args = parser.parse_args(argv)
+
+    fleet = read_fleet(args.fleet)
+    start = time.perf_counter()
+    status = fleet_status(fleet, PumpLibrary(args.library))
+    elapsed = (time.perf_counter() - start) * 1000
+    if args.output:
+        if args.output.endswith('.parquet'):
+            status.to_parquet(args.output, index=False)
+        else:
+            status.to_csv(args.output, index=False)
+    print(status['status'].value_counts().sort_index().to_string())
+    print(f"{len(status)} wells in {elapsed:.0f} ms")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,106 @@
+"""
+Free-gas handling and head degradation.
+
+Gas reaching the pump is what the intake separators leave behind: each rotary
+gas separator (RGS) removes RGS_EFFICIENCY of the free gas still in the
+stream. Stages tolerate a free-gas fraction up to a limit that advanced gas
+handlers (AGH) raise; below it head falls off gradually, past it the stages
+surge and gas-lock.
+
+The derating is tabulated per pump curve as a head factor on a grid of gas
+ratio (free-gas fraction over the tolerance limit) x flow, built once per
+curve. Low flows degrade sooner, relative to the curve's power_peak_flow.
+Lookups are bilinear index arithmetic (table_lookup).
+"""
+import numpy as np
+
+# Fraction of the remaining free gas removed by each rotary gas separator
+RGS_EFFICIENCY = 0.8
+
+# Free-gas fraction a standard stage tolerates, the rise per gas handler and the cap
+GAS_LIMIT_STANDARD = 0.10
+GAS_LIMIT_PER_AGH = 0.15
+GAS_LIMIT_MAX = 0.45
+
+# Head factor at the tolerance limit, and the gas ratio at which the stages gas-lock
+HEAD_FACTOR_AT_LIMIT = 0.8
+GAS_LOCK_RATIO = 1.5
+
+# Floor of the head factor: gas-locked stages keep a token head so curve inverses stay finite
+# (designs are not sized past the tolerance limit at all, see esp_design.compute_esp_design)
+MIN_HEAD_FACTOR = 0.05
+
+# Extra gas sensitivity at shut-in relative to the flow of maximum hydraulic power
+LOW_FLOW_SENSITIVITY = 0.5
+
+# Points of the derating table (gas ratio x flow)
+GAS_TABLE_RATIOS = 151
+GAS_TABLE_FLOWS = 256
+
+
+def _by_pump_od(pump_od, count_od400, count_od500):
+    """Equipment count for the pump's OD series (4" uses the OD400 count, anything else OD500)"""
+    return np.where(np.asarray(pump_od) == 4, count_od400, count_od500)
+
+
+def gas_not_separated_fraction(pump_od, num_rgs_od400, num_rgs_od500):
+    """Fraction of the free gas at the intake that enters the first stage"""
+    n_rgs = np.maximum(_by_pump_od(pump_od, num_rgs_od400, num_rgs_od500), 0)
+    return (1 - RGS_EFFICIENCY) ** n_rgs
+
+
+def gas_limit(pump_od, num_agh_od400, num_agh_od500):
+    """Free-gas fraction the stages tolerate before surging, raised by gas handlers"""
+    n_agh = np.maximum(_by_pump_od(pump_od, num_agh_od400, num_agh_od500), 0)
+    return np.minimum(GAS_LIMIT_STANDARD + GAS_LIMIT_PER_AGH * n_agh, GAS_LIMIT_MAX)
+
+
+def table_lookup(table, row, column):
+    """Bilinear interpolation of a 2D table at fractional (row, column) positions; NaN positions read row/column 0"""
+    n_rows, n_columns = table.shape
+    row = np.clip(np.where(np.isnan(row), 0, row), 0, n_rows - 1)
+    column = np.clip(np.where(np.isnan(column), 0, column), 0, n_columns - 1)
+    i = np.minimum(row.astype(np.int64), n_rows - 2)
+    j = np.minimum(column.astype(np.int64), n_columns - 2)
+    di, dj = row - i, column - j
+    value = ((1 - di) * ((1 - dj) * table[i, j] + dj * table[i, j + 1])
+             + di * ((1 - dj) * table[i + 1, j] + dj * table[i + 1, j + 1]))
+    return value if value.ndim else value[()]
+
+
+def head_factor(ratio):
+    """Head factor at an effective gas ratio (free-gas fraction / tolerance limit)"""
+    ratio = np.maximum(np.asarray(ratio, dtype=np.float64), 0)
+    gradual = 1 - (1 - HEAD_FACTOR_AT_LIMIT) * ratio ** 2
+    surging = HEAD_FACTOR_AT_LIMIT * (GAS_LOCK_RATIO - ratio) / (GAS_LOCK_RATIO - 1)
+    return np.clip(np.where(ratio <= 1, gradual, surging), MIN_HEAD_FACTOR, 1)
+
+
+class GasDerating:
+    """Head factor of one PumpCurve on a gas ratio x flow grid"""
+
+    def __init__(self, curve, n_ratios=GAS_TABLE_RATIOS, n_flows=GAS_TABLE_FLOWS):
+        self.curve = curve
+        self.q_max = float(curve.q.max())
+
+        self.ratios = np.linspace(0, GAS_LOCK_RATIO, n_ratios)
+        self.flows = np.linspace(0, self.q_max, n_flows)
+        sensitivity = 1 + LOW_FLOW_SENSITIVITY * np.maximum(1 - self.flows / curve.power_peak_flow, 0)
+        self.table = head_factor(np.multiply.outer(self.ratios, sensitivity))
+        for values in (self.ratios, self.flows, self.table):
+            values.flags.writeable = False
+
+    def factor(self, q, free_gas, limit=GAS_LIMIT_STANDARD):
+        """
+        Head factor at flow q (bpd) with a free-gas fraction (0-1) entering the
+        first stage and a tolerance limit. Scalars or arrays.
+        """
+        q, free_gas, limit = np.broadcast_arrays(*(np.asarray(v, dtype=np.float64) for v in (q, free_gas, limit)))
+        n_ratios, n_flows = self.table.shape
+        with np.errstate(divide='ignore', invalid='ignore'):
+            row = free_gas / limit / self.ratios[-1] * (n_ratios - 1)
+        return table_lookup(self.table, row, q / self.q_max * (n_flows - 1))
+
+    def head(self, q, free_gas, limit=GAS_LIMIT_STANDARD):
+        """Degraded head per stage (ft) at flow q (bpd)"""
+        return self.factor(q, free_gas, limit) * self.curve.head(q)
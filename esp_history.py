@@ -0,0 +1,331 @@
+"""
+Time-series store for live operating points.
+
+Each well keeps an append-only ring buffer of its readings (one NumPy array
+per field) in memory. New rows are flushed to disk as small Parquet segments
+under <history dir>/<well>/, which are merged into one file once there are
+too many of them, so the on-disk history is bounded by the same capacity as
+the ring buffer. Readings are kept in time order (late ones are skipped) and
+stored as epoch seconds; queries return naive local datetimes, the same clock
+as the datetime.now() stamps of live readings.
+
+History queries downsample with MinMax-LTTB: a vectorized min/max pass picks
+candidate points and Largest-Triangle-Three-Buckets keeps the ones that
+preserve the shape of the trend, so a month of 1 Hz data plots as ~2000 points.
+"""
+import atexit
+import os
+import threading
+import time
+from urllib.parse import quote, unquote
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+from dateutil.tz import tzlocal
+
+# Stored fields: epoch seconds plus the operating point values
+HISTORY_FIELDS = ['timestamp', 'pip', 'pdp', 'Q', 'H', 'deviation_bep_pct']
+
+# Live operating point keys (LIVE_FIELDS in esp_design) stored for each field
+POINT_FIELDS = {'pip': 'live_pip', 'pdp': 'live_pdp', 'Q': 'live_Q', 'H': 'live_H',
+                'deviation_bep_pct': 'live_deviation_bep_pct'}
+
+# Rows kept per well: 31 days at 1 Hz
+HISTORY_CAPACITY = 31 * 24 * 3600
+
+# Unflushed rows are written once there are this many, or this many seconds after the last write
+FLUSH_ROWS = 3600
+FLUSH_SECONDS = 60.0
+
+# Segment files per well before they are merged into one
+MAX_SEGMENTS = 64
+
+# Points drawn by a history chart
+CHART_POINTS = 2000
+
+
+def default_history_path():
+    """History directory: $ESP_HISTORY_DIR, or live_history/ next to this module"""
+    return os.environ.get('ESP_HISTORY_DIR',
+                          os.path.join(os.path.dirname(os.path.abspath(__file__)), 'live_history'))
+
+
+# ===== DOWNSAMPLING =====
+
+def minmax_indices(y, n_buckets):
+    """Indices of the minimum and maximum of y in each of n_buckets equal buckets, plus both ends"""
+    n = len(y)
+    if n <= 2 * n_buckets:
+        return np.arange(n)
+    size = n // n_buckets
+    blocks = np.asarray(y[:size * n_buckets]).reshape(n_buckets, size)
+    offsets = np.arange(n_buckets) * size
+    indices = [offsets + blocks.argmin(axis=1), offsets + blocks.argmax(axis=1), [0, n - 1]]
+    if size * n_buckets < n:
+        tail = np.asarray(y[size * n_buckets:])
+        indices.append([size * n_buckets + tail.argmin(), size * n_buckets + tail.argmax()])
+    return np.unique(np.concatenate(indices))
+
+
+def lttb_indices(x, y, n_out):
+    """Largest-Triangle-Three-Buckets: indices of the n_out points that best keep the shape of y(x)"""
+    n = len(x)
+    if n_out >= n or n_out < 3:
+        return np.arange(n)
+    x = np.asarray(x, dtype=np.float64)
+    y = np.asarray(y, dtype=np.float64)
+
+    # n_out - 2 buckets between the fixed first and last points
+    edges = np.linspace(1, n - 1, n_out - 1).astype(np.int64)
+    starts, stops = edges[:-1], edges[1:]
+    counts = stops - starts
+    # Average of the following bucket for every bucket (the last one looks at the final point)
+    next_x = np.append(np.add.reduceat(x[:-1], starts)[1:] / counts[1:], x[-1])
+    next_y = np.append(np.add.reduceat(y[:-1], starts)[1:] / counts[1:], y[-1])
+
+    out = np.empty(n_out, dtype=np.int64)
+    out[0], out[-1] = 0, n - 1
+    a = 0
+    for i in range(n_out - 2):
+        lo, hi = starts[i], stops[i]
+        area = np.abs((x[a] - next_x[i]) * (y[lo:hi] - y[a]) - (x[a] - x[lo:hi]) * (next_y[i] - y[a]))
+        a = lo + int(np.argmax(area))
+        out[i + 1] = a
+    return out
+
+
+def downsample(x, y, n_out=CHART_POINTS):
+    """MinMax-LTTB: indices of about n_out points of y(x) for plotting"""
+    n = len(x)
+    if n <= n_out:
+        return np.arange(n)
+    candidates = minmax_indices(y, 2 * n_out)
+    return candidates[lttb_indices(x[candidates], y[candidates], n_out)]
+
+
+# ===== STORE =====
+
+class WellHistory:
+    """
+    Ring buffer of one well's operating points, backed by Parquet segments
+    under path; with no path it is kept in memory only (never read or written).
+    """
+
+    def __init__(self, path, capacity=HISTORY_CAPACITY):
+        self.path = path
+        self.capacity = capacity
+        self._lock = threading.Lock()
+        self._columns = {field: np.empty(0) for field in HISTORY_FIELDS}
+        self._start = 0
+        self._size = 0
+        self._unflushed = 0
+        self._last_flush = time.monotonic()
+        self._load()
+
+    def __len__(self):
+        return self._size
+
+    @property
+    def last_time(self):
+        """Timestamp of the newest reading (epoch seconds), None when empty"""
+        with self._lock:
+            if not self._size:
+                return None
+            values = self._columns['timestamp']
+            return float(values[(self._start + self._size - 1) % len(values)])
+
+    def _segments(self):
+        if self.path is None or not os.path.isdir(self.path):
+            return []
+        return sorted(name for name in os.listdir(self.path) if name.endswith('.parquet'))
+
+    def _load(self):
+        segments = self._segments()
+        if not segments:
+            return
+        table = pa.concat_tables([pq.read_table(os.path.join(self.path, name)) for name in segments])
+        for field in HISTORY_FIELDS:
+            self._columns[field] = table.column(field).to_numpy()[-self.capacity:].astype(np.float64)
+        self._size = len(self._columns['timestamp'])
+
+    def _grow(self):
+        """Double the buffer (up to capacity); only happens before the ring first wraps"""
+        length = min(self.capacity, max(1024, 2 * len(self._columns['timestamp'])))
+        for field, values in self._columns.items():
+            grown = np.empty(length)
+            grown[:self._size] = values[:self._size]
+            self._columns[field] = grown
+
+    def append(self, timestamp, pip, pdp, q, h, deviation_bep_pct):
+        """
+        Add one reading (timestamp as a datetime or epoch seconds). A reading no
+        newer than the last one (late or replayed) is skipped, so the ring stays
+        in time order. Returns whether it was added.
+        """
+        row = (_seconds(timestamp), pip, pdp, q, h, deviation_bep_pct)
+        with self._lock:
+            if self._size:
+                values = self._columns['timestamp']
+                if not row[0] > values[(self._start + self._size - 1) % len(values)]:
+                    return False
+            if self._size == len(self._columns['timestamp']) and self._size < self.capacity:
+                self._grow()
+            length = len(self._columns['timestamp'])
+            position = (self._start + self._size) % length
+            for field, value in zip(HISTORY_FIELDS, row):
+                self._columns[field][position] = value
+            if self._size == length:
+                self._start = (self._start + 1) % length
+            else:
+                self._size += 1
+            self._unflushed += 1
+            due = (self._unflushed >= FLUSH_ROWS
+                   or time.monotonic() - self._last_flush >= FLUSH_SECONDS)
+        if due:
+            self.flush()
+        return True
+
+    def append_point(self, point):
+        """Add a live operating point dict (keys from esp_design.LIVE_FIELDS plus timestamp)"""
+        return self.append(point['timestamp'], *(point[key] for key in POINT_FIELDS.values()))
+
+    def extend(self, columns):
+        """
+        Add many readings at once from arrays keyed by HISTORY_FIELDS (oldest
+        first, timestamps in epoch seconds); readings no newer than the last
+        one are skipped. Returns the number of readings added.
+        """
+        new = {field: np.asarray(columns[field], dtype=np.float64) for field in HISTORY_FIELDS}
+        with self._lock:
+            if self._size:
+                values = self._columns['timestamp']
+                keep = new['timestamp'] > values[(self._start + self._size - 1) % len(values)]
+                new = {field: column[keep] for field, column in new.items()}
+            added = len(new['timestamp'])
+            if not added:
+                return 0
+            self._columns = {field: np.concatenate((self._ordered(field), new[field]))[-self.capacity:]
+                             for field in HISTORY_FIELDS}
+            self._start = 0
+            self._size = len(self._columns['timestamp'])
+            self._unflushed += added
+        self.flush()
+        return added
+
+    def _ordered(self, field, lo=0, hi=None):
+        """Copy of rows lo:hi of a field, oldest first"""
+        values = self._columns[field]
+        length = len(values)
+        lo, hi = self._start + lo, self._start + (self._size if hi is None else hi)
+        if hi <= length:
+            return values[lo:hi].copy()
+        return np.concatenate((values[min(lo, length):], values[max(lo - length, 0):hi - length]))
+
+    def _rows_between(self, start, end):
+        """Row range lo:hi (oldest first) with timestamps between start and end, without copying"""
+        values = self._columns['timestamp']
+        length = len(values)
+        # The ring holds at most two sorted runs: start:length and 0:start
+        runs = [values[self._start:min(self._start + self._size, length)],
+                values[:max(self._start + self._size - length, 0)]]
+
+        def position(t, side):
+            first = int(np.searchsorted(runs[0], t, side=side))
+            if first < len(runs[0]):
+                return first
+            return first + int(np.searchsorted(runs[1], t, side=side))
+
+        lo = 0 if start is None else position(_seconds(start), 'left')
+        hi = self._size if end is None else position(_seconds(end), 'right')
+        return lo, hi
+
+    def flush(self):
+        """Write unflushed rows as a new segment, merging segments when there are too many"""
+        with self._lock:
+            rows = min(self._unflushed, self._size)
+            if not rows or self.path is None:
+                return
+            table = pa.table({field: self._ordered(field, self._size - rows) for field in HISTORY_FIELDS})
+            self._unflushed = 0
+            self._last_flush = time.monotonic()
+            os.makedirs(self.path, exist_ok=True)
+            name = f"{int(table.column('timestamp')[0].as_py() * 1e6):020d}-{time.time_ns()}.parquet"
+            pq.write_table(table, os.path.join(self.path, name))
+
+            segments = self._segments()
+            if len(segments) > MAX_SEGMENTS:
+                merged = pa.table({field: self._ordered(field) for field in HISTORY_FIELDS})
+                tmp = os.path.join(self.path, 'merged.tmp')
+                pq.write_table(merged, tmp)
+                os.replace(tmp, os.path.join(self.path, '0' * 20 + f"-{time.time_ns()}.parquet"))
+                for old in segments:
+                    os.remove(os.path.join(self.path, old))
+
+    def arrays(self, start=None, end=None):
+        """Raw readings between two datetimes (or epoch seconds) as arrays keyed by HISTORY_FIELDS"""
+        with self._lock:
+            lo, hi = self._rows_between(start, end)
+            return {field: self._ordered(field, lo, hi) for field in HISTORY_FIELDS}
+
+    def frame(self, start=None, end=None):
+        """Raw readings between two datetimes (or epoch seconds) as a DataFrame"""
+        df = pd.DataFrame(self.arrays(start, end))
+        df['timestamp'] = _datetimes(df['timestamp'])
+        return df
+
+    def query(self, fields=('Q', 'H'), start=None, end=None, n_points=CHART_POINTS):
+        """
+        Downsampled series for a chart: {'raw_rows': n, field: (times, values)}
+        with each field reduced to about n_points with MinMax-LTTB.
+        """
+        with self._lock:
+            lo, hi = self._rows_between(start, end)
+            timestamps = self._ordered('timestamp', lo, hi)
+            columns = {field: self._ordered(field, lo, hi) for field in fields}
+        result = {'raw_rows': len(timestamps)}
+        for field, values in columns.items():
+            keep = downsample(timestamps, values, n_points)
+            result[field] = (_datetimes(timestamps[keep]), values[keep])
+        return result
+
+
+def _seconds(timestamp):
+    """Epoch seconds of a datetime (naive ones in local time, like datetime.now()) or of epoch seconds"""
+    if isinstance(timestamp, pd.Timestamp):
+        # Timestamp.timestamp() would read a naive value as UTC
+        timestamp = timestamp.to_pydatetime()
+    return timestamp.timestamp() if hasattr(timestamp, 'timestamp') else float(timestamp)
+
+
+def _datetimes(seconds):
+    """Epoch seconds as naive local datetimes, the clock the readings were stamped with (datetime.now())"""
+    return pd.to_datetime(np.asarray(seconds), unit='s', utc=True).tz_convert(tzlocal()).tz_localize(None)
+
+
+class HistoryStore:
+    """WellHistory per well name under one directory, opened on first use"""
+
+    def __init__(self, path=None, capacity=HISTORY_CAPACITY):
+        self.path = path or default_history_path()
+        self.capacity = capacity
+        self._wells = {}
+        self._lock = threading.Lock()
+        atexit.register(self.flush)
+
+    def __getitem__(self, well_name):
+        with self._lock:
+            if well_name not in self._wells:
+                self._wells[well_name] = WellHistory(os.path.join(self.path, quote(str(well_name) or '_', safe='')),
+                                                     self.capacity)
+            return self._wells[well_name]
+
+    def wells(self):
+        """Well names with history on disk or in memory"""
+        on_disk = os.listdir(self.path) if os.path.isdir(self.path) else []
+        return sorted(set(self._wells) | {unquote(name) for name in on_disk})
+
+    def flush(self):
+        for history in list(self._wells.values()):
+            history.flush()
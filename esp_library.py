@@ -0,0 +1,245 @@
+"""
+Persistent on-disk pump library.
+
+The library is a directory holding:
+- a curves file (curves-<id>.npy): one float32 array of shape (4, N) with the
+  flow, head, bhp and efficiency rows of every pump, opened as a read-only
+  memory map;
+- index.parquet: one row per model with its metadata and the start/stop
+  columns of its curve, and the name of the curves file in its schema metadata.
+
+Nothing is read until the library is first used, and only the selected model's
+columns are paged in from the memory map, so every server worker shares the
+same files (and the OS page cache) without copies. Writers take an exclusive
+file lock, re-read the library, write a new compacted curves file (replaced
+models leave nothing behind) and then swap the index in atomically, so readers
+always see a matching index and curves file.
+
+Usage:
+    python esp_library.py vendor_catalog.xlsx --metadata vendor_metadata.csv
+"""
+import argparse
+import os
+import threading
+import uuid
+from contextlib import contextmanager
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+
+from esp_catalog import PumpCatalog, load_catalog
+from esp_curves import get_pump_curve
+
+# Per-model metadata kept in the index
+METADATA_FIELDS = ['pump_od', 'bep_flow', 'rec_min', 'rec_max', 'bhp_per_stage']
+
+# Curves file of libraries whose index does not name one
+CURVES_FILE = 'curves.npy'
+INDEX_FILE = 'index.parquet'
+LOCK_FILE = 'library.lock'
+
+# Index schema metadata key holding the curves file name
+CURVES_FILE_KEY = b'curves_file'
+
+
+def default_library_path():
+    """Library directory: $ESP_PUMP_LIBRARY, or pump_library/ next to this module"""
+    return os.environ.get('ESP_PUMP_LIBRARY',
+                          os.path.join(os.path.dirname(os.path.abspath(__file__)), 'pump_library'))
+
+
+@contextmanager
+def _write_lock(path):
+    """Exclusive lock on a library directory, held by one writer (process or thread) at a time"""
+    with open(os.path.join(path, LOCK_FILE), 'a+b') as f:
+        if fcntl is not None:
+            fcntl.flock(f, fcntl.LOCK_EX)
+        else:
+            f.seek(0)
+            msvcrt.locking(f.fileno(), msvcrt.LK_LOCK, 1)
+        try:
+            yield
+        finally:
+            if fcntl is not None:
+                fcntl.flock(f, fcntl.LOCK_UN)
+            else:
+                f.seek(0)
+                msvcrt.locking(f.fileno(), msvcrt.LK_UNLCK, 1)
+
+
+def _empty_index():
+    index = pd.DataFrame({field: pd.Series(dtype='float64') for field in METADATA_FIELDS})
+    index['start'] = pd.Series(dtype='int64')
+    index['stop'] = pd.Series(dtype='int64')
+    return index.rename_axis('model')
+
+
+class PumpLibrary:
+    """Lazily opened, memory-mapped store of pump curves and their metadata"""
+
+    def __init__(self, path=None):
+        self.path = path or default_library_path()
+        self._stamp = None
+        self._index = None
+        self._curves = None
+
+    def _refresh(self):
+        """(Re)open the index and curve memory map when the files on disk change"""
+        index_path = os.path.join(self.path, INDEX_FILE)
+        try:
+            stamp = os.stat(index_path).st_mtime_ns
+        except FileNotFoundError:
+            stamp = None
+        if self._index is not None and stamp == self._stamp:
+            return
+
+        if stamp is None:
+            self._index = _empty_index()
+            self._curves = np.empty((4, 0), dtype=np.float32)
+        else:
+            table = pq.read_table(index_path)
+            curves_file = (table.schema.metadata or {}).get(CURVES_FILE_KEY, CURVES_FILE.encode()).decode()
+            try:
+                curves = np.load(os.path.join(self.path, curves_file), mmap_mode='r')
+            except FileNotFoundError:
+                # A writer replaced the index (and removed its old curves file) since it was read
+                self._index = None
+                return self._refresh()
+            self._index = table.to_pandas().set_index('model')
+            self._curves = curves
+        self._stamp = stamp
+
+    @property
+    def index(self):
+        """Metadata table, one row per model"""
+        self._refresh()
+        return self._index
+
+    @property
+    def models(self):
+        return self.index.index.tolist()
+
+    def __len__(self):
+        return len(self.index)
+
+    def __contains__(self, model):
+        return model in self.index.index
+
+    def metadata(self, model):
+        """Metadata for one model as a dict (NaN where unknown)"""
+        return self.index.loc[model, METADATA_FIELDS].to_dict()
+
+    def get(self, model):
+        """Curve arrays for one model, as views into the memory map"""
+        row = self.index.loc[model]
+        block = self._curves[:, int(row['start']):int(row['stop'])]
+        return {'flow': block[0], 'head': block[1], 'bhp': block[2], 'efficiency': block[3]}
+
+    def curve(self, model):
+        """Flow and head per stage for one model"""
+        arrays = self.get(model)
+        return arrays['flow'], arrays['head']
+
+    def pump_curve(self, model):
+        """Shared PumpCurve (interpolators) for one model"""
+        return get_pump_curve(*self.curve(model))
+
+    def catalog(self):
+        """Every pump in the library as a PumpCatalog"""
+        index = self.index
+        starts = index['start'].to_numpy()
+        stops = index['stop'].to_numpy()
+        if len(index) and starts[0] == 0 and np.array_equal(starts[1:], stops[:-1]):
+            # Stored back to back: the catalog can view the memory map directly
+            block = self._curves[:, :stops[-1]]
+        else:
+            rows = np.concatenate([np.arange(a, b) for a, b in zip(starts, stops)] or [np.empty(0, int)])
+            block = self._curves[:, rows]
+        offsets = np.concatenate([[0], np.cumsum(stops - starts)])
+        return PumpCatalog(index.index, offsets, block[0], block[1], block[2], block[3], dtype=np.float32)
+
+    def add_catalog(self, catalog, metadata=None):
+        """
+        Add every model of a PumpCatalog to the library, replacing models that
+        already exist. `metadata` is an optional DataFrame indexed by model
+        with any of the METADATA_FIELDS columns.
+        """
+        os.makedirs(self.path, exist_ok=True)
+        with _write_lock(self.path):
+            # Start from what is on disk now, not from what this instance read earlier
+            self._index = None
+            self._refresh()
+
+            new_rows = pd.DataFrame(index=pd.Index(catalog.models, name='model'), columns=METADATA_FIELDS,
+                                    dtype='float64')
+            if metadata is not None:
+                new_rows.update(metadata.reindex(new_rows.index)[[f for f in METADATA_FIELDS if f in metadata.columns]])
+
+            # Kept models are copied back to back, so replaced curves are dropped
+            kept = self._index.drop(new_rows.index, errors='ignore')
+            lengths = (kept['stop'] - kept['start']).to_numpy()
+            columns = [np.arange(a, b) for a, b in zip(kept['start'], kept['stop'])]
+            kept_curves = self._curves[:, np.concatenate(columns)] if columns else np.empty((4, 0), np.float32)
+            stops = np.cumsum(lengths).astype(np.int64)
+            kept['start'] = stops - lengths
+            kept['stop'] = stops
+            start = kept_curves.shape[1]
+            block = np.vstack([catalog.q, catalog.h, catalog.bhp, catalog.efficiency]).astype(np.float32)
+            curves = np.concatenate([kept_curves, block], axis=1)
+            new_rows['start'] = start + catalog.offsets[:-1]
+            new_rows['stop'] = start + catalog.offsets[1:]
+            index = pd.concat([kept, new_rows])
+
+            # New curves file first, then the index that names it; readers switch with the index
+            curves_file = f"curves-{uuid.uuid4().hex}.npy"
+            with open(os.path.join(self.path, curves_file), 'wb') as f:
+                np.save(f, curves)
+            table = pa.Table.from_pandas(index.reset_index(), preserve_index=False)
+            table = table.replace_schema_metadata({**(table.schema.metadata or {}),
+                                                   CURVES_FILE_KEY: curves_file.encode()})
+            index_tmp = os.path.join(self.path, f"{INDEX_FILE}.{os.getpid()}.{threading.get_ident()}.tmp")
+            pq.write_table(table, index_tmp)
+            os.replace(index_tmp, os.path.join(self.path, INDEX_FILE))
+
+            # Readers that still map the old curves file keep it open; Windows refuses, it goes on the next write
+            for name in os.listdir(self.path):
+                if name != curves_file and (name == CURVES_FILE or name.startswith('curves-')):
+                    try:
+                        os.remove(os.path.join(self.path, name))
+                    except OSError:
+                        pass
+            self._index = None
+
+    def add(self, model, q_curve, h_curve, bhp=None, efficiency=None, **metadata):
+        """Add (or replace) a single pump curve with its metadata"""
+        frame = pd.DataFrame({'model': model, 'flow': q_curve, 'head': h_curve,
+                              'bhp': np.nan if bhp is None else bhp,
+                              'efficiency': np.nan if efficiency is None else efficiency})
+        meta = pd.DataFrame([metadata], index=pd.Index([model], name='model'), dtype='float64')
+        self.add_catalog(PumpCatalog.from_frame(frame), meta)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Import a pump catalog into the pump library")
+    parser.add_argument('catalog', help="Pump catalog (.csv/.parquet/.xlsx/.xls)")
+    parser.add_argument('--metadata', help="CSV with a model column and any of: " + ', '.join(METADATA_FIELDS))
+    parser.add_argument('--library', default=None, help="Library directory (default: pump_library/)")
+    args = parser.parse_args(argv)
+
+    catalog = load_catalog(args.catalog)
+    metadata = pd.read_csv(args.metadata).set_index('model') if args.metadata else None
+    library = PumpLibrary(args.library)
+    library.add_catalog(catalog, metadata)
+    print(f"Imported {len(catalog)} pumps -> {library.path} ({len(library)} pumps in library)")
+
+
+if __name__ == '__main__':
+    main()
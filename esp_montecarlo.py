@@ -0,0 +1,123 @@
+"""
+Monte Carlo uncertainty analysis for ESP sizing.
+
+Uncertain inputs are drawn from simple distributions and pushed through the
+vectorized design calculation (Standing PVT, TDH, stages, power and
+electrical) in fixed-size chunks. Every chunk has its own random stream
+spawned from one seed, so a run gives the same draws for a given seed and
+chunk size whether it runs in one process or across all cores, and memory
+only ever holds one chunk of full design results per worker.
+"""
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+from esp_design import DEFAULT_Q_CURVE, DEFAULT_H_CURVE, compute_esp_design
+from esp_sensitivity import FIELD_LIMITS
+
+# Outputs kept for every draw
+MC_OUTPUTS = [
+    ('n_stages', 'Stages'),
+    ('TDH_design', 'TDH (ft)'),
+    ('pump_bhp_normal', 'Pump BHP (hp)'),
+    ('motor_loading_pct', 'Motor Loading (%)'),
+]
+
+# Default uncertainty: relative half-width of a triangular distribution around the base value
+DEFAULT_UNCERTAINTY = {
+    'productivity_index': 0.30,
+    'static_pressure': 0.10,
+    'bubble_point_pressure': 0.15,
+    'water_cut': 0.10,
+}
+
+MC_DRAWS = 100_000
+MC_CHUNK_SIZE = 10_000
+PERCENTILES = [10, 50, 90]
+
+
+def default_distributions(base_inputs, uncertainty=DEFAULT_UNCERTAINTY):
+    """Triangular (low, mode, high) distributions around the base value of each uncertain input"""
+    return {field: ('triangular', base_inputs[field] * (1 - width), base_inputs[field],
+                    base_inputs[field] * (1 + width))
+            for field, width in uncertainty.items()}
+
+
+def _draw(rng, spec, size):
+    """
+    Samples from ('normal', mean, sd), ('lognormal', median, sigma),
+    ('uniform', low, high) or ('triangular', low, mode, high)
+    """
+    kind, *params = spec
+    if kind == 'normal':
+        return rng.normal(params[0], params[1], size)
+    if kind == 'lognormal':
+        return params[0] * rng.lognormal(0.0, params[1], size)
+    if kind == 'uniform':
+        return rng.uniform(params[0], params[1], size)
+    if kind == 'triangular':
+        low, mode, high = params
+        if high <= low:
+            return np.full(size, float(mode))
+        return rng.triangular(low, mode, high, size)
+    raise ValueError(f"Unknown distribution '{kind}'")
+
+
+def simulate_chunk(base_inputs, distributions, size, seed_sequence, q_curve=DEFAULT_Q_CURVE, h_curve=DEFAULT_H_CURVE):
+    """Draw `size` samples of the uncertain inputs and return them with the MC_OUTPUTS of each design"""
+    rng = np.random.default_rng(seed_sequence)
+    inputs = dict(base_inputs)
+    samples = {}
+    for field, spec in distributions.items():
+        values = np.maximum(_draw(rng, spec, size), 0.0)
+        if field in FIELD_LIMITS:
+            values = np.clip(values, *FIELD_LIMITS[field])
+        inputs[field] = samples[field] = values
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        design = compute_esp_design(inputs, q_curve, h_curve)
+        design['motor_loading_pct'] = design['pump_bhp_normal'] / inputs['motor_hp_nameplate'] * 100
+    results = pd.DataFrame(samples)
+    for name, _ in MC_OUTPUTS:
+        # Draws with no valid stage count (e.g. drawdown below zero intake pressure, free gas over the limit) are NaN
+        results[name] = design[name].to_numpy(dtype=float, na_value=np.nan)
+    return results
+
+
+def monte_carlo_design(base_inputs, distributions=None, n_draws=MC_DRAWS, seed=0, chunk_size=MC_CHUNK_SIZE,
+                       workers=None, q_curve=DEFAULT_Q_CURVE, h_curve=DEFAULT_H_CURVE):
+    """
+    Probabilistic design: `n_draws` samples of the inputs in `distributions`
+    (default default_distributions(base_inputs)), every other input held at
+    its base value. Chunks run on `workers` processes (default: all cores;
+    1 runs in this process).
+
+    Returns one row per draw with the sampled inputs and MC_OUTPUTS.
+    """
+    distributions = distributions or default_distributions(base_inputs)
+    base_inputs = {name: value for name, value in base_inputs.items() if name not in distributions}
+    sizes = [min(chunk_size, n_draws - start) for start in range(0, n_draws, chunk_size)]
+    streams = np.random.SeedSequence(seed).spawn(len(sizes))
+    workers = min(workers or os.cpu_count() or 1, len(sizes))
+
+    args = [(base_inputs, distributions, size, stream, q_curve, h_curve) for size, stream in zip(sizes, streams)]
+    if workers <= 1:
+        chunks = [simulate_chunk(*chunk_args) for chunk_args in args]
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            chunks = list(pool.map(simulate_chunk, *zip(*args)))
+    return pd.concat(chunks, ignore_index=True)
+
+
+def percentile_table(samples, percentiles=PERCENTILES):
+    """P10/P50/P90 (the 10th/50th/90th percentiles) and the mean of every output, one row per output"""
+    labels = dict(MC_OUTPUTS)
+    values = samples[list(labels)].to_numpy(dtype=np.float64)
+    table = pd.DataFrame(np.nanpercentile(values, percentiles, axis=0).T,
+                         index=pd.Index(list(labels), name='output'),
+                         columns=[f'P{p}' for p in percentiles])
+    table['mean'] = np.nanmean(values, axis=0)
+    table.insert(0, 'label', list(labels.values()))
+    return table
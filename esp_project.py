@@ -0,0 +1,213 @@
+"""
+Multi-well project files.
+
+A project is one Arrow IPC file holding, per well, its design inputs, pump
+curve, design results (headline values, calc dict, operating point) and
+optionally its live history. Wells are written in record batches of
+PROJECT_BATCH_WELLS rows, and the well names and batch size are kept in the
+schema metadata, so opening a project only reads the file footer: a well's
+batch is read (and decompressed) the first time one of its wells is asked
+for. Uncompressed files opened from a path are memory-mapped, so curve and
+history arrays come straight from the page cache without copies.
+
+Usage:
+    python esp_project.py project.esp               list the wells of a project
+"""
+import argparse
+import io
+import json
+import os
+import time
+from functools import lru_cache
+
+import numpy as np
+import pyarrow as pa
+
+from esp_design import (CALC_FIELDS, OPERATING_POINT_FIELDS, OPTIONAL_FIELDS, REQUIRED_FIELDS)
+from esp_history import HISTORY_FIELDS
+
+PROJECT_FORMAT_VERSION = 1
+
+# Wells per record batch: the unit a well is read (and decompressed) in
+PROJECT_BATCH_WELLS = 32
+
+# Compression of saved projects (None writes memory-mappable, uncompressed buffers)
+PROJECT_COMPRESSION = 'zstd'
+
+# Per-well inputs: the design inputs plus the Part 2 live inputs
+LIVE_INPUT_FIELDS = ['pip_value', 'pdp_value', 'p_gradient_value', 'actual_stages_value', 'drive_frequency_value',
+                     'surface_flow_value']
+INPUT_FIELDS = [field for field, _ in REQUIRED_FIELDS] + list(OPTIONAL_FIELDS) + LIVE_INPUT_FIELDS
+
+# Headline design values kept next to the calc dict and operating point
+DESIGN_FIELDS = ['TDH_design', 'n_stages', 'head_per_stage']
+
+# Solver statistics of the operating point solve
+SOLVER_FIELDS = ['wells', 'converged', 'max_iterations', 'mean_iterations', 'elapsed_ms']
+
+_FLOATS = pa.list_(pa.float64())
+
+PROJECT_SCHEMA = pa.schema(
+    [('well_name', pa.string()), ('pump_model', pa.string())]
+    + [(field, pa.float64()) for field in INPUT_FIELDS]
+    + [('q_curve', _FLOATS), ('h_curve', _FLOATS)]
+    + [('design', pa.struct(
+        [('TDH_design', pa.float64()), ('n_stages', pa.int64()), ('head_per_stage', pa.float64()),
+         ('calc', pa.struct([(field, pa.float64()) for field in CALC_FIELDS])),
+         ('operating_point', pa.struct([(field, pa.bool_() if field == 'op_converged' else
+                                         pa.int64() if field == 'op_iterations' else pa.float64())
+                                        for field in OPERATING_POINT_FIELDS])),
+         ('solver_stats', pa.struct([(field, pa.float64() if field in ('mean_iterations', 'elapsed_ms')
+                                      else pa.int64()) for field in SOLVER_FIELDS]))]))]
+    + [('history', pa.struct([(field, _FLOATS) for field in HISTORY_FIELDS]))]
+)
+
+
+def _input_value(value):
+    return None if value is None or (isinstance(value, float) and np.isnan(value)) else float(value)
+
+
+def _well_batch(wells):
+    """One record batch from a list of well dicts"""
+    columns = {
+        'well_name': [str(well['well_name']) for well in wells],
+        'pump_model': [str(well.get('pump_model') or '') for well in wells],
+        'q_curve': [np.asarray(well['q_curve'], dtype=np.float64) for well in wells],
+        'h_curve': [np.asarray(well['h_curve'], dtype=np.float64) for well in wells],
+        'design': [well.get('design') for well in wells],
+        'history': [None if well.get('history') is None else
+                    {field: np.asarray(well['history'][field], dtype=np.float64) for field in HISTORY_FIELDS}
+                    for well in wells],
+    }
+    for field in INPUT_FIELDS:
+        columns[field] = [_input_value(well['inputs'].get(field)) for well in wells]
+    arrays = []
+    for name in PROJECT_SCHEMA.names:
+        field_type = PROJECT_SCHEMA.field(name).type
+        if name in ('q_curve', 'h_curve'):
+            offsets = np.concatenate(([0], np.cumsum([len(v) for v in columns[name]]))).astype(np.int32)
+            values = np.concatenate(columns[name]) if columns[name] else np.empty(0)
+            arrays.append(pa.ListArray.from_arrays(pa.array(offsets), pa.array(values)))
+        else:
+            arrays.append(pa.array(columns[name], type=field_type))
+    return pa.RecordBatch.from_arrays(arrays, schema=PROJECT_SCHEMA)
+
+
+def save_project(target, wells, compression=PROJECT_COMPRESSION):
+    """
+    Write well dicts to a project file (a path, written atomically, or a
+    writable binary file object). Each well dict has `well_name`,
+    `pump_model`, `inputs` (INPUT_FIELDS, missing ones saved empty),
+    `q_curve`/`h_curve`, `design` (None, or the design cache entry:
+    DESIGN_FIELDS plus `calc`, `operating_point` and `solver_stats`) and
+    `history` (None, or arrays keyed by esp_history.HISTORY_FIELDS).
+    """
+    wells = list(wells)
+    integer_inputs = [field for field in INPUT_FIELDS
+                      if any(well['inputs'].get(field) is not None for well in wells)
+                      and all(isinstance(well['inputs'].get(field), (int, type(None)))
+                              and not isinstance(well['inputs'].get(field), bool) for well in wells)]
+    metadata = {'esp_project_version': str(PROJECT_FORMAT_VERSION),
+                'batch_wells': str(PROJECT_BATCH_WELLS),
+                'wells': json.dumps([str(well['well_name']) for well in wells]),
+                'integer_inputs': json.dumps(integer_inputs)}
+    schema = PROJECT_SCHEMA.with_metadata(metadata)
+    options = pa.ipc.IpcWriteOptions(compression=compression)
+
+    def write(sink):
+        with pa.ipc.new_file(sink, schema, options=options) as writer:
+            for start in range(0, len(wells), PROJECT_BATCH_WELLS):
+                writer.write_batch(_well_batch(wells[start:start + PROJECT_BATCH_WELLS]).replace_schema_metadata(
+                    metadata))
+
+    if isinstance(target, (str, os.PathLike)):
+        tmp = f"{target}.{os.getpid()}.tmp"
+        with pa.OSFile(tmp, 'wb') as sink:
+            write(sink)
+        os.replace(tmp, target)
+    else:
+        write(target)
+
+
+def project_bytes(wells, compression=PROJECT_COMPRESSION):
+    """A project file as bytes (for downloads)"""
+    buffer = io.BytesIO()
+    save_project(buffer, wells, compression)
+    return buffer.getvalue()
+
+
+class Project:
+    """A project file opened for lazy, per-well reading"""
+
+    def __init__(self, source):
+        if isinstance(source, (bytes, bytearray, memoryview)):
+            source = pa.BufferReader(source)
+        elif isinstance(source, (str, os.PathLike)):
+            source = pa.memory_map(str(source))
+        self._reader = pa.ipc.open_file(source)
+        metadata = {key.decode(): value.decode() for key, value in (self._reader.schema.metadata or {}).items()}
+        if 'esp_project_version' not in metadata:
+            raise ValueError("Not an ESP project file")
+        if int(metadata['esp_project_version']) > PROJECT_FORMAT_VERSION:
+            raise ValueError(f"Project file version {metadata['esp_project_version']} is newer than this dashboard "
+                             f"supports ({PROJECT_FORMAT_VERSION})")
+        self.wells = json.loads(metadata['wells'])
+        self._batch_wells = int(metadata['batch_wells'])
+        self._integer_inputs = set(json.loads(metadata['integer_inputs']))
+        self._rows = {name: row for row, name in enumerate(self.wells)}
+        self._batch = lru_cache(maxsize=8)(self._read_batch)
+
+    def _read_batch(self, index):
+        """A record batch and its scalar columns as Python rows"""
+        batch = self._reader.get_batch(index)
+        # Inputs added since the file was written are read as missing
+        columns = [name for name in ['well_name', 'pump_model', 'design'] + INPUT_FIELDS if name in batch.schema.names]
+        return batch, batch.select(columns).to_pylist()
+
+    def __len__(self):
+        return len(self.wells)
+
+    def __contains__(self, well_name):
+        return well_name in self._rows
+
+    def well(self, well_name):
+        """Well dict (as taken by save_project) of one well, reading only its record batch"""
+        row = self._rows[well_name]
+        batch, rows = self._batch(row // self._batch_wells)
+        i = row % self._batch_wells
+        values = rows[i]
+        inputs = {field: int(values[field]) if values.get(field) is not None and field in self._integer_inputs
+                  else values.get(field) for field in INPUT_FIELDS}
+        history = batch.column('history')[i]
+        return {
+            'well_name': values['well_name'],
+            'pump_model': values['pump_model'],
+            'inputs': inputs,
+            'q_curve': batch.column('q_curve')[i].values.to_numpy(),
+            'h_curve': batch.column('h_curve')[i].values.to_numpy(),
+            'design': values['design'],
+            'history': None if not history.is_valid else
+            {field: history[field].values.to_numpy() for field in HISTORY_FIELDS},
+        }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="List the wells of an ESP project file")
+    parser.add_argument('project', help="Project file (.esp)")
+    args = parser.parse_args(argv)
+
+    start = time.perf_counter()
+    project = Project(args.project)
+    elapsed = (time.perf_counter() - start) * 1000
+    for name in project.wells:
+        well = project.well(name)
+        design = well['design']
+        history = well['history']
+        print(f"{name}: {well['pump_model'] or '-'} | "
+              + (f"{design['n_stages']} stages, TDH {design['TDH_design']:.0f} ft" if design else "not designed")
+              + (f" | {len(history['timestamp']):,} readings" if history else ""))
+    print(f"{len(project)} wells, opened in {elapsed:.1f} ms")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,109 @@
+"""
+Automatic pump selection.
+
+rank_pumps evaluates every curve of a PumpCatalog at one design point in a
+single vectorized pass: all curves are laid end to end on one flow axis, so a
+single searchsorted finds the bracketing points of every model at once.
+"""
+import numpy as np
+import pandas as pd
+
+# Recommended range as a fraction of BEP flow, used when a pump has no rec_min/rec_max
+DEFAULT_REC_MIN_RATIO = 0.8
+DEFAULT_REC_MAX_RATIO = 1.2
+
+
+def _metadata_column(metadata, models, name):
+    """One metadata column aligned with the catalog models (NaN where unknown)"""
+    if metadata is None or name not in metadata.columns:
+        return np.full(len(models), np.nan)
+    return metadata[name].reindex(models).to_numpy(dtype=np.float64)
+
+
+def _bep_from_efficiency(catalog, model_idx):
+    """Flow at peak efficiency for every model (NaN when a model has no efficiency data)"""
+    efficiency = np.where(np.isnan(catalog.efficiency), -np.inf, catalog.efficiency)
+    peak = np.maximum.reduceat(efficiency, catalog.offsets[:-1])
+    is_peak = efficiency == peak[model_idx]
+    positions = np.flatnonzero(is_peak)
+    first = positions[np.searchsorted(model_idx[positions], np.arange(len(catalog)))]
+    return np.where(np.isfinite(peak), catalog.q[first], np.nan)
+
+
+def rank_pumps(catalog, target_rate, tdh, metadata=None, tubing_composite_sg=1.0, max_od=None):
+    """
+    Rank every pump in `catalog` for a design point (target_rate bpd, tdh ft).
+
+    `metadata` is an optional DataFrame indexed by model with pump_od, bep_flow,
+    rec_min, rec_max and bhp_per_stage (e.g. PumpLibrary.index). Missing BEP
+    flows come from the efficiency curve, missing ranges from 80-120% of BEP
+    and missing bhp_per_stage from the bhp curve at the target rate. Pumps
+    wider than `max_od` are left out.
+
+    Heads are linearly interpolated; pumps whose curve does not cover the
+    target rate get no head and rank last. Returns a DataFrame sorted best
+    first: in-range pumps, then closest to BEP, then lowest BHP.
+    """
+    models = pd.Index(catalog.models, name='model')
+    n_models = len(models)
+    offsets = catalog.offsets
+    counts = np.diff(offsets)
+    model_idx = np.repeat(np.arange(n_models), counts)
+    q = catalog.q.astype(np.float64)
+    h = catalog.h.astype(np.float64)
+
+    # Shift each model onto its own stretch of one flow axis and bracket the target in one search
+    span = (q.max() - q.min() + 1.0) if len(q) else 1.0
+    key = q + model_idx * span
+    target_key = target_rate + np.arange(n_models) * span
+    lo = np.searchsorted(key, target_key, side='right') - 1
+    lo = np.clip(lo, offsets[:-1], np.maximum(offsets[1:] - 2, offsets[:-1]))
+    hi = np.minimum(lo + 1, offsets[1:] - 1)
+    dq = q[hi] - q[lo]
+    frac = np.divide(target_rate - q[lo], dq, out=np.zeros(n_models), where=dq > 0)
+
+    def at_target(values):
+        values = values.astype(np.float64)
+        return values[lo] + frac * (values[hi] - values[lo])
+
+    covered = (target_rate >= q[offsets[:-1]]) & (target_rate <= q[offsets[1:] - 1])
+    head_per_stage = np.where(covered, at_target(h), np.nan)
+    feasible = head_per_stage > 0
+    n_stages = np.ceil(np.divide(tdh, head_per_stage, out=np.full(n_models, np.nan), where=feasible))
+
+    bep_flow = _metadata_column(metadata, models, 'bep_flow')
+    bep_flow = np.where(np.isnan(bep_flow), _bep_from_efficiency(catalog, model_idx), bep_flow)
+    rec_min = _metadata_column(metadata, models, 'rec_min')
+    rec_min = np.where(np.isnan(rec_min), DEFAULT_REC_MIN_RATIO * bep_flow, rec_min)
+    rec_max = _metadata_column(metadata, models, 'rec_max')
+    rec_max = np.where(np.isnan(rec_max), DEFAULT_REC_MAX_RATIO * bep_flow, rec_max)
+    bhp_per_stage = _metadata_column(metadata, models, 'bhp_per_stage')
+    bhp_per_stage = np.where(np.isnan(bhp_per_stage), np.where(covered, at_target(catalog.bhp), np.nan), bhp_per_stage)
+    pump_od = _metadata_column(metadata, models, 'pump_od')
+
+    ranking = pd.DataFrame({
+        'head_per_stage': head_per_stage,
+        'n_stages': pd.array(np.where(feasible, n_stages, np.nan)).astype('Int64'),
+        'bep_flow': bep_flow,
+        'bep_deviation_pct': (target_rate - bep_flow) / bep_flow * 100,
+        'rec_min': rec_min,
+        'rec_max': rec_max,
+        'in_range': feasible & (rec_min <= target_rate) & (target_rate <= rec_max),
+        'bhp_per_stage': bhp_per_stage,
+        'pump_bhp': n_stages * bhp_per_stage * tubing_composite_sg,
+        'efficiency': np.where(covered, at_target(catalog.efficiency), np.nan),
+        'pump_od': pump_od,
+    }, index=models)
+
+    if max_od is not None:
+        ranking = ranking[~(ranking['pump_od'] > max_od)]
+
+    order = np.lexsort((
+        ranking['pump_bhp'].fillna(np.inf).to_numpy(),
+        ranking['bep_deviation_pct'].abs().fillna(np.inf).to_numpy(),
+        ~ranking['in_range'].to_numpy(),
+        ranking['head_per_stage'].isna().to_numpy(),
+    ))
+    ranking = ranking.iloc[order]
+    ranking.insert(0, 'rank', np.arange(1, len(ranking) + 1))
+    return ranking
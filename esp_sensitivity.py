@@ -0,0 +1,94 @@
+"""
+Design-point sensitivity.
+
+sensitivity_sweep perturbs every design input one at a time across a range of
+factors around its base value and evaluates the whole grid (inputs x steps
+rows) in a single compute_esp_design call. tornado_table turns the sweep into
+the low/high swing of one output per input, largest first.
+"""
+import numpy as np
+import pandas as pd
+
+from esp_design import REQUIRED_FIELDS, OPTIONAL_FIELDS, compute_esp_design
+
+# Outputs tracked by the sweep and the tornado chart
+SENSITIVITY_OUTPUTS = [
+    ('n_stages', 'Stages'),
+    ('TDH_design', 'TDH (ft)'),
+    ('pump_bhp_normal', 'Pump BHP (hp)'),
+    ('required_surface_voltage', 'Surface Voltage (V)'),
+]
+
+# Inputs that select a calculation branch rather than scale a quantity; they are not swept
+DISCRETE_FIELDS = ['pump_od', 'cable_number']
+
+# Physical limits applied to perturbed values (water cut is a fraction)
+FIELD_LIMITS = {'water_cut': (0.0, 1.0)}
+
+# Default sweep: +/-20% in 21 steps
+SWEEP_SPAN = 0.2
+SWEEP_STEPS = 21
+
+
+def sweep_fields():
+    """Inputs swept by default: every required field except the discrete ones"""
+    return [field for field, _ in REQUIRED_FIELDS if field not in DISCRETE_FIELDS]
+
+
+def sensitivity_sweep(base_inputs, fields=None, span=SWEEP_SPAN, steps=SWEEP_STEPS, pump_curve=None):
+    """
+    One-at-a-time sweep of `fields` (default sweep_fields()) from (1 - span) to
+    (1 + span) times their base value.
+
+    Returns a long DataFrame with one row per (field, factor): the perturbed
+    value and every SENSITIVITY_OUTPUTS column. The base design is in
+    attrs['base'].
+    """
+    fields = fields or sweep_fields()
+    names = [field for field, _ in REQUIRED_FIELDS] + list(OPTIONAL_FIELDS)
+    base = {name: float(base_inputs.get(name, OPTIONAL_FIELDS.get(name)) or 0) for name in names}
+    factors = np.linspace(1 - span, 1 + span, steps)
+
+    # Base row first, then steps rows per field with only that field changed
+    n_rows = 1 + len(fields) * steps
+    grid = {name: np.full(n_rows, value) for name, value in base.items()}
+    for i, field in enumerate(fields):
+        rows = slice(1 + i * steps, 1 + (i + 1) * steps)
+        values = base[field] * factors
+        if field in FIELD_LIMITS:
+            values = np.clip(values, *FIELD_LIMITS[field])
+        grid[field][rows] = values
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        design = compute_esp_design(grid, pump_curve=pump_curve)
+    outputs = [name for name, _ in SENSITIVITY_OUTPUTS]
+
+    sweep = pd.DataFrame({
+        'field': np.repeat(fields, steps),
+        'factor': np.tile(factors, len(fields)),
+        'value': np.concatenate([grid[field][1 + i * steps:1 + (i + 1) * steps] for i, field in enumerate(fields)]),
+    })
+    values = {name: design[name].to_numpy(dtype=float, na_value=np.nan) for name in outputs}
+    for name in outputs:
+        sweep[name] = values[name][1:]
+    sweep.attrs['base'] = {name: float(values[name][0]) for name in outputs}
+    return sweep
+
+
+def tornado_table(sweep, output):
+    """
+    Swing of one output per swept input: the output at the lowest and highest
+    factor, its minimum and maximum over the sweep and the swing (max - min),
+    sorted largest swing first.
+    """
+    grouped = sweep.groupby('field', sort=False)[output]
+    table = pd.DataFrame({
+        'low': grouped.first(),
+        'high': grouped.last(),
+        'min': grouped.min(),
+        'max': grouped.max(),
+    })
+    table['swing'] = table['max'] - table['min']
+    labels = dict(REQUIRED_FIELDS)
+    table.insert(0, 'label', [labels.get(field, field) for field in table.index])
+    return table.sort_values('swing', ascending=False)
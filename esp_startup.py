@@ -0,0 +1,100 @@
+"""
+Dashboard cold-start import budget.
+
+A new app replica pays for every module esp_dashboard.py imports at module
+level before it can render its first page. Those imports are read from the
+dashboard source and timed one after another in a fresh interpreter, best of a
+few runs, against IMPORT_BUDGET_MS; each module is charged what it adds on top
+of the ones before it. Modules in DEFERRED_MODULES (pandas, SciPy, pyarrow)
+must not be loaded at startup at all: the pages and result sections that need
+them import them on first use.
+
+Usage:
+    python esp_startup.py                         check the budget (exit status 1 when over it)
+    python esp_startup.py --budget 800 --top 15   another budget, more modules listed
+"""
+import argparse
+import ast
+import json
+import os
+import subprocess
+import sys
+
+# Import time the dashboard's module-level imports may take in a fresh interpreter (ms)
+IMPORT_BUDGET_MS = 900
+
+# Heavy modules only imported by the pages that need them
+DEFERRED_MODULES = ('pandas', 'scipy', 'pyarrow')
+
+# Fresh interpreters timed; the fastest counts (the first run also pays for cold disk caches)
+IMPORT_RUNS = 3
+
+DASHBOARD_SCRIPT = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'esp_dashboard.py')
+
+# Imports the given modules in order, then prints the ms each one took and the deferred modules that got loaded
+_TIMER = """
+import importlib, json, sys, time
+times = []
+for name in sys.argv[2:]:
+    start = time.perf_counter()
+    importlib.import_module(name)
+    times.append((name, (time.perf_counter() - start) * 1000))
+print(json.dumps([times, sorted(name for name in json.loads(sys.argv[1]) if name in sys.modules)]))
+"""
+
+
+def startup_imports(script=DASHBOARD_SCRIPT):
+    """Modules a Streamlit script imports at module level, i.e. before any of its pages runs"""
+    with open(script, encoding='utf-8') as f:
+        tree = ast.parse(f.read(), script)
+    modules = []
+    for node in tree.body:
+        if isinstance(node, ast.Import):
+            modules += [alias.name for alias in node.names]
+        elif isinstance(node, ast.ImportFrom) and node.level == 0:
+            modules.append(node.module)
+    return list(dict.fromkeys(modules))
+
+
+def measure_imports(modules, runs=IMPORT_RUNS, deferred=DEFERRED_MODULES):
+    """
+    Import modules in order in runs fresh interpreters. Returns the fastest
+    run's total ms, the ms each module took in it and the deferred modules that
+    were loaded.
+    """
+    best = None
+    for _ in range(runs):
+        proc = subprocess.run([sys.executable, '-c', _TIMER, json.dumps(list(deferred)), *modules],
+                              cwd=os.path.dirname(DASHBOARD_SCRIPT), capture_output=True, text=True, check=True)
+        times, loaded = json.loads(proc.stdout)
+        total = sum(ms for _, ms in times)
+        if best is None or total < best[0]:
+            best = (total, dict(times), loaded)
+    return best
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Check the dashboard's cold-start import time against a budget")
+    parser.add_argument('--budget', type=float, default=IMPORT_BUDGET_MS, help="Import time budget (ms)")
+    parser.add_argument('--runs', type=int, default=IMPORT_RUNS, help="Fresh interpreters timed (fastest counts)")
+    parser.add_argument('--top', type=int, default=8, help="Slowest modules listed")
+    args = parser.parse_args(argv)
+
+    modules = startup_imports()
+    elapsed, times, loaded = measure_imports(modules, args.runs)
+    for name, ms in sorted(times.items(), key=lambda item: -item[1])[:args.top]:
+        print(f"{ms:8.1f} ms  {name}")
+    print(f"{len(modules)} startup imports in {elapsed:.0f} ms (budget {args.budget:.0f} ms, best of {args.runs})")
+
+    failures = []
+    if elapsed > args.budget:
+        failures.append(f"over budget by {elapsed - args.budget:.0f} ms")
+    if loaded:
+        failures.append(f"loaded at startup: {', '.join(loaded)}")
+    for failure in failures:
+        print(f"FAIL: {failure}")
+    return 1 if failures else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,533 @@
+"""
+Streaming live-monitoring ingestion.
+
+A LiveFeed reads timestamped PIP/PDP samples from a local source on a
+background thread and turns each one into an operating point with
+live_operating_point, so the dashboard only has to pick up the latest result
+at its own refresh rate. Sources are given as URLs:
+
+    path/to/samples.csv          tail a CSV file as lines are appended
+    udp://0.0.0.0:5005           listen for one sample per datagram
+    tcp://gateway:5006           connect to a sensor gateway, one sample per line
+    mqtt://broker:1883/topic     subscribe to a topic (needs paho-mqtt)
+
+Samples are CSV lines `timestamp,pip,pdp[,p_gradient[,stages[,frequency]]]`
+or JSON objects with the same keys. Missing gradient/stages/drive frequency
+fall back to the feed's defaults, a missing timestamp to the arrival time.
+
+A feed keeps running through bad samples and sink errors (both counted), and
+reopens its source after a failure, every RESTART_DELAY seconds. Only an
+unusable source URL or a missing client library stops it, with the error in
+LiveFeed.failed.
+
+Running this module replays a sample CSV to a UDP/TCP port, appends it to a
+CSV file, or publishes it on an MQTT topic through a built-in stand-in broker,
+as a local stand-in for a real gauge feed or broker:
+    python esp_stream.py samples.csv udp://127.0.0.1:5005 --rate 10
+    python esp_stream.py samples.csv mqtt://127.0.0.1:1883/wells/NT3 --rate 10
+"""
+import argparse
+import json
+import math
+import os
+import queue
+import socket
+import socketserver
+import struct
+import threading
+import time
+import weakref
+from collections import deque
+from datetime import datetime
+from urllib.parse import urlparse
+
+from esp_design import live_operating_point
+from esp_gas import GAS_LIMIT_STANDARD
+
+try:
+    import paho.mqtt.client as mqtt
+except ImportError:  # mqtt:// sources are unavailable
+    mqtt = None
+
+SAMPLE_FIELDS = ['timestamp', 'pip', 'pdp', 'p_gradient', 'stages', 'frequency']
+
+# Seconds a source waits for data before checking whether it should stop
+POLL_INTERVAL = 0.2
+
+# Operating points kept by a LiveFeed for recent-history views
+FEED_HISTORY = 1000
+
+# Seconds a feed waits before reopening a source that failed
+RESTART_DELAY = 2.0
+
+
+def _parse_timestamp(value):
+    if value in (None, ''):
+        return datetime.now()
+    if isinstance(value, (int, float)) and not isinstance(value, bool):
+        try:
+            return datetime.fromtimestamp(value)
+        except (ValueError, OverflowError, OSError):
+            raise ValueError(f"timestamp out of range: {value!r}") from None
+    if not isinstance(value, str):
+        raise ValueError(f"timestamp is not a number or ISO string: {value!r}")
+    try:
+        return datetime.fromtimestamp(float(value))
+    except (ValueError, OverflowError, OSError):
+        return datetime.fromisoformat(value)
+
+
+def _number(values, field):
+    """A finite float from a CSV field or JSON value; ValueError for anything else"""
+    if values.get(field) in (None, ''):
+        raise ValueError(f"{field} is missing")
+    value = values[field]
+    if isinstance(value, bool) or not isinstance(value, (int, float, str)):
+        raise ValueError(f"{field} is not a number: {value!r}")
+    number = float(value)
+    if not math.isfinite(number):
+        raise ValueError(f"{field} is not finite: {value!r}")
+    return number
+
+
+def parse_sample(payload):
+    """
+    One sample dict from a CSV line or JSON object, or None for blank lines
+    and CSV headers. Raises ValueError on malformed samples (a JSON value that
+    is not an object, missing pip/pdp, values that are not finite numbers).
+    """
+    if isinstance(payload, bytes):
+        payload = payload.decode('utf-8', errors='replace')
+    payload = payload.strip()
+    if not payload:
+        return None
+    if payload.startswith(('{', '[')):
+        values = json.loads(payload)
+        if not isinstance(values, dict):
+            raise ValueError(f"JSON sample is not an object: {payload[:40]}")
+    else:
+        parts = [part.strip() for part in payload.split(',')]
+        if parts[0].lower() == 'timestamp':
+            return None
+        values = dict(zip(SAMPLE_FIELDS, parts))
+
+    sample = {'timestamp': _parse_timestamp(values.get('timestamp')),
+              'pip': _number(values, 'pip'), 'pdp': _number(values, 'pdp')}
+    if values.get('p_gradient') not in (None, ''):
+        sample['p_gradient'] = _number(values, 'p_gradient')
+    if values.get('stages') not in (None, ''):
+        sample['stages'] = int(_number(values, 'stages'))
+    if values.get('frequency') not in (None, ''):
+        sample['frequency'] = _number(values, 'frequency')
+    return sample
+
+
+# ===== SOURCES =====
+# Each source yields raw payloads until stop is set, waking at least every POLL_INTERVAL
+
+def _tail_csv(path, stop, from_start=False):
+    with open(path, 'r') as f:
+        if not from_start:
+            f.seek(0, os.SEEK_END)
+        partial = ''
+        while not stop.is_set():
+            line = f.readline()
+            if not line:
+                time.sleep(POLL_INTERVAL)
+                continue
+            partial += line
+            if partial.endswith('\n'):
+                yield partial
+                partial = ''
+
+
+def _udp(host, port, stop):
+    with socket.socket(socket.AF_INET, socket.SOCK_DGRAM) as sock:
+        # Large receive buffer so bursts are queued rather than dropped while a sample is processed
+        sock.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, 1 << 22)
+        sock.bind((host, port))
+        sock.settimeout(POLL_INTERVAL)
+        while not stop.is_set():
+            try:
+                data, _ = sock.recvfrom(65536)
+            except socket.timeout:
+                continue
+            yield from data.splitlines()
+
+
+def _tcp(host, port, stop):
+    while not stop.is_set():
+        try:
+            sock = socket.create_connection((host, port), timeout=POLL_INTERVAL * 5)
+        except OSError:
+            time.sleep(POLL_INTERVAL * 5)
+            continue
+        with sock:
+            sock.settimeout(POLL_INTERVAL)
+            buffer = b''
+            while not stop.is_set():
+                try:
+                    data = sock.recv(65536)
+                except socket.timeout:
+                    continue
+                if not data:
+                    break
+                *lines, buffer = (buffer + data).split(b'\n')
+                yield from lines
+
+
+def _mqtt(host, port, topic, stop):
+    if mqtt is None:
+        raise ImportError("mqtt:// sources need the paho-mqtt package")
+    messages = queue.Queue()
+    client = mqtt.Client(mqtt.CallbackAPIVersion.VERSION2)
+    client.on_message = lambda client, userdata, message: messages.put(message.payload)
+    client.connect(host, port or 1883)
+    client.subscribe(topic)
+    client.loop_start()
+    try:
+        while not stop.is_set():
+            try:
+                yield messages.get(timeout=POLL_INTERVAL)
+            except queue.Empty:
+                continue
+    finally:
+        client.loop_stop()
+        client.disconnect()
+
+
+def open_source(source, stop):
+    """Payload iterator for a source URL (see the module docstring)"""
+    url = urlparse(source)
+    if url.scheme == 'udp':
+        return _udp(url.hostname or '0.0.0.0', url.port, stop)
+    if url.scheme == 'tcp':
+        return _tcp(url.hostname, url.port, stop)
+    if url.scheme == 'mqtt':
+        return _mqtt(url.hostname, url.port, url.path.lstrip('/'), stop)
+    if url.scheme in ('', 'file'):
+        return _tail_csv(url.path if url.scheme == 'file' else source, stop)
+    raise ValueError(f"Unsupported live data source '{source}'")
+
+
+# ===== FEED =====
+
+class LiveFeed:
+    """Background ingestion of one source into live operating points"""
+
+    def __init__(self, source, pump_curve, stages, target_rate, bep_flow, p_gradient=None,
+                 history=FEED_HISTORY, sink=None, frequency=None, free_gas=0.0, gas_tolerance=GAS_LIMIT_STANDARD,
+                 viscosity=None):
+        self.source = source
+        # Called on the ingestion thread with every operating point (e.g. WellHistory.append_point)
+        self.sink = sink
+        self.samples = 0
+        self.errors = 0
+        self.sink_errors = 0
+        self.restarts = 0
+        self.last_error = None
+        # Error that stopped the feed for good (unusable source URL or missing client library)
+        self.failed = None
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+        self._latest = None
+        self._history = deque(maxlen=history)
+        self.configure(pump_curve, stages, target_rate, bep_flow, p_gradient, frequency, free_gas, gas_tolerance,
+                       viscosity)
+
+    def configure(self, pump_curve, stages, target_rate, bep_flow, p_gradient=None, frequency=None,
+                  free_gas=0.0, gas_tolerance=GAS_LIMIT_STANDARD, viscosity=None):
+        """Design values used for the samples that follow; stages/p_gradient/frequency are sample defaults"""
+        with self._lock:
+            self._design = (pump_curve, stages, target_rate, bep_flow, p_gradient, frequency, free_gas, gas_tolerance,
+                            viscosity)
+
+    @property
+    def running(self):
+        return self._thread is not None and self._thread.is_alive() and not self._stop.is_set()
+
+    def start(self):
+        if not self.running:
+            self._stop.clear()
+            self.failed = None
+            self._thread = threading.Thread(target=self._run, name=f"live-feed {self.source}", daemon=True)
+            self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+
+    def latest(self):
+        """(number of samples processed, latest operating point or None)"""
+        with self._lock:
+            return self.samples, self._latest
+
+    def recent(self):
+        """Recent operating points, oldest first"""
+        with self._lock:
+            return list(self._history)
+
+    def process(self, sample):
+        """Operating point for one parsed sample"""
+        with self._lock:
+            (pump_curve, stages, target_rate, bep_flow, p_gradient, frequency, free_gas, gas_tolerance,
+             viscosity) = self._design
+        p_gradient = sample.get('p_gradient', p_gradient)
+        stages = sample.get('stages', stages)
+        frequency = sample.get('frequency', frequency)
+        if not p_gradient or not stages:
+            raise ValueError("sample has no pressure gradient or stage count and the feed has no default")
+        point = live_operating_point(sample['pip'], sample['pdp'], p_gradient, stages,
+                                     pump_curve, target_rate, bep_flow, frequency, free_gas, gas_tolerance, viscosity)
+        point['timestamp'] = sample['timestamp']
+        return point
+
+    def _record_error(self, counter, error, prefix=''):
+        with self._lock:
+            setattr(self, counter, getattr(self, counter) + 1)
+            self.last_error = f"{prefix}{type(error).__name__}: {error}"
+
+    def _ingest(self, payload):
+        """Process one raw payload; bad samples and sink errors are counted, never raised"""
+        try:
+            sample = parse_sample(payload)
+            if sample is None:
+                return
+            point = self.process(sample)
+        except (ValueError, KeyError, TypeError, AttributeError, ZeroDivisionError) as e:
+            self._record_error('errors', e)
+            return
+        with self._lock:
+            self._latest = point
+            self._history.append(point)
+            self.samples += 1
+        if self.sink is not None:
+            try:
+                self.sink(point)
+            except Exception as e:
+                self._record_error('sink_errors', e, prefix='sink ')
+
+    def _run(self):
+        while not self._stop.is_set():
+            try:
+                for payload in open_source(self.source, self._stop):
+                    self._ingest(payload)
+            except (ImportError, ValueError) as e:
+                with self._lock:
+                    self.failed = self.last_error = f"{type(e).__name__}: {e}"
+                self._stop.set()
+            except Exception as e:
+                # Connection lost, file rotated away, broker down...: reopen the source after a pause
+                self._record_error('restarts', e)
+                self._stop.wait(RESTART_DELAY)
+
+
+class FeedLease:
+    """
+    Keeps a LiveFeed running only while the lease is referenced. Hold it in the
+    state of the session that started the feed: the feed's thread keeps the
+    feed itself alive, but when the session is discarded the lease is garbage
+    collected and stops the feed.
+    """
+
+    def __init__(self, feed):
+        self.feed = feed
+        weakref.finalize(self, feed.stop)
+
+
+# ===== LOCAL STAND-IN BROKER AND PUBLISHER =====
+
+def _read_exactly(sock, n):
+    data = b''
+    while len(data) < n:
+        chunk = sock.recv(n - len(data))
+        if not chunk:
+            raise ConnectionError("client disconnected")
+        data += chunk
+    return data
+
+
+def _read_packet(sock):
+    """One MQTT control packet: (type, flags, body)"""
+    first = _read_exactly(sock, 1)[0]
+    length, shift = 0, 0
+    while True:
+        byte = _read_exactly(sock, 1)[0]
+        length += (byte & 0x7F) << shift
+        shift += 7
+        if not byte & 0x80:
+            break
+    return first >> 4, first & 0x0F, _read_exactly(sock, length)
+
+
+def _packet(packet_type, body, flags=0):
+    """Encode an MQTT control packet"""
+    header, length = bytes([packet_type << 4 | flags]), len(body)
+    while True:
+        byte, length = length & 0x7F, length >> 7
+        header += bytes([byte | (0x80 if length else 0)])
+        if not length:
+            return header + body
+
+
+def _string(body, offset):
+    """A length-prefixed UTF-8 string of a packet body and the offset after it"""
+    (n,) = struct.unpack_from('!H', body, offset)
+    return body[offset + 2:offset + 2 + n].decode('utf-8'), offset + 2 + n
+
+
+def topic_matches(topic_filter, topic):
+    """MQTT topic filter match, with + (one level) and # (all remaining levels) wildcards"""
+    levels, parts = topic_filter.split('/'), topic.split('/')
+    for i, level in enumerate(levels):
+        if level == '#':
+            return True
+        if i >= len(parts) or level not in ('+', parts[i]):
+            return False
+    return len(levels) == len(parts)
+
+
+class StandInBroker:
+    """
+    Minimal MQTT 3.1.1 broker for trying mqtt:// feeds without a real one:
+    clients connect, subscribe and publish; every message is delivered at QoS 0
+    to the clients subscribed to a matching filter. No retained messages,
+    sessions or authentication.
+    """
+
+    def __init__(self, host='127.0.0.1', port=1883):
+        broker = self
+
+        class Handler(socketserver.BaseRequestHandler):
+            def handle(self):
+                broker._serve(self.request)
+
+        socketserver.ThreadingTCPServer.allow_reuse_address = True
+        self.server = socketserver.ThreadingTCPServer((host, port), Handler)
+        self.server.daemon_threads = True
+        self.address = self.server.server_address
+        self._subscriptions = {}
+        self._lock = threading.Lock()
+        self._subscribed = threading.Condition(self._lock)
+
+    def start(self):
+        threading.Thread(target=self.server.serve_forever, name="mqtt stand-in broker", daemon=True).start()
+        return self
+
+    def stop(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+    def wait_for_subscriber(self, topic, timeout=None):
+        """Block until a client subscribes to a filter matching topic; False on timeout"""
+        with self._subscribed:
+            return self._subscribed.wait_for(
+                lambda: any(topic_matches(f, topic) for filters in self._subscriptions.values() for f in filters),
+                timeout)
+
+    def publish(self, topic, payload):
+        """Deliver a message to every matching subscriber (QoS 0)"""
+        if isinstance(payload, str):
+            payload = payload.encode('utf-8')
+        encoded = topic.encode('utf-8')
+        message = _packet(3, struct.pack('!H', len(encoded)) + encoded + payload)
+        with self._lock:
+            for sock, filters in list(self._subscriptions.items()):
+                if any(topic_matches(f, topic) for f in filters):
+                    try:
+                        sock.sendall(message)
+                    except OSError:
+                        del self._subscriptions[sock]
+
+    def _serve(self, sock):
+        with self._lock:
+            self._subscriptions[sock] = set()
+        try:
+            while True:
+                packet_type, flags, body = _read_packet(sock)
+                if packet_type == 1:  # CONNECT
+                    sock.sendall(_packet(2, b'\x00\x00'))
+                elif packet_type == 3:  # PUBLISH
+                    topic, offset = _string(body, 0)
+                    qos = (flags >> 1) & 0x03
+                    if qos:
+                        packet_id, offset = body[offset:offset + 2], offset + 2
+                        sock.sendall(_packet(4, packet_id) if qos == 1 else _packet(5, packet_id))
+                    self.publish(topic, body[offset:])
+                elif packet_type == 6:  # PUBREL (QoS 2 handshake)
+                    sock.sendall(_packet(7, body[:2]))
+                elif packet_type in (8, 10):  # SUBSCRIBE, UNSUBSCRIBE
+                    filters, offset = [], 2
+                    while offset < len(body):
+                        topic_filter, offset = _string(body, offset)
+                        filters.append(topic_filter)
+                        offset += packet_type == 8  # requested QoS
+                    with self._subscribed:
+                        if packet_type == 8:
+                            self._subscriptions[sock].update(filters)
+                            self._subscribed.notify_all()
+                            sock.sendall(_packet(9, body[:2] + b'\x00' * len(filters)))
+                        else:
+                            self._subscriptions[sock].difference_update(filters)
+                            sock.sendall(_packet(11, body[:2]))
+                elif packet_type == 12:  # PINGREQ
+                    sock.sendall(_packet(13, b''))
+                elif packet_type == 14:  # DISCONNECT
+                    break
+        except (ConnectionError, OSError):
+            pass
+        finally:
+            with self._lock:
+                self._subscriptions.pop(sock, None)
+
+
+def replay(samples_path, target, rate=1.0, loop=False):
+    """
+    Send the lines of a sample CSV at `rate` lines/s to a udp://, tcp:// (served),
+    mqtt://host:port/topic (served by a StandInBroker) or CSV file target
+    """
+    with open(samples_path) as f:
+        lines = [line.strip() for line in f if line.strip() and not line.lower().startswith('timestamp')]
+    url = urlparse(target)
+
+    if url.scheme == 'mqtt':
+        topic = url.path.lstrip('/')
+        broker = StandInBroker(url.hostname or '0.0.0.0', url.port or 1883).start()
+        print(f"MQTT stand-in broker on {target}, waiting for a subscriber to '{topic}'")
+        broker.wait_for_subscriber(topic)
+        send = lambda line: broker.publish(topic, line)
+    elif url.scheme == 'udp':
+        sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        send = lambda line: sock.sendto(line.encode(), (url.hostname, url.port))
+    elif url.scheme == 'tcp':
+        server = socket.create_server((url.hostname or '0.0.0.0', url.port))
+        print(f"Waiting for a connection on {target}")
+        sock, _ = server.accept()
+        send = lambda line: sock.sendall(line.encode() + b'\n')
+    else:
+        out = open(target, 'a', buffering=1)
+        send = lambda line: out.write(line + '\n')
+
+    while True:
+        for line in lines:
+            # Fresh timestamps, so replayed data looks live
+            parts = line.split(',', 1)
+            send(f"{datetime.now().isoformat()},{parts[1]}" if len(parts) == 2 else line)
+            time.sleep(1.0 / rate)
+        if not loop:
+            break
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Replay PIP/PDP samples as a live sensor feed")
+    parser.add_argument('samples', help="CSV with timestamp,pip,pdp[,p_gradient[,stages[,frequency]]] rows")
+    parser.add_argument('target', help="udp://host:port, tcp://host:port, mqtt://host:port/topic or a CSV file")
+    parser.add_argument('--rate', type=float, default=1.0, help="Samples per second (default 1)")
+    parser.add_argument('--loop', action='store_true', help="Repeat the samples forever")
+    args = parser.parse_args(argv)
+    replay(args.samples, args.target, args.rate, args.loop)
+
+
+if __name__ == '__main__':
+    main()
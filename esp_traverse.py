@@ -0,0 +1,133 @@
+"""
+Multiphase pressure traverse of the production tubing.
+
+The tubing from the wellhead down to the pump (pump_setting_depth_md, at the
+average inclination given by the TVD/MD ratio) is cut into equal segments.
+Each segment carries oil, water and the gas that entered the tubing (the
+solution gas plus what the gas separators let through); gas comes out of
+solution below the bubble point (Standing: Rs ~ p ** 1.2048) and expands
+with the real-gas law. The mixture is treated as a homogeneous no-slip
+fluid with a Moody friction factor from the Swamee-Jain equation.
+
+Every segment and every flow is evaluated at once: the pressure profile is
+refined by a few fixed-point passes in which all segment gradients come
+from the previous profile and a cumulative sum integrates them. A 200 flow
+x 100 segment system curve is a handful of (200, 100) array expressions.
+"""
+import numpy as np
+
+from esp_gas import gas_not_separated_fraction
+from esp_viscosity import WATER_VISCOSITY, dead_oil_viscosity, live_oil_viscosity
+
+# Segments of the traverse and fixed-point passes over the pressure profile
+TRAVERSE_SEGMENTS = 100
+TRAVERSE_PASSES = 6
+
+# Surface temperature (F) of the linear temperature profile down to bottom_hole_temp
+SURFACE_TEMPERATURE = 80.0
+
+# Absolute tubing roughness (in) and gas viscosity (cP)
+TUBING_ROUGHNESS = 0.0006
+GAS_VISCOSITY = 0.02
+
+ATMOSPHERIC_PRESSURE = 14.7
+
+
+def _swamee_jain(reynolds, relative_roughness):
+    """Moody friction factor; laminar 64 / Re below Re = 2000"""
+    reynolds = np.maximum(reynolds, 1.0)
+    turbulent = 0.25 / np.log10(relative_roughness / 3.7 + 5.74 / reynolds ** 0.9) ** 2
+    return np.where(reynolds < 2000, 64 / reynolds, turbulent)
+
+
+def pressure_traverse(x, rate, rs, n_segments=TRAVERSE_SEGMENTS, passes=TRAVERSE_PASSES):
+    """
+    Pressure traverse from the wellhead down to the pump for wells producing
+    `rate` STB/d of liquid.
+
+    `x` maps the design inputs to arrays of one value per well and `rs` is the
+    solution GOR at the bubble point (scf/STB). `rate` has one row per well
+    and any number of flow points behind it: (n_wells,) for one flow per
+    well, (n_wells, n_flows) for a system curve.
+
+    Returns a dict of arrays shaped like `rate`: pump discharge pressure
+    'pdp' (psig), its 'dp_friction' and 'dp_elevation' parts (psi), and
+    'h_friction', the friction loss in ft of the intake fluid.
+    """
+    rate = np.maximum(np.asarray(rate, dtype=np.float64), 0)
+    extra_dims = (1,) * (rate.ndim - 1)
+
+    def column(value):
+        # One value per well, broadcast over the flow points and the segment axis
+        value = np.asarray(value, dtype=np.float64)
+        return value.reshape(value.shape + extra_dims + (1,))
+
+    water_cut = column(x['water_cut'])
+    oil_sg = 141.5 / (131.5 + column(x['oil_api']))
+    water_sg = column(x['water_sg'])
+    gas_sg = column(x['gas_sg'])
+    z = column(x['gas_compressibility'])
+    bubble_point = np.maximum(column(x['bubble_point_pressure']), 1.0)
+    rs_bubble = column(rs)
+    diameter = column(x['tubing_id']) / 12
+    length = column(x['pump_setting_depth_md'])
+    cos_angle = np.clip(column(x['pump_setting_depth_tvd']) / np.maximum(length, 1.0), 0, 1)
+    fluid_sg = oil_sg * (1 - water_cut) + water_sg * water_cut
+
+    # Gas entering the tubing per STB of oil: solution gas plus the free gas not separated
+    gor = column(x['gor'])
+    not_separated = column(gas_not_separated_fraction(x['pump_od'], x['num_rgs_od400'], x['num_rgs_od500']))
+    tubing_gor = np.where(gor > rs_bubble, rs_bubble + (gor - rs_bubble) * not_separated, gor)
+
+    # Segment midpoints along the tubing, with the linear temperature profile
+    fraction = (np.arange(n_segments) + 0.5) / n_segments
+    dz = length / n_segments
+    temperature = SURFACE_TEMPERATURE + (column(x['bottom_hole_temp']) - SURFACE_TEMPERATURE) * fraction
+    mu_oil = live_oil_viscosity(dead_oil_viscosity(column(x['oil_api']), temperature), rs_bubble)
+    mu_liquid = mu_oil * (1 - water_cut) + WATER_VISCOSITY * water_sg * water_cut
+
+    q = rate[..., None]
+    q_oil = q * (1 - water_cut)
+    q_water = q * water_cut
+    area = np.pi / 4 * diameter ** 2
+    mass_rate = ((q_oil * oil_sg + q_water * water_sg) * 5.615 * 62.4
+                 + q_oil * tubing_gor * gas_sg * 0.0764) / 86400  # lbm/s
+    liquid_gradient = 0.433 * fluid_sg * cos_angle
+
+    p_wh = column(x['p_wh'])
+    pressure = p_wh + liquid_gradient * fraction * length
+    for _ in range(passes):
+        p_abs = np.maximum(pressure, 0) + ATMOSPHERIC_PRESSURE
+        rs_p = np.minimum(rs_bubble * np.minimum(p_abs / bubble_point, 1) ** 1.2048, tubing_gor)
+        bo = 0.972 + 0.000147 * (rs_p * (gas_sg / oil_sg) ** 0.5 + 1.25 * temperature) ** 1.175
+        bg = 0.02827 * z * (temperature + 460) / p_abs  # ft3/scf
+
+        # In-situ volumes (ft3/s), no-slip holdup and mixture properties
+        v_oil = q_oil * bo * 5.615 / 86400
+        v_water = q_water * 5.615 / 86400
+        v_gas = q_oil * (tubing_gor - rs_p) * bg / 86400
+        v_total = np.maximum(v_oil + v_water + v_gas, 1e-12)
+        holdup = (v_oil + v_water) / v_total
+        density = mass_rate / v_total  # lbm/ft3
+        velocity = v_total / area
+        viscosity = holdup * mu_liquid + (1 - holdup) * GAS_VISCOSITY
+        reynolds = 1488 * density * velocity * diameter / viscosity
+        friction = _swamee_jain(reynolds, TUBING_ROUGHNESS / 12 / diameter)
+
+        # Where nothing flows the column is static liquid
+        density = np.where(q > 0, density, 62.4 * fluid_sg)
+        elevation_gradient = density * cos_angle / 144
+        friction_gradient = friction * density * velocity ** 2 / (2 * 32.174 * diameter) / 144
+        gradient = elevation_gradient + friction_gradient
+
+        # Pressure at each segment midpoint: everything above it plus half of its own segment
+        pressure = p_wh + (np.cumsum(gradient, axis=-1) - 0.5 * gradient) * dz
+
+    dp_friction = np.sum(friction_gradient * dz, axis=-1)
+    dp_elevation = np.sum(elevation_gradient * dz, axis=-1)
+    return {
+        'pdp': p_wh[..., 0] + dp_friction + dp_elevation,
+        'dp_friction': dp_friction,
+        'dp_elevation': dp_elevation,
+        'h_friction': dp_friction / (0.433 * fluid_sg[..., 0]),
+    }
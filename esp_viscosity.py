@@ -0,0 +1,113 @@
+"""
+Viscosity correction of pump performance for heavy-oil wells.
+
+Oil viscosity comes from the Beggs-Robinson dead- and live-oil correlations
+on oil_api, bottom_hole_temp and rs; the liquid at the intake is the
+volume-weighted oil/water mix. The pump curve is corrected with the
+ANSI/HI 9.6.7 method: a parameter B from the kinematic viscosity and the BEP
+flow, head and speed gives flow (C_Q), efficiency (C_eta) and head (C_H)
+factors. A viscous pump delivers C_Q * Q at C_H * H where the water curve
+delivers Q at H, and draws C_Q * C_H / C_eta of the water BHP.
+
+The factors depend only on viscosity and flow for a given curve, so they are
+tabulated once per curve on a log-viscosity x flow grid (the curve's
+power_peak_flow stands in for the BEP) and looked up in bulk.
+"""
+import numpy as np
+
+from esp_gas import table_lookup
+
+# Water viscosity (cSt); below roughly this the correction is 1
+WATER_VISCOSITY = 1.0
+
+# Shaft speed (rpm) of a two-pole motor at the rated frequency of the curves
+RATED_RPM = 2915.0
+
+# Flow conversion for the HI parameter B
+GPM_PER_BPD = 42.0 / 1440.0
+
+# B above which the HI method no longer applies; factors are held at this value beyond it
+HI_MAX_B = 40.0
+
+# Kinematic viscosity range (cSt) and points of the correction table
+VISCOSITY_RANGE = (1.0, 10000.0)
+VISCOSITY_TABLE_POINTS = 161
+VISCOSITY_TABLE_FLOWS = 256
+
+
+def dead_oil_viscosity(oil_api, temperature):
+    """Gas-free oil viscosity (cP) at temperature (F), Beggs-Robinson"""
+    y = 10 ** (3.0324 - 0.02023 * np.asarray(oil_api, dtype=np.float64))
+    return 10 ** (y * np.asarray(temperature, dtype=np.float64) ** -1.163) - 1
+
+
+def live_oil_viscosity(dead_viscosity, rs):
+    """Oil viscosity (cP) with rs scf/STB of gas in solution, Beggs-Robinson"""
+    rs = np.maximum(np.asarray(rs, dtype=np.float64), 0)
+    a = 10.715 * (rs + 100) ** -0.515
+    b = 5.44 * (rs + 150) ** -0.338
+    return a * np.asarray(dead_viscosity, dtype=np.float64) ** b
+
+
+def hi_parameter(viscosity, bep_flow, bep_head, rpm=RATED_RPM):
+    """HI parameter B from kinematic viscosity (cSt), BEP flow (bpd), BEP head per stage (ft) and speed (rpm)"""
+    return (26.6 * np.asarray(viscosity, dtype=np.float64) ** 0.5 * np.asarray(bep_head, dtype=np.float64) ** 0.0625
+            / ((np.asarray(bep_flow, dtype=np.float64) * GPM_PER_BPD) ** 0.375 * rpm ** 0.25))
+
+
+def hi_factors(b):
+    """Flow and efficiency correction factors (C_Q, C_eta) for HI parameter B; 1 where B <= 1"""
+    b = np.clip(np.asarray(b, dtype=np.float64), 1, HI_MAX_B)
+    c_q = 2.71 ** (-0.165 * np.log10(b) ** 3.15)
+    c_eta = b ** -(0.0547 * b ** 0.69)
+    return c_q, c_eta
+
+
+class ViscosityCorrection:
+    """HI correction factors of one PumpCurve on a log-viscosity x flow grid"""
+
+    def __init__(self, curve, n_viscosities=VISCOSITY_TABLE_POINTS, n_flows=VISCOSITY_TABLE_FLOWS):
+        self.curve = curve
+        self.q_max = float(curve.q.max())
+        bep_flow = curve.power_peak_flow
+        self._log_range = np.log10(VISCOSITY_RANGE)
+
+        self.viscosities = np.logspace(*self._log_range, n_viscosities)
+        self.flows = np.linspace(0, self.q_max, n_flows)
+        self.c_q, self.c_eta = hi_factors(hi_parameter(self.viscosities, bep_flow, curve.head(bep_flow)))
+        # Head factor over the water-curve flow: 1 - (1 - C_Q) * (Q / Q_BEP) ** 0.75
+        self.c_h = np.clip(1 - np.multiply.outer(1 - self.c_q, (self.flows / bep_flow) ** 0.75), 0, 1)
+        for values in (self.viscosities, self.flows, self.c_q, self.c_eta, self.c_h):
+            values.flags.writeable = False
+
+    def _row(self, viscosity, speed):
+        """Fractional table row of a kinematic viscosity; B scales with 1 / sqrt(speed) like viscosity"""
+        with np.errstate(divide='ignore', invalid='ignore'):
+            log_viscosity = np.log10(np.asarray(viscosity, dtype=np.float64) / speed)
+        low, high = self._log_range
+        row = (log_viscosity - low) / (high - low) * (len(self.viscosities) - 1)
+        return np.where(np.isnan(row), 0, row)
+
+    def water_factors(self, q_water, viscosity, speed=1.0):
+        """
+        (C_Q, C_H, C_eta) at a flow q_water (bpd, at rated speed) on the water
+        curve, for a kinematic viscosity (cSt) at `speed` times the rated speed
+        """
+        q_water, viscosity, speed = np.broadcast_arrays(
+            *(np.asarray(v, dtype=np.float64) for v in (q_water, viscosity, speed)))
+        row = self._row(viscosity, speed)
+        rows = np.arange(len(self.viscosities))
+        c_q = np.interp(row, rows, self.c_q)
+        c_eta = np.interp(row, rows, self.c_eta)
+        c_h = table_lookup(self.c_h, row, q_water / self.q_max * (len(self.flows) - 1))
+        return c_q, c_h, c_eta
+
+    def factors(self, q, viscosity, speed=1.0):
+        """(C_Q, C_H, C_eta) at a viscous flow q (bpd, at rated speed); C_H is taken at q / C_Q"""
+        c_q = np.interp(self._row(viscosity, speed), np.arange(len(self.viscosities)), self.c_q)
+        return self.water_factors(np.asarray(q, dtype=np.float64) / c_q, viscosity, speed)
+
+    def head(self, q, viscosity, speed=1.0):
+        """Viscous head per stage (ft) at viscous flow q (bpd, at rated speed)"""
+        c_q, c_h, _ = self.factors(q, viscosity, speed)
+        return c_h * self.curve.head(np.asarray(q, dtype=np.float64) / c_q)
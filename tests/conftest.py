@@ -0,0 +1,21 @@
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+@pytest.fixture
+def well():
+    """Design inputs of one producing well (water cut as a fraction)"""
+    return dict(
+        bep_flow=2500, rec_min=2000, rec_max=3000, bhp_per_stage=1.2,
+        perf_start_depth_md=8000, perf_start_depth_tvd=7800,
+        pump_setting_depth_tvd=7000, pump_setting_depth_md=7200, tubing_id=2.992,
+        target_rate=2500, water_cut=0.8, p_wh=150, static_pressure=3000, bottom_hole_temp=200,
+        water_sg=1.05, oil_api=30, gas_sg=0.7, bubble_point_pressure=1500, gas_compressibility=0.85,
+        gor=200, productivity_index=2.5, pump_od=4, cable_number=1,
+        motor_hp_nameplate=300, motor_voltage_nameplate=2125, motor_ampere_nameplate=89, motor_frequency=50,
+        transformer_voltage=15000, motor_power_factor=0.85, motor_efficiency=0.85, pump_efficiency=0.6,
+    )
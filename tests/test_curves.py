@@ -0,0 +1,34 @@
+import numpy as np
+
+from esp_curves import PumpCurve
+from esp_design import DEFAULT_H_CURVE, DEFAULT_Q_CURVE
+
+
+def make_curve():
+    return PumpCurve(DEFAULT_Q_CURVE, DEFAULT_H_CURVE)
+
+
+def test_flow_inverts_head_on_the_stable_branch():
+    curve = make_curve()
+    # Past the flat top around the peak, where each head has a single flow
+    q = np.linspace(1500, 4000, 200)
+    np.testing.assert_allclose(curve.flow(curve._smooth(q)), q, rtol=1e-3)
+
+
+def test_head_of_flow_round_trips():
+    curve = make_curve()
+    h = np.linspace(15, curve.peak_head - 0.5, 100)
+    np.testing.assert_allclose(curve._smooth(curve.flow(h)), h, atol=0.05)
+
+
+def test_flow_accepts_scalars_and_clips_outside_the_curve():
+    curve = make_curve()
+    assert np.ndim(curve.flow(30.0)) == 0
+    assert curve.flow(curve.peak_head + 10) == curve.peak_flow
+    assert curve.flow(0.0) == curve.flow(curve._h_min)
+    assert np.isnan(curve.flow(np.nan))
+
+
+def test_head_interpolates_the_catalog_points():
+    curve = make_curve()
+    np.testing.assert_allclose(curve.head(curve.q), curve.h, atol=1e-9)
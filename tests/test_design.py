@@ -0,0 +1,62 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from esp_curves import get_pump_curve, speed_ratio
+from esp_design import (DEFAULT_H_CURVE, DEFAULT_Q_CURVE, SOLVER_TOLERANCE, _head_mismatch, _read_inputs,
+                        compute_esp_design, solve_operating_point)
+
+
+@pytest.fixture
+def field(well):
+    """Four variations of the well, one per row"""
+    wells = pd.DataFrame([well] * 4, index=['A-1', 'A-2', 'A-3', 'A-4'])
+    wells['target_rate'] = [1500, 2000, 2500, 3000]
+    wells['water_cut'] = [0.02, 0.3, 0.8, 0.98]
+    wells['gor'] = [100, 150, 200, 100]
+    wells['drive_frequency'] = [0, 45, 50, 60]
+    wells['num_rgs_od400'] = [0, 1, 2, 0]
+    return wells
+
+
+def test_vectorized_design_matches_scalar_runs(field):
+    batch = compute_esp_design(field)
+    assert list(batch.index) == list(field.index)
+    for name, row in field.iterrows():
+        single = compute_esp_design(row.to_dict())
+        assert len(single) == 1
+        pd.testing.assert_series_equal(single.iloc[0], batch.loc[name], check_names=False)
+
+
+def test_design_sizes_stages_for_the_tdh(well):
+    design = compute_esp_design(well).iloc[0]
+    assert not design['gas_over_limit']
+    assert design['n_stages'] * design['head_per_stage'] >= design['TDH_design']
+    assert (design['n_stages'] - 1) * design['head_per_stage'] < design['TDH_design']
+
+
+def test_design_refuses_gas_locked_pump(well):
+    design = compute_esp_design(dict(well, gor=600)).iloc[0]
+    assert design['gas_over_limit']
+    assert pd.isna(design['n_stages'])
+
+
+def test_solver_converges_on_installed_pump(field):
+    design = compute_esp_design(field)
+    result = solve_operating_point(field, design['n_stages'])
+    assert result['op_converged'].all()
+    assert result.attrs['solver']['converged'] == len(field)
+
+    x = _read_inputs(field)
+    x['n_stages'] = design['n_stages'].to_numpy(dtype=float)
+    x['speed'] = speed_ratio(x['drive_frequency'])
+    pump_curve = get_pump_curve(DEFAULT_Q_CURVE, DEFAULT_H_CURVE)
+    mismatch = _head_mismatch(x, result['q_operating'].to_numpy(), pump_curve)
+    assert np.all(np.abs(mismatch) < SOLVER_TOLERANCE)
+    # Sized at the target rate, the installed pump runs close to it
+    np.testing.assert_allclose(result['q_operating'], field['target_rate'], rtol=0.05)
+
+
+def test_solver_reports_wells_without_a_crossing(well):
+    result = solve_operating_point(well, 1)
+    assert not result['op_converged'].iloc[0]
@@ -0,0 +1,69 @@
+from datetime import datetime
+
+import numpy as np
+
+from esp_history import HISTORY_FIELDS, WellHistory
+
+
+def reading(t):
+    return (t, 800.0 + t, 3000.0, 2000.0 + t, 2200.0, -5.0)
+
+
+def filled(n, capacity=5):
+    history = WellHistory(None, capacity=capacity)
+    for t in range(1, n + 1):
+        history.append(*reading(float(t)))
+    return history
+
+
+def test_ring_wraps_keeping_the_newest_readings():
+    history = filled(8)
+    assert len(history) == 5
+    assert history.last_time == 8.0
+    arrays = history.arrays()
+    np.testing.assert_array_equal(arrays['timestamp'], [4, 5, 6, 7, 8])
+    np.testing.assert_array_equal(arrays['Q'], [2004, 2005, 2006, 2007, 2008])
+
+
+def test_query_ranges_across_the_wrap():
+    history = filled(8)
+    np.testing.assert_array_equal(history.arrays(start=5, end=7)['timestamp'], [5, 6, 7])
+    np.testing.assert_array_equal(history.arrays(start=6.5)['timestamp'], [7, 8])
+    np.testing.assert_array_equal(history.arrays(end=4)['timestamp'], [4])
+    assert len(history.arrays(start=9)['timestamp']) == 0
+
+    result = history.query(fields=('Q',), start=5, end=7)
+    assert result['raw_rows'] == 3
+    times, values = result['Q']
+    np.testing.assert_array_equal(values, [2005, 2006, 2007])
+    assert [t.to_pydatetime() for t in times] == [datetime.fromtimestamp(t) for t in (5, 6, 7)]
+
+
+def test_late_and_replayed_readings_are_skipped():
+    history = filled(3)
+    assert not history.append(*reading(3.0))
+    assert not history.append(*reading(2.0))
+    assert history.append(*reading(4.0))
+    np.testing.assert_array_equal(history.arrays()['timestamp'], [1, 2, 3, 4])
+
+
+def test_extend_keeps_order_and_capacity():
+    history = filled(3)
+    rows = [reading(t) for t in (2.0, 4.0, 5.0, 6.0)]
+    columns = {field: np.array(values) for field, values in zip(HISTORY_FIELDS, zip(*rows))}
+    assert history.extend(columns) == 3
+    np.testing.assert_array_equal(history.arrays()['timestamp'], [2, 3, 4, 5, 6])
+
+
+def test_datetimes_are_local_like_the_readings():
+    history = WellHistory(None)
+    now = datetime(2026, 7, 1, 12, 30)
+    history.append(now, 800.0, 3000.0, 2000.0, 2200.0, -5.0)
+    assert history.frame()['timestamp'].iloc[0].to_pydatetime() == now
+
+
+def test_memory_history_never_touches_disk(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    history = filled(3)
+    history.flush()
+    assert list(tmp_path.iterdir()) == []
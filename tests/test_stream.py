@@ -0,0 +1,66 @@
+from datetime import datetime
+
+import pytest
+
+from esp_curves import get_pump_curve
+from esp_design import DEFAULT_H_CURVE, DEFAULT_Q_CURVE
+from esp_stream import LiveFeed, parse_sample
+
+
+def test_parses_csv_and_json_samples():
+    sample = parse_sample('1700000000,850.5,3020,0.38,120,55')
+    assert sample == {'timestamp': datetime.fromtimestamp(1700000000), 'pip': 850.5, 'pdp': 3020.0,
+                      'p_gradient': 0.38, 'stages': 120, 'frequency': 55.0}
+    sample = parse_sample(b'{"timestamp": "2026-07-01T12:00:00", "pip": 850, "pdp": "3020"}')
+    assert sample == {'timestamp': datetime(2026, 7, 1, 12), 'pip': 850.0, 'pdp': 3020.0}
+
+
+@pytest.mark.parametrize('payload', ['', '   \n', 'timestamp,pip,pdp'])
+def test_blank_lines_and_headers_are_not_samples(payload):
+    assert parse_sample(payload) is None
+
+
+@pytest.mark.parametrize('payload', [
+    '2026-07-01T12:00:00,abc,3000',
+    '2026-07-01T12:00:00,850',
+    '2026-07-01T12:00:00,nan,3000',
+    '2026-07-01T12:00:00,850,inf',
+    'not a date,850,3000',
+    '{"pip": 850}',
+    '{"pip": [850], "pdp": 3000}',
+    '{"pip": {"value": 850}, "pdp": 3000}',
+    '{"pip": true, "pdp": 3000}',
+    '{"pip": 850, "pdp": 3000, "timestamp": [1]}',
+    '{"pip": 850, "pdp": 3000, "timestamp": 1e30}',
+    '[850, 3000]',
+    '{"pip": 850,',
+])
+def test_malformed_samples_raise_value_error(payload):
+    with pytest.raises(ValueError):
+        parse_sample(payload)
+
+
+def test_feed_counts_bad_samples_and_keeps_going():
+    feed = LiveFeed('unused.csv', get_pump_curve(DEFAULT_Q_CURVE, DEFAULT_H_CURVE), stages=120,
+                    target_rate=2000, bep_flow=2200, p_gradient=0.38)
+    for payload in ['timestamp,pip,pdp', '{"pip": [850], "pdp": 3000}', '[1, 2]', ',850,3000',
+                    '2026-07-01T12:00:00,abc,3000', '2026-07-01T12:00:01,850,3000']:
+        feed._ingest(payload)
+    samples, latest = feed.latest()
+    assert samples == 2
+    assert feed.errors == 3
+    assert feed.last_error.startswith('ValueError')
+    assert latest['timestamp'] == datetime(2026, 7, 1, 12, 0, 1)
+    assert latest['live_Q'] > 0
+
+
+def test_sink_errors_are_counted_separately():
+    def sink(point):
+        raise OSError('disk full')
+
+    feed = LiveFeed('unused.csv', get_pump_curve(DEFAULT_Q_CURVE, DEFAULT_H_CURVE), stages=120,
+                    target_rate=2000, bep_flow=2200, p_gradient=0.38, sink=sink)
+    feed._ingest('2026-07-01T12:00:00,850,3000')
+    assert feed.samples == 1
+    assert feed.errors == 0
+    assert feed.sink_errors == 1